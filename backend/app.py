@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, Response, jsonify, send_from_directory, request
 from flask_cors import CORS
 from config import Config
 import os
@@ -6,6 +6,8 @@ import logging
 from routes.extractos import extractos_bp
 from routes.siradig import siradig_bp
 from routes.consolidador import consolidador_bp
+from routes.triage import triage_bp
+from utils.metrics import render_prometheus
 from dotenv import load_dotenv
 
 
@@ -32,7 +34,7 @@ def create_app():
     # CORS - permite requests desde cualquier origen
     CORS(app, 
         origins=["*"],
-        allow_headers=["Content-Type", "ngrok-skip-browser-warning"],
+        allow_headers=["Content-Type", "ngrok-skip-browser-warning", "X-Admin-Token"],
         methods=["GET", "POST", "OPTIONS"],
         supports_credentials=False)
 
@@ -40,6 +42,7 @@ def create_app():
     app.register_blueprint(extractos_bp, url_prefix='/api/extractos')
     app.register_blueprint(siradig_bp, url_prefix='/api/siradig')
     app.register_blueprint(consolidador_bp, url_prefix='/api/consolidador')
+    app.register_blueprint(triage_bp, url_prefix='/api/triage')
 
     # Servir frontend
     @app.route('/')
@@ -63,6 +66,11 @@ def create_app():
             "message": "TGA Tools API funcionando correctamente"
         })
 
+    # Métricas (formato texto Prometheus)
+    @app.route("/api/metrics")
+    def metrics():
+        return Response(render_prometheus(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
     # Error handlers
     @app.errorhandler(404)
     def not_found(e):
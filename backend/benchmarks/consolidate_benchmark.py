@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de consolidate()
+--------------------------
+Arma extractos sintéticos con las columnas que devuelven los parsers (fecha
+dd/mm/yyyy como texto, año/mes como texto, montos float) y mide consolidate
+para tamaños crecientes. Reporta segundos y µs por movimiento de cada tamaño:
+si el costo por movimiento se mantiene plano, el escalado es lineal.
+
+Con --overlap N cada extracto repite las últimas N filas del anterior (como
+ENE-JUNIO + JUN+JUL) y se mide también dedupe_movements sobre el consolidado,
+verificando que quede exactamente un movimiento por fila original.
+
+Uso (desde backend/):
+    python -m benchmarks.consolidate_benchmark
+    python -m benchmarks.consolidate_benchmark --sizes 500000 1000000 4000000 --rows 5000
+    python -m benchmarks.consolidate_benchmark --overlap 200
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.pipeline_benchmark import peak_rss_mb  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+BANKS = ["MACRO", "ICBC", "SANTANDER", "GALICIA", "BBVA", "COMAFI"]
+DETALLES = np.array([
+    "TRANSFERENCIA RECIBIDA", "DEB. AUTOM. DE SERV.", "IMP. DEB. LEY 25413",
+    "PAGO PROVEEDORES", "PERCEP. IVA", "INTERESES SOBRE SALDOS",
+], dtype=object)
+
+
+def movements(total: int, seed: int = 7) -> pd.DataFrame:
+    """`total` movimientos con el formato de salida de los parsers."""
+    rng = np.random.default_rng(seed)
+    dias = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 730, total)), unit="D")
+    importe = np.round(rng.uniform(10, 250_000, total), 2)
+    credito = rng.random(total) < 0.35
+    return pd.DataFrame({
+        "fecha": dias.strftime("%d/%m/%Y"),
+        "mes": dias.strftime("%m"),
+        "año": dias.strftime("%Y"),
+        "detalle": DETALLES[rng.integers(0, len(DETALLES), total)],
+        "referencia": rng.integers(100_000, 999_999, total).astype(str),
+        "debito": np.where(credito, 0.0, importe),
+        "credito": np.where(credito, importe, 0.0),
+        "saldo": np.round(1_000_000 + np.cumsum(np.where(credito, importe, -importe)), 2),
+    })
+
+
+def statements(pool: pd.DataFrame, size: int, rows: int, overlap: int = 0) -> List[Dict[str, Any]]:
+    """
+    Parte los primeros `size` movimientos en extractos de `rows` filas (vistas,
+    sin copia). Con `overlap` cada extracto arranca `overlap` filas antes (todos
+    del mismo banco y con su `archivo`, para que dedupe_movements los detecte).
+    """
+    inputs = []
+    for k, start in enumerate(range(0, size, rows)):
+        if not overlap:
+            df = pool.iloc[start:start + rows]
+            inputs.append({"df": df, "meta": {"bank": BANKS[k % len(BANKS)], "currency": "ARS"}})
+            continue
+        df = pool.iloc[max(0, start - overlap):min(start + rows, size)].assign(archivo=f"extracto_{k:05d}.pdf")
+        inputs.append({"df": df, "meta": {"bank": BANKS[0], "currency": "ARS"}})
+    return inputs
+
+
+def run(args) -> Dict[str, Any]:
+    from extractors.unificador import consolidate, dedupe_movements
+
+    sizes = sorted(args.sizes)
+    t0 = time.perf_counter()
+    pool = movements(sizes[-1], args.seed)
+    report: Dict[str, Any] = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "generate_seconds": round(time.perf_counter() - t0, 4),
+        "sizes": [],
+    }
+
+    for size in sizes:
+        inputs = statements(pool, size, args.rows, args.overlap)
+        expected = sum(len(item["df"]) for item in inputs)
+        best = best_dedupe = None
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            out = consolidate(inputs)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+            if len(out) != expected:
+                raise RuntimeError(f"consolidate devolvió {len(out)} filas, se esperaban {expected}")
+            if args.overlap:
+                t0 = time.perf_counter()
+                # Los cortes caen a mitad de día: la ventana de superposición trae filas de
+                # ese día que no se repiten, así que no se exige proporción mínima
+                kept, duplicates = dedupe_movements(out, drop=True, min_overlap=0.0)
+                elapsed = time.perf_counter() - t0
+                best_dedupe = elapsed if best_dedupe is None else min(best_dedupe, elapsed)
+                if len(kept) != size:
+                    raise RuntimeError(f"dedupe_movements dejó {len(kept)} filas, se esperaban {size}")
+                del kept, duplicates
+            del out
+        entry = {
+            "movements": size,
+            "statements": len(inputs),
+            "seconds": round(best, 4),
+            "us_per_movement": round(best / size * 1e6, 3),
+        }
+        if args.overlap:
+            entry["duplicates"] = expected - size
+            entry["dedupe_seconds"] = round(best_dedupe, 4)
+            entry["dedupe_us_per_movement"] = round(best_dedupe / expected * 1e6, 3)
+        report["sizes"].append(entry)
+        logger.info(f"✅ {size:,} movimientos en {entry['seconds']}s ({entry['us_per_movement']} µs/mov)")
+
+    # Escalado: costo por movimiento del tamaño mayor contra el menor (≈1.0 = lineal)
+    first, last = report["sizes"][0], report["sizes"][-1]
+    report["scaling_ratio"] = round(last["us_per_movement"] / first["us_per_movement"], 3)
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["finished"] = datetime.now().isoformat(timespec="seconds")
+    return report
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark de consolidate()")
+    ap.add_argument("--out", default="consolidate_benchmark.json", help="Archivo JSON de salida")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[250_000, 500_000, 1_000_000, 2_000_000],
+                    help="Cantidades de movimientos a consolidar")
+    ap.add_argument("--rows", type=int, default=2000, help="Movimientos por extracto")
+    ap.add_argument("--overlap", type=int, default=0,
+                    help="Filas que cada extracto repite del anterior (mide también dedupe_movements)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=3, help="Repeticiones por tamaño (se toma la mejor)")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    logger.setLevel(logging.INFO)
+
+    report = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print()
+    for entry in report["sizes"]:
+        line = f"{entry['movements']:>10,} movimientos  {entry['seconds']:>8.3f}s  {entry['us_per_movement']:>7.3f} µs/mov"
+        if "dedupe_seconds" in entry:
+            line += f"  | dedupe {entry['dedupe_seconds']:.3f}s ({entry['duplicates']:,} duplicados)"
+        print(line)
+    print(f"Escalado (µs/mov mayor ÷ menor): {report['scaling_ratio']}  |  Pico RSS: {report['peak_rss_mb']} MB")
+    print(f"📄 Resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
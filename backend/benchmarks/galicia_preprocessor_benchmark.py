@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del preprocesador columnar de Galicia
+-----------------------------------------------
+Genera un volcado OCR sintético con el layout columnar de Galicia (por página:
+bloque de fechas, bloque de descripciones con crédito embebido, bloque de
+débitos y bloque de saldos) y mide preprocess_galicia_ocr sobre él.
+
+Uso (desde backend/):
+    python -m benchmarks.galicia_preprocessor_benchmark
+    python -m benchmarks.galicia_preprocessor_benchmark --pages 400 --rows 60 --repeat 5
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.pipeline_benchmark import peak_rss_mb  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DESCRIPCIONES = [
+    "DEB. AUTOM. DE SERV.", "SERVICIO PAGO A PROVEEDORES", "IMP. DEB. LEY 25413 GRAL.",
+    "TRANSFERENCIA DE CUENTA", "TRF INMED PROVEED", "PERCEP. IVA", "INTERESES SOBRE SALDOS",
+]
+DETALLES = ["EDENOR SA", "PROVEEDOR SRL", "30-71234567-8", "CBU 0070999", "REF 004512"]
+
+
+def _fmt_amount(value: float) -> str:
+    entero, dec = f"{abs(value):,.2f}".split(".")
+    return f"{'-' if value < 0 else ''}{entero.replace(',', '.')},{dec}"
+
+
+def galicia_ocr_dump(pages: int, rows: int, seed: int = 7) -> str:
+    """Texto OCR de `pages` páginas columnares con `rows` movimientos cada una."""
+    rnd = random.Random(seed)
+    dia = date(2024, 1, 1)
+    saldo = 1_000_000.0
+    out: List[str] = []
+    for page in range(1, pages + 1):
+        fechas, descs, debitos, saldos = [], [], [], []
+        for _ in range(rows):
+            dia += timedelta(days=rnd.random() < 0.3)
+            credito = rnd.random() < 0.35
+            importe = round(rnd.uniform(10, 250_000), 2)
+            saldo += importe if credito else -importe
+            fechas.append(dia.strftime("%d/%m/%y"))
+            desc = rnd.choice(DESCRIPCIONES)
+            descs.append(f"{desc} {_fmt_amount(importe)}" if credito else desc)
+            if rnd.random() < 0.5:
+                descs.append(rnd.choice(DETALLES))
+            debitos.append("" if credito else _fmt_amount(-importe))
+            saldos.append(_fmt_amount(saldo))
+        out += [f"Página {page}", "Resumen de cuenta corriente en pesos", "", "Fecha", *fechas, "",
+                "Descripción", *descs, "", "Débito", *[d for d in debitos if d], "", "Saldo", *saldos, ""]
+    return "\n".join(out)
+
+
+def run(args) -> Dict[str, Any]:
+    from parsers.galicia_preprocessor import preprocess_galicia_ocr
+
+    t0 = time.perf_counter()
+    text = galicia_ocr_dump(args.pages, args.rows, args.seed)
+    report: Dict[str, Any] = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "input_lines": text.count("\n") + 1,
+        "generate_seconds": round(time.perf_counter() - t0, 4),
+        "runs": [],
+    }
+    for _ in range(max(1, args.repeat)):
+        t0 = time.perf_counter()
+        lines = preprocess_galicia_ocr(text)
+        report["runs"].append({"seconds": round(time.perf_counter() - t0, 4), "output_lines": len(lines)})
+        logger.info(f"✅ {len(lines)} líneas reconstruidas en {report['runs'][-1]['seconds']}s")
+
+    report["best_seconds"] = min(r["seconds"] for r in report["runs"])
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["finished"] = datetime.now().isoformat(timespec="seconds")
+    return report
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark del preprocesador columnar de Galicia")
+    ap.add_argument("--out", default="galicia_preprocessor_benchmark.json", help="Archivo JSON de salida")
+    ap.add_argument("--pages", type=int, default=200, help="Páginas del volcado OCR")
+    ap.add_argument("--rows", type=int, default=40, help="Movimientos por página")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=3, help="Repeticiones")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    logger.setLevel(logging.INFO)
+
+    report = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\n{report['input_lines']} líneas de entrada → {report['runs'][-1]['output_lines']} reconstruidas")
+    print(f"Mejor corrida: {report['best_seconds']:.4f}s  |  Pico RSS: {report['peak_rss_mb']} MB")
+    print(f"📄 Resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark end-to-end del pipeline de extractos
+----------------------------------------------
+Genera extractos sintéticos (texto e imagen) por banco y mide cada etapa del
+pipeline por separado, más la corrida completa de UniversalExtractor:
+
+  pdfplumber → detección imagen → Camelot → OCR quick/full → parser
+  → consolidate → escritura Excel
+
+Uso (desde backend/):
+    python -m benchmarks.pipeline_benchmark --banks MACRO ICBC --pages 5 --rows 40
+    python -m benchmarks.pipeline_benchmark --skip-ocr --out bench.json
+
+Las etapas cuyas dependencias no están instaladas (camelot, tesseract, poppler)
+se registran como "skipped" con el motivo, sin cortar la corrida.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sample_pdfs import generate_statement  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BANKS = ["MACRO", "ICBC", "SANTANDER", "GALICIA", "BBVA", "SUPERVIELLE"]
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso (MB). 0.0 si no se puede medir."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS bytes
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return 0.0
+
+
+@contextmanager
+def stage(results: Dict[str, Any], name: str):
+    """Mide una etapa y guarda segundos o el motivo del skip/error."""
+    t0 = time.perf_counter()
+    try:
+        yield
+        results[name] = {"seconds": round(time.perf_counter() - t0, 4)}
+    except ImportError as e:
+        results[name] = {"skipped": f"dependencia no disponible: {e}"}
+    except Exception as e:
+        results[name] = {"error": f"{type(e).__name__}: {e}", "seconds": round(time.perf_counter() - t0, 4)}
+
+
+def bench_stages(pdf_path: Path, bank: str, args) -> Dict[str, Any]:
+    """Corre cada etapa aislada sobre un PDF y devuelve tiempos por etapa."""
+    res: Dict[str, Any] = {}
+    lines: List[str] = []
+    df = None
+
+    with stage(res, "pdfplumber"):
+        from pdf_reader import PDFReader
+        _, text_raw = PDFReader().extract_all(str(pdf_path))
+        lines = text_raw if isinstance(text_raw, list) else (text_raw or "").splitlines()
+        res["lines"] = len(lines)
+
+    with stage(res, "image_check"):
+        from extractors.universal_extractor import _is_image_based_pdf
+        res["is_image"] = _is_image_based_pdf(str(pdf_path))
+
+    with stage(res, "camelot"):
+        from extractors.camelot_utils import extract_tables_with_camelot
+        tables = extract_tables_with_camelot(str(pdf_path), max_pages=args.camelot_max_pages) or []
+        res["camelot_tables"] = len(tables)
+
+    if not args.skip_ocr:
+        relevantes: List[int] = []
+        with stage(res, "ocr_quick"):
+            from extractors.ocr_extractor import OCRExtractor
+            relevantes = OCRExtractor().quick_pass(str(pdf_path), dpi_quick=args.dpi_quick)
+            res["ocr_relevant_pages"] = len(relevantes)
+        if relevantes:
+            with stage(res, "ocr_full"):
+                from extractors.ocr_extractor import OCRExtractor
+                pages = OCRExtractor().full_pass(str(pdf_path), relevantes[:args.max_ocr_pages], dpi_full=args.dpi_full)
+                ocr_lines = [ln for _, txt in pages for ln in txt.splitlines()]
+                if ocr_lines and res.get("is_image"):
+                    lines = ocr_lines
+
+    with stage(res, "parser"):
+        from extractors.universal_extractor import _preclean_lines
+        from parser_factory import get_parser
+        df = get_parser(bank).parse(_preclean_lines(lines))
+        res["rows"] = 0 if df is None else len(df)
+
+    return res
+
+
+def bench_full(pdf_path: Path, args) -> Dict[str, Any]:
+    """Corrida completa de UniversalExtractor (lo que hace procesar_extractos)."""
+    res: Dict[str, Any] = {}
+    with stage(res, "extract_from_pdf"):
+        from extractors.universal_extractor import UniversalExtractor
+        extractor = UniversalExtractor(
+            ocr_if_image=not args.skip_ocr,
+            max_ocr_pages=args.max_ocr_pages,
+            ocr_dpi_quick=args.dpi_quick,
+            ocr_dpi_full=args.dpi_full,
+            camelot_max_pages=args.camelot_max_pages,
+        )
+        result = extractor.extract_from_pdf(str(pdf_path), filename_hint=pdf_path.name)
+        tables = result.get("tables") or []
+        res["rows"] = len(tables[0]) if tables else 0
+        res["ocr"] = result.get("method", {}).get("ocr", False)
+        res["_tables"] = tables
+    return res
+
+
+def bench_outputs(resultados: List[Dict[str, Any]], out_dir: Path) -> Dict[str, Any]:
+    """Consolidación y escritura de Excel (el writer de la app) sobre las tablas obtenidas."""
+    res: Dict[str, Any] = {}
+    if not resultados:
+        return {"skipped": "sin tablas para consolidar"}
+
+    with stage(res, "excel_write"):
+        from utils.excel_utils import write_excel
+        for i, item in enumerate(resultados):
+            write_excel(item["df"], str(out_dir / f"bench_{i}.xlsx"))
+
+    with stage(res, "consolidate"):
+        from extractors.unificador import consolidate
+        consolidate(resultados, output_path=str(out_dir / "bench_consolidado.xlsx"))
+    return res
+
+
+def run(args) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "files": [],
+    }
+    kinds = ["texto"] if args.skip_ocr else ["texto", "imagen"]
+
+    with tempfile.TemporaryDirectory(prefix="tga_bench_") as tmp:
+        tmp_dir = Path(tmp)
+        resultados = []
+        for bank in args.banks:
+            for kind in kinds:
+                t0 = time.perf_counter()
+                pdf_path = generate_statement(tmp_dir, bank, kind=kind, pages=args.pages, rows_per_page=args.rows)
+                entry = {
+                    "bank": bank,
+                    "kind": kind,
+                    "file": pdf_path.name,
+                    "size_kb": round(pdf_path.stat().st_size / 1024, 1),
+                    "generate_seconds": round(time.perf_counter() - t0, 4),
+                    "runs": [],
+                }
+                for _ in range(max(1, args.repeat)):
+                    stages = bench_stages(pdf_path, bank, args)
+                    full = bench_full(pdf_path, args)
+                    tables = full.pop("_tables", [])
+                    entry["runs"].append({"stages": stages, "full": full, "peak_rss_mb": peak_rss_mb()})
+                if tables and not tables[0].empty:
+                    # Mismo formato que procesar_extractos le pasa a consolidate()
+                    resultados.append({"df": tables[0], "meta": {"bank": bank, "filename": pdf_path.name}})
+                report["files"].append(entry)
+                logger.info(f"✅ {pdf_path.name} → {entry['runs'][-1]['full']}")
+
+        report["outputs"] = bench_outputs(resultados, tmp_dir)
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["finished"] = datetime.now().isoformat(timespec="seconds")
+    return report
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(f"\n{'archivo':<42} {'etapa':<18} {'seg':>9}")
+    print("-" * 71)
+    for entry in report["files"]:
+        last = entry["runs"][-1]
+        timings = {**last["stages"], **last["full"]}
+        for name, val in timings.items():
+            if not isinstance(val, dict):
+                continue
+            shown = f"{val['seconds']:.4f}" if "seconds" in val else "skip"
+            if "error" in val:
+                shown += " !"
+            print(f"{entry['file']:<42} {name:<18} {shown:>9}")
+    for name, val in (report.get("outputs") or {}).items():
+        if not isinstance(val, dict):
+            continue
+        shown = f"{val['seconds']:.4f}" if "seconds" in val else "skip"
+        if "error" in val:
+            shown += " !"
+        print(f"{'(todos)':<42} {name:<18} {shown:>9}")
+    print(f"\nPico RSS: {report['peak_rss_mb']} MB")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark end-to-end del pipeline de extractos")
+    ap.add_argument("--out", default="benchmark_results.json", help="Archivo JSON de salida")
+    ap.add_argument("--banks", nargs="+", default=DEFAULT_BANKS, help="Bancos a generar")
+    ap.add_argument("--pages", type=int, default=5, help="Páginas por extracto")
+    ap.add_argument("--rows", type=int, default=40, help="Movimientos por página")
+    ap.add_argument("--camelot-max-pages", type=int, default=5)
+    ap.add_argument("--dpi-quick", type=int, default=160)
+    ap.add_argument("--dpi-full", type=int, default=200)
+    ap.add_argument("--max-ocr-pages", type=int, default=100)
+    ap.add_argument("--repeat", type=int, default=1, help="Repeticiones por archivo")
+    ap.add_argument("--skip-ocr", action="store_true", help="No generar PDFs imagen ni correr OCR")
+    args = ap.parse_args(argv)
+    args.banks = [b.upper() for b in args.banks]
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    logger.setLevel(logging.INFO)
+
+    report = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print_summary(report)
+    print(f"📄 Resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de PDFs sintéticos para benchmarks
+--------------------------------------------
+Arma extractos ficticios (sin red, sin archivos reales de clientes) que imitan
+el layout de cada banco soportado, en dos variantes:
+  - texto: PDF con capa de texto (pdfplumber lo lee directo)
+  - imagen: PDF escaneado, solo imágenes (fuerza OCR)
+"""
+
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+MESES_CORTOS = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
+
+CONCEPTOS = [
+    "TRANSFERENCIA RECIBIDA", "N/D DBCR 25413 S/DEB", "COMISION MANTENIMIENTO",
+    "IVA TASA GENERAL", "PAGO A PROVEEDORES", "DEPOSITO EN EFECTIVO",
+    "PERCEPCION IVA RG 2408", "ACREDITACION PRISMA", "DEBITO AUTOMATICO SERVICIO",
+    "IMPUESTO DE SELLOS",
+]
+
+
+def ar(value: float) -> str:
+    """Formatea 1234.5 → '1.234,50'."""
+    return f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+# (encabezado, fila, pie) por banco. La fila recibe (fecha, concepto, ref, monto, saldo)
+Row = Callable[[date, str, str, float, float], str]
+
+
+def _layouts(year: int, month: int) -> Dict[str, Tuple[List[str], Row, List[str]]]:
+    ini = date(year, month, 1)
+    fin = (ini + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    d_ini, d_fin = ini.strftime("%d/%m/%Y"), fin.strftime("%d/%m/%Y")
+
+    def dmy(d): return d.strftime("%d/%m/%Y")
+    def dmy2(d): return d.strftime("%d/%m/%y")
+
+    return {
+        "MACRO": (
+            ["BANCO MACRO S.A.", f"Saldo ultimo extracto {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy2(d)} {c} {r} {ar(a)} {ar(s)}",
+            ["SALDO FINAL {saldo}"],
+        ),
+        "ITAU": (
+            ["BANCO ITAU ARGENTINA", f"SALDO ANTERIOR {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy2(d)} {c} {r} {ar(a)} {ar(s)}",
+            ["SALDO FINAL {saldo}"],
+        ),
+        "ICBC": (
+            ["ICBC", f"PERIODO {ini.strftime('%d-%m-%Y')} AL {fin.strftime('%d-%m-%Y')}",
+             f"SALDO ULTIMO EXTRACTO AL {d_ini} {ar(150000)}"],
+            lambda d, c, r, a, s: f"{d.strftime('%d-%m')} {r} {c} -{ar(a)} {ar(s)}",
+            [f"SALDO FINAL AL {d_fin} {{saldo}}"],
+        ),
+        "COMAFI": (
+            ["BANCO COMAFI", "DETALLE DE MOVIMIENTOS", "Fecha Conceptos Referencia Importe Saldo",
+             f"Saldo Anterior {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy2(d)} {c} {r}0000 {ar(a)} {ar(s)}",
+            [f"Saldo al: {d_fin} {{saldo}}"],
+        ),
+        "SUPERVIELLE": (
+            ["BANCO SUPERVIELLE", f"Saldo del período anterior {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy2(d)} {c} {r} {ar(a)} {ar(s)}",
+            ["Saldo Periodo Actual {saldo}"],
+        ),
+        "BBVA": (
+            ["BBVA ARGENTINA", "Movimientos en cuentas"],
+            lambda d, c, r, a, s: f"{d.strftime('%d/%m')} D {c} {r} -{ar(a)} {ar(s)}",
+            ["Saldo al {fin} {{saldo}}".format(fin=d_fin)],
+        ),
+        "SANTANDER": (
+            ["BANCO SANTANDER", f"Saldo Inicial $ {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy2(d)} {r} {c} $ {ar(a)} $ {ar(s)}",
+            [],
+        ),
+        "CIUDAD": (
+            ["BANCO CIUDAD DE BUENOS AIRES", f"SALDO ANTERIOR {ar(150000)}"],
+            lambda d, c, r, a, s: f"{d.day:02d}-{MESES_CORTOS[d.month - 1]}-{d.year} {c} {ar(a)} {ar(s)}",
+            [],
+        ),
+        "HSBC": (
+            ["HSBC BANK ARGENTINA", f"SALDO ANTERIOR {ar(150000)}"],
+            lambda d, c, r, a, s: f"{d.day:02d}-{MESES_CORTOS[d.month - 1]} - {c} {r[:5]} {ar(a)} {ar(s)}",
+            ["SALDO FINAL {saldo}"],
+        ),
+        "PATAGONIA": (
+            ["BANCO PATAGONIA", f"SALDO ANTERIOR {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy(d)} {c} {ar(a)} {ar(s)}",
+            ["SALDO ACTUAL {saldo}"],
+        ),
+        "NACION": (
+            ["BANCO DE LA NACION ARGENTINA", f"SALDO ANTERIOR {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy2(d)} {c} {r} {ar(a)} {ar(s)}",
+            ["SALDO FINAL {saldo}"],
+        ),
+        "MERCADOPAGO": (
+            ["MERCADO PAGO", "DETALLE DE MOVIMIENTOS"],
+            lambda d, c, r, a, s: f"{d.strftime('%d-%m-%Y')} {c} {r}00000 $ -{ar(a)} $ {ar(s)}",
+            [],
+        ),
+        "CREDICOOP": (
+            ["BANCO CREDICOOP", f"SALDO ANTERIOR {ar(150000)}"],
+            lambda d, c, r, a, s: f"{dmy2(d)} {r} {c} {ar(a)} {ar(s)}",
+            [f"SALDO AL {d_fin} {{saldo}}"],
+        ),
+        "HIPOTECARIO": (
+            ["BANCO HIPOTECARIO"],
+            lambda d, c, r, a, s: f"{dmy(d)} N/D - {c} 16 {r[:4]} {ar(a)}",
+            [],
+        ),
+    }
+
+
+def _generic_layout() -> Tuple[List[str], Row, List[str]]:
+    return (
+        [f"SALDO ANTERIOR {ar(150000)}"],
+        lambda d, c, r, a, s: f"{d.strftime('%d/%m/%Y')} {c} {r} {ar(a)} 0,00 {ar(s)}",
+        ["SALDO FINAL {saldo}"],
+    )
+
+
+def statement_pages(bank: str, pages: int, rows_per_page: int,
+                    year: int = 2025, month: int = 3, seed: int = 0) -> List[List[str]]:
+    """Devuelve las líneas de texto de cada página del extracto sintético."""
+    rnd = random.Random(f"{bank}-{seed}")
+    header, row, footer = _layouts(year, month).get(bank.upper(), _generic_layout())
+    saldo = 150000.0
+    total_rows = max(1, pages * rows_per_page)
+    start = date(year, month, 1)
+    out: List[List[str]] = []
+    n = 0
+    for p in range(pages):
+        lines = [f"Hoja {p + 1}/{pages}"] if p else list(header)
+        for _ in range(rows_per_page):
+            d = start + timedelta(days=min(27, n * 28 // total_rows))
+            monto = round(rnd.uniform(100, 250000), 2)
+            saldo = round(saldo + (monto if rnd.random() < 0.4 else -monto), 2)
+            lines.append(row(d, rnd.choice(CONCEPTOS), str(rnd.randint(10000000, 99999999)), monto, saldo))
+            n += 1
+        out.append(lines)
+    out[-1].extend(f.replace("{saldo}", ar(saldo)) for f in footer)
+    return out
+
+
+# ---------------------------------------------------------------------
+# Escritura de PDF
+# ---------------------------------------------------------------------
+def _pdf_escape(text: str) -> bytes:
+    raw = text.encode("latin-1", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def write_text_pdf(path: Path, pages: List[List[str]]) -> None:
+    """PDF mínimo con capa de texto (Helvetica) escrito a mano, sin dependencias."""
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = add(b"")  # se completa al final
+    page_ids = []
+    for lines in pages:
+        stream = b"BT /F1 8 Tf 11 TL 30 810 Td\n" + b"".join(
+            b"(" + _pdf_escape(ln) + b") Tj T*\n" for ln in lines
+        ) + b"ET"
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    Path(path).write_bytes(bytes(out))
+
+
+def write_image_pdf(path: Path, pages: List[List[str]], dpi: int = 150) -> None:
+    """PDF 'escaneado': cada página es una imagen, sin capa de texto."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.load_default(size=int(dpi / 72 * 8))
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    step = int(dpi / 72 * 11)
+    images = []
+    for lines in pages:
+        img = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(img)
+        y = int(dpi / 72 * 30)
+        for ln in lines:
+            draw.text((int(dpi / 72 * 30), y), ln, fill=0, font=font)
+            y += step
+        images.append(img)
+    images[0].save(path, "PDF", save_all=True, append_images=images[1:], resolution=dpi)
+
+
+def generate_statement(out_dir: Path, bank: str, kind: str = "texto", pages: int = 3,
+                       rows_per_page: int = 40, empresa: str = "BENCH", seed: int = 0) -> Path:
+    """
+    Genera un extracto sintético con nombre EMPRESA-BANCO-PERIODO.pdf
+    (lo que espera parse_filename_metadata). kind: 'texto' | 'imagen'.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    content = statement_pages(bank, pages, rows_per_page, seed=seed)
+    path = out_dir / f"{empresa}-{bank.upper()}-{kind.upper()}-MAR2025.pdf"
+    if kind == "imagen":
+        write_image_pdf(path, content)
+    else:
+        write_text_pdf(path, content)
+    return path
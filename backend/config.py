@@ -13,10 +13,48 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "uploads")
     OUTPUT_FOLDER = os.path.join(os.path.dirname(__file__), "output")
     LOG_FOLDER = os.path.join(os.path.dirname(__file__), "logs")
+    STORE_FOLDER = os.getenv("STORE_FOLDER", os.path.join(os.path.dirname(__file__), "store"))
     
     # Límites
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max
 
+    # Admin (habilita funciones de diagnóstico como profiling por job; vacío = deshabilitado)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+    # Captura de debug de parsers por job (ring buffer → log del job); apagada por defecto
+    DEBUG_CAPTURE = os.getenv("DEBUG_CAPTURE", "0").lower() in ("1", "true", "yes")
+    DEBUG_CAPTURE_MAX_RECORDS = int(os.getenv("DEBUG_CAPTURE_MAX_RECORDS", "5000"))
+
+    # Parseo por páginas en paralelo (parsers con PAGE_LOCAL = True)
+    PAGE_SHARD_WORKERS = int(os.getenv("PAGE_SHARD_WORKERS", "0"))  # 0 = os.cpu_count()
+    PAGE_SHARD_MIN_PAGES = int(os.getenv("PAGE_SHARD_MIN_PAGES", "40"))  # debajo de esto no conviene el pool
+
+    # Store acumulado por empresa (banco/año/mes); también se activa por job con el flag `store=1`
+    COMPANY_STORE = os.getenv("COMPANY_STORE", "0").lower() in ("1", "true", "yes")
+
+    # Movimientos repetidos entre extractos con períodos superpuestos: se informan
+    # aparte (00_DUPLICADOS.xlsx) y quedan marcados en el consolidado ("duplicado_de");
+    # con DEDUPE_DROP además se sacan del consolidado
+    DEDUPE_MOVEMENTS = os.getenv("DEDUPE_MOVEMENTS", "1").lower() in ("1", "true", "yes")
+    DEDUPE_DROP = os.getenv("DEDUPE_DROP", "0").lower() in ("1", "true", "yes")
+
+    # Render de workbooks del ZIP en paralelo (pool de procesos "excel")
+    EXCEL_WORKERS = int(os.getenv("EXCEL_WORKERS", "0"))  # 0 = os.cpu_count(); 1 = secuencial
+
+    # ZIP de resultados generado al vuelo en la descarga en vez de guardarse en OUTPUT_FOLDER
+    # (los DataFrames del job quedan en memoria hasta que se descarta el job)
+    STREAM_RESULTS = os.getenv("STREAM_RESULTS", "0").lower() in ("1", "true", "yes")
+
+    # Carpeta vigilada (python -m services.watch_service): PDFs que dejan los clientes
+    WATCH_FOLDER = os.getenv("WATCH_FOLDER", "")
+    WATCH_OUTPUT_FOLDER = os.getenv("WATCH_OUTPUT_FOLDER", os.path.join(os.path.dirname(__file__), "output", "watch"))
+    WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "5"))  # segundos entre escaneos
+    WATCH_SETTLE_SECONDS = float(os.getenv("WATCH_SETTLE_SECONDS", "10"))  # sin cambios este tiempo = copia terminada
+    WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "0"))  # 0 = os.cpu_count(); 1 = secuencial
+
+    # Triage (/api/triage, python -m extractors.triage): solo página 1 de cada PDF
+    TRIAGE_WORKERS = int(os.getenv("TRIAGE_WORKERS", "0"))  # 0 = os.cpu_count(); 1 = secuencial
+
     # CORS
     CORS_ORIGINS = ["http://localhost:5000", "http://127.0.0.1:5000"]
 
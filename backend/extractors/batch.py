@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Procesamiento por lotes de PDFs (CLI pdf2xls)
+---------------------------------------------
+Recorre una carpeta de extractos, corre UniversalExtractor sobre cada PDF y
+deja un .xlsx por archivo en un árbol de salida espejo del de entrada.
+
+  - Paralelo por archivo: `jobs` procesos del pool "batch". Cada worker
+    escribe su .xlsx y devuelve solo el registro (sin DataFrame): la memoria
+    del proceso principal no crece con la cantidad de archivos. Con varios
+    workers el parseo por páginas (page_parallel) queda en 1 proceso para no
+    multiplicar pools.
+  - Reanudable: manifest.jsonl guarda por archivo hash sha256, estado, filas,
+    páginas, OCR y tiempos. Una corrida nueva saltea los que ya terminaron
+    con el mismo hash y su salida presente; los errores se reintentan.
+    Es append-only (una línea por archivo terminado): un corte a mitad de
+    corrida pierde a lo sumo la línea que se estaba escribiendo.
+
+    summary = run_batch(Path("input"), Path("output"), jobs=4)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from config import Config
+from utils.excel_utils import write_excel
+from utils.worker_pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+DONE_STATUSES = ("ok", "empty", "duplicate")  # "error" (incluye PDFs sin texto) se reintenta en la próxima corrida
+HASH_CHUNK = 1024 * 1024
+PROGRESS_EVERY = 25  # archivos entre resúmenes de avance
+
+AMOUNT_COLUMNS = ["debitos", "creditos", "saldo", "debito", "credito"]
+
+
+# ---------------------------------------------------------------------
+# Excel de salida
+# ---------------------------------------------------------------------
+def _fecha_dates(fecha: pd.Series) -> pd.Series:
+    """
+    fecha → datetime (celda fecha nativa "dd/mm/yyyy"). Si algún valor no es una
+    fecha, la columna queda como texto para no perder lo que vino del PDF.
+    """
+    text = fecha.astype("string").str.strip()
+    dates = pd.to_datetime(text, format="%d/%m/%Y", errors="coerce")
+    rest = dates.isna() & text.fillna("").ne("")
+    if rest.any():  # ISO (2025-07-01) antes que dayfirst, que lo daría vuelta
+        dates = dates.fillna(pd.to_datetime(text.where(rest), format="ISO8601", errors="coerce"))
+        rest = dates.isna() & text.fillna("").ne("")
+    if rest.any():
+        dates = dates.fillna(pd.to_datetime(text.where(rest), errors="coerce", dayfirst=True))
+    if (dates.isna() & text.fillna("").ne("")).any():
+        return fecha
+    return dates
+
+
+def format_excel_output(dataframe: pd.DataFrame, output_file: Path) -> None:
+    # 🔹 Montos numéricos: write_excel les da formato "#,##0.00", que Excel en
+    # es-AR muestra como 1.234,56 (nada de convertir cada celda a texto)
+    typed = {
+        column: pd.to_numeric(dataframe[column], errors="coerce").fillna(0.0)
+        for column in AMOUNT_COLUMNS if column in dataframe.columns
+    }
+
+    # 🔹 fecha como fecha real con formato dd/mm/yyyy: Excel no la reinterpreta
+    # como mm/dd (el problema de escribirla como texto ambiguo)
+    if "fecha" in dataframe.columns:
+        typed["fecha"] = _fecha_dates(dataframe["fecha"])
+
+    # 🔹 Filas con observaciones resaltadas con formato condicional, en la misma escritura
+    write_excel(dataframe.assign(**typed), output_file, sheet_name="Transactions", highlight="observaciones")
+
+
+# ---------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BatchManifest:
+    """manifest.jsonl: un registro por archivo terminado; manda la última línea de cada ruta."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.records: Dict[str, Dict] = {}
+        self._by_sha: Dict[str, str] = {}  # sha256 → ruta con extracción ok
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # línea cortada por un corte de la corrida anterior
+                    self._index(record)
+
+    def _index(self, record: Dict) -> None:
+        self.records[record["path"]] = record
+        if record.get("status") == "ok":
+            self._by_sha[record["sha256"]] = record["path"]
+
+    def get(self, rel: str) -> Optional[Dict]:
+        return self.records.get(rel)
+
+    def find_sha(self, sha256: str) -> Optional[Dict]:
+        """Registro ok de otro archivo con el mismo contenido (el mismo PDF subido con otro nombre)."""
+        path = self._by_sha.get(sha256)
+        record = self.records.get(path) if path else None
+        return record if record and record.get("sha256") == sha256 and record.get("status") == "ok" else None
+
+    def digest(self, rel: str, path: Path) -> Tuple[str, os.stat_result]:
+        """sha256 del archivo; si tamaño y mtime coinciden con el registro no se relee."""
+        st = path.stat()
+        record = self.records.get(rel)
+        if record and record.get("size") == st.st_size and record.get("mtime_ns") == st.st_mtime_ns:
+            return record["sha256"], st
+        return file_sha256(path), st
+
+    def is_done(self, rel: str, sha256: str, output_root: Path) -> bool:
+        record = self.records.get(rel)
+        if not record or record.get("sha256") != sha256 or record.get("status") not in DONE_STATUSES:
+            return False
+        return not record.get("output") or (output_root / record["output"]).exists()
+
+    def append(self, record: Dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._index(record)
+
+    def compact(self) -> None:
+        """Reescribe el manifest con un registro por archivo (atómico)."""
+        if not self.path.exists():
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+
+
+# ---------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------
+_extractor = None
+
+
+def extract_pdf(pdf_path: str, output_file: str) -> Tuple[Dict, Optional[pd.DataFrame]]:
+    """
+    Extrae un PDF y escribe su .xlsx. Devuelve el registro para el manifest y
+    el DataFrame (None si no hubo movimientos o falló).
+    """
+    global _extractor
+    if _extractor is None:
+        from extractors.universal_extractor import UniversalExtractor
+        _extractor = UniversalExtractor()
+
+    record = {"status": "error", "rows": 0, "flagged": 0, "bank": "", "pages": 0, "ocr": False, "error": ""}
+    df = None
+    t0 = time.perf_counter()
+    try:
+        result = _extractor.extract_from_pdf(pdf_path, filename_hint=Path(pdf_path).name)
+        context = result.get("context")
+        record["bank"] = result.get("bank_hint", "")
+        record["pages"] = result.get("pages_count", 0)
+        record["ocr"] = result.get("method", {}).get("ocr", False)
+        record["empresa"] = result.get("metadata", {}).get("empresa", "")
+        if context is not None:
+            record.update(year=context.year, month=context.month,
+                          currency=context.currency, account=context.account)
+
+        tables = result.get("tables") or []
+        df = tables[0] if tables and isinstance(tables[0], pd.DataFrame) else None
+        if not result.get("text_lines"):
+            # El extractor no lanza: PDF que no abre u OCR caído vuelven sin texto. Es
+            # "error" (se reintenta), no "empty", que queda hecho para siempre
+            record["error"] = ("PDF ilegible (sin páginas)" if not record["pages"]
+                               else "sin texto: OCR fallido o no disponible")
+            logger.warning(f"⚠️ {pdf_path}: {record['error']}")
+            df = None
+        elif df is None or df.empty:
+            record["status"] = "empty"
+            df = None
+        else:
+            Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+            format_excel_output(df, Path(output_file))
+            observations = df.get("observaciones", pd.Series(dtype=str))
+            record["flagged"] = int(observations.fillna("").astype(str).str.strip().ne("").sum())
+            record["rows"] = len(df)
+            record["status"] = "ok"
+    except Exception as e:
+        logger.error(f"❌ {pdf_path}: {e}", exc_info=True)
+        record["error"] = str(e)
+        df = None
+    finally:
+        _extractor.reader.forget(pdf_path)  # el worker vive toda la corrida
+    record["seconds"] = round(time.perf_counter() - t0, 3)
+    return record, df
+
+
+def process_pdf(pdf_path: str, output_file: str) -> Dict:
+    """Como extract_pdf, pero devuelve solo el registro (el .xlsx ya quedó escrito)."""
+    return extract_pdf(pdf_path, output_file)[0]
+
+
+def process_in_pool(pdf_path: str, output_file: str, with_frame: bool = False):
+    # Paralelismo por archivo: el parseo por páginas no abre otro pool por worker
+    Config.PAGE_SHARD_WORKERS = 1
+    record, df = extract_pdf(pdf_path, output_file)
+    return (record, df) if with_frame else record
+
+
+# ---------------------------------------------------------------------
+# Corrida
+# ---------------------------------------------------------------------
+def find_pdfs(input_dir: Path) -> Iterator[Path]:
+    """PDFs bajo `input_dir` (.pdf/.PDF) en orden estable."""
+    for path in sorted(input_dir.rglob("*")):
+        if path.is_file() and path.suffix.lower() == ".pdf":
+            yield path
+
+
+def output_for(rel: Path, output_dir: Path) -> Path:
+    return output_dir / rel.parent / f"{rel.stem}.xlsx"
+
+
+def run_batch(input_dir: Path, output_dir: Path, jobs: int = 1,
+              manifest_path: Optional[Path] = None, force: bool = False) -> Dict:
+    """Procesa los PDFs pendientes de `input_dir`; devuelve el resumen de la corrida."""
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    manifest = BatchManifest(manifest_path or output_dir / MANIFEST_NAME)
+    manifest.compact()
+
+    pdfs = list(find_pdfs(input_dir))
+    summary = {"total": len(pdfs), "ok": 0, "empty": 0, "error": 0, "skipped": 0, "rows": 0, "pages": 0}
+    logger.info(f"📦 {len(pdfs)} PDFs en {input_dir} ({jobs} proceso(s), manifest {manifest.path})")
+
+    t_start = time.perf_counter()
+    pool = get_pool("batch", jobs) if jobs > 1 else None
+    pending: Dict[object, Dict] = {}
+    finished = 0
+
+    def record_done(base: Dict, record: Dict) -> None:
+        nonlocal finished
+        record = {**base, **record, "finished": datetime.now().isoformat(timespec="seconds")}
+        if record["status"] != "ok":
+            record["output"] = ""
+        manifest.append(record)
+        summary[record["status"]] += 1
+        summary["rows"] += record.get("rows", 0)
+        summary["pages"] += record.get("pages", 0)
+        finished += 1
+
+        icon = {"ok": "✅", "empty": "⚠️", "error": "❌"}[record["status"]]
+        done = finished + summary["skipped"]
+        detail = f"{record['rows']} filas" if record["status"] == "ok" else record["status"]
+        if record["status"] == "error":
+            detail += f": {record['error']}"
+        logger.info(f"  {icon} [{done}/{summary['total']}] {record['path']} — {detail} ({record['seconds']}s)")
+        if finished % PROGRESS_EVERY == 0:
+            log_progress()
+
+    def log_progress() -> None:
+        elapsed = time.perf_counter() - t_start
+        remaining = summary["total"] - summary["skipped"] - finished
+        rate = finished / elapsed if elapsed else 0.0
+        eta = f"{remaining / rate / 60:.1f} min" if rate else "?"
+        logger.info(
+            f"📊 {finished + summary['skipped']}/{summary['total']} | ok {summary['ok']} · vacíos {summary['empty']} · "
+            f"errores {summary['error']} · salteados {summary['skipped']} | {rate * 60:.1f} PDFs/min · ETA {eta}"
+        )
+
+    def drain(block_until: int) -> None:
+        """Registra los terminados; espera mientras haya más de `block_until` en vuelo."""
+        while pending:
+            done, _ = wait(list(pending), timeout=None if len(pending) > block_until else 0,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                return
+            for fut in done:
+                base = pending.pop(fut)
+                try:
+                    record = fut.result()
+                except Exception as e:  # worker caído: el archivo queda para reintentar
+                    record = {"status": "error", "rows": 0, "pages": 0, "seconds": 0.0, "error": str(e)}
+                record_done(base, record)
+
+    for pdf in pdfs:
+        rel = pdf.relative_to(input_dir)
+        key = rel.as_posix()
+        sha256, st = manifest.digest(key, pdf)
+        if not force and manifest.is_done(key, sha256, output_dir):
+            summary["skipped"] += 1
+            continue
+
+        output_file = output_for(rel, output_dir)
+        base = {
+            "path": key, "sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "output": output_file.relative_to(output_dir).as_posix(),
+        }
+        if pool is None:
+            record_done(base, process_pdf(str(pdf), str(output_file)))
+            continue
+        pending[pool.submit(process_in_pool, str(pdf), str(output_file))] = base
+        drain(block_until=jobs * 2 - 1)  # pocos en vuelo: memoria constante con miles de archivos
+    drain(block_until=0)
+
+    summary["seconds"] = round(time.perf_counter() - t_start, 3)
+    summary["manifest"] = str(manifest.path)
+    log_progress()
+    return summary
@@ -7,15 +7,19 @@ Se separa de pdf2xls/universal_extractor para evitar imports circulares.
 import camelot
 import logging
 
+from utils.metrics import span
+
 logger = logging.getLogger(__name__)
 
-def extract_tables_with_camelot(pdf_path: str, max_pages: int = None):
+def extract_tables_with_camelot(pdf_path: str, max_pages: int = None, flavor: str = "lattice", **camelot_options):
     """
-    Intenta extraer tablas de un PDF usando Camelot (flavor=lattice).
+    Intenta extraer tablas de un PDF usando Camelot (por defecto flavor=lattice).
     
     Args:
         pdf_path: Ruta al archivo PDF
         max_pages: Número máximo de páginas a procesar (None = todas)
+        flavor: "lattice" o "stream"
+        camelot_options: kwargs extra para camelot.read_pdf (row_tol, edge_tol, ...)
         
     Returns:
         Lista de DataFrames de pandas o lista vacía si falla
@@ -30,10 +34,11 @@ def extract_tables_with_camelot(pdf_path: str, max_pages: int = None):
             logger.warning("⚠️  Camelot sin límite de páginas (puede consumir mucha RAM)")
         
         # Ejecutar Camelot
-        tables = camelot.read_pdf(pdf_path, pages=pages_arg, flavor="lattice")
+        with span("camelot", flavor=flavor):
+            tables = camelot.read_pdf(pdf_path, pages=pages_arg, flavor=flavor, **camelot_options)
         
         if tables and len(tables) > 0:
-            logger.info(f"✅ Camelot detectó {len(tables)} tablas")
+            logger.info(f"✅ Camelot detectó {len(tables)} tablas ({flavor})")
             return [t.df for t in tables]
         else:
             logger.info("ℹ️  Camelot no detectó tablas")
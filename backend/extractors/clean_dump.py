@@ -2,15 +2,17 @@
 import re
 from typing import Dict, List, Any
 
+from parsers.strict_base import KeywordSet
 
-EXCLUDE_KEYWORDS_LC = set([
+
+EXCLUDE_KEYWORDS_LC = KeywordSet(
     # ruido genérico muy común en resúmenes bancarios
     "estimado cliente", "detalle de titulares", "detalle de las cuentas",
     "movimientos pendientes", "saldo del periodo anterior", "saldo al cierre",
     "situacion impositiva", "responsable inscripto", "ingresos brutos",
     "pagina", "hoja", "cbu", "cuit", "moneda", "tipo", "número", "operador:",
     "empresa:", "periodo del", "frecuencia", "emitido el",
-])
+)
 
 # Mantener líneas que tengan potencial de información transaccional
 KEEP_IF_REGEX = re.compile(
@@ -22,7 +24,7 @@ KEEP_IF_REGEX = re.compile(
 
 def _should_exclude(line: str) -> bool:
     low = line.lower()
-    if any(k in low for k in EXCLUDE_KEYWORDS_LC):
+    if EXCLUDE_KEYWORDS_LC.search(low):
         # solo excluimos si la línea no contiene señales de valor (fecha/monto/etc.)
         if not KEEP_IF_REGEX.search(line):
             return True
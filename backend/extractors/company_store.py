@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Store acumulado por empresa
+---------------------------
+Movimientos ya consolidados de cada empresa (la de parse_filename_metadata),
+persistidos en particiones banco/año/mes:
+
+    STORE_FOLDER/<empresa>/banco=MACRO/anio=2025/mes=07/part.parquet
+    STORE_FOLDER/<empresa>/manifest.json      # archivo → particiones, filas
+
+append() normaliza los extractos nuevos con consolidate() y reescribe SOLO las
+particiones que tocan; si un archivo se vuelve a subir reemplaza sus filas
+anteriores (también en particiones que ya no le corresponden). El consolidado
+anual se arma concatenando particiones en orden banco → año → mes, que ya
+están ordenadas por dentro: no hace falta re-procesar ni re-ordenar nada.
+Así el cierre de mes procesa un PDF nuevo, no los doce.
+
+Formato de partición: Parquet si está pyarrow, si no pickle de pandas; en los
+dos casos con los tipos de utils.frame_export.typed_frame.
+
+    store = CompanyStore()
+    store.append("Acme", [{"df": df, "meta": {"filename": "ACME-MACRO-JUL2025.pdf", ...}}])
+    df_anual = store.load("Acme")
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import Config
+from extractors.unificador import ORDER_KEYS, consolidate
+from utils.frame_export import HAS_PYARROW, typed_frame
+
+logger = logging.getLogger(__name__)
+
+PartitionKey = Tuple[str, int, int]  # (banco, año, mes)
+
+PART_FILE = "part.parquet" if HAS_PYARROW else "part.pkl"
+MANIFEST = "manifest.json"
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def company_slug(empresa: str) -> str:
+    """Nombre de carpeta seguro para la empresa ("Acme S.A." → "acme-s.a")."""
+    slug = re.sub(r"[^a-z0-9._-]+", "-", (empresa or "").strip().lower()).strip("-.")
+    return slug or "sin-empresa"
+
+
+def _company_lock(slug: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(slug, threading.Lock())
+
+
+def _key_name(key: PartitionKey) -> str:
+    banco, anio, mes = key
+    return f"banco={banco}/anio={anio:04d}/mes={mes:02d}"
+
+
+def _parse_key(name: str) -> PartitionKey:
+    banco, anio, mes = (part.split("=", 1)[1] for part in name.split("/"))
+    return banco, int(anio), int(mes)
+
+
+class CompanyStore:
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or Config.STORE_FOLDER)
+
+    # ------------------------------------------------------------------
+    # Disco
+    # ------------------------------------------------------------------
+    def company_dir(self, empresa: str) -> Path:
+        return self.root / company_slug(empresa)
+
+    def _part_path(self, cdir: Path, key: PartitionKey) -> Path:
+        return cdir / _key_name(key) / PART_FILE
+
+    def _read_part(self, path: Path) -> Optional[pd.DataFrame]:
+        if path.exists():
+            return pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_pickle(path)
+        legacy = path.with_suffix(".pkl" if path.suffix == ".parquet" else ".parquet")
+        if legacy.exists():  # partición escrita con/sin pyarrow
+            return pd.read_parquet(legacy) if legacy.suffix == ".parquet" else pd.read_pickle(legacy)
+        return None
+
+    def _write_part(self, path: Path, df: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        # Tipos fijos por columna: Parquet no acepta columnas object con tipos mezclados
+        # (p. ej. referencia con números y texto), y así las particiones no dependen del formato
+        df = typed_frame(df)
+        if path.suffix == ".parquet":
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, path)  # atómico: un lector nunca ve una partición a medio escribir
+        other = path.with_suffix(".pkl" if path.suffix == ".parquet" else ".parquet")
+        if other.exists():
+            other.unlink()
+
+    def _drop_part(self, path: Path) -> None:
+        for p in (path, path.with_suffix(".pkl"), path.with_suffix(".parquet")):
+            if p.exists():
+                p.unlink()
+
+    def read_manifest(self, empresa: str) -> Dict:
+        path = self.company_dir(empresa) / MANIFEST
+        if not path.exists():
+            return {"empresa": empresa, "files": {}, "partitions": {}}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, cdir: Path, manifest: Dict) -> None:
+        cdir.mkdir(parents=True, exist_ok=True)
+        tmp = cdir / (MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, cdir / MANIFEST)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def partitions(self, empresa: str) -> List[PartitionKey]:
+        """Particiones de la empresa en orden de consolidado (banco → año → mes)."""
+        return sorted(_parse_key(name) for name in self.read_manifest(empresa)["partitions"])
+
+    def append(self, empresa: str, inputs: List[Dict]) -> List[PartitionKey]:
+        """
+        Suma los extractos (mismo formato que consolidate) al store de la
+        empresa. Devuelve las particiones reescritas.
+        """
+        frames = []
+        for item in inputs:
+            df, meta = item["df"], item.get("meta") or {}
+            if "archivo" not in df.columns or df["archivo"].isna().all():
+                df = df.assign(archivo=os.path.basename(meta.get("filename", "")))
+            frames.append({"df": df, "meta": meta})
+
+        new = consolidate(frames)
+        if new.empty:
+            return []
+        archivos = set(new["archivo"].astype(str))
+
+        cdir = self.company_dir(empresa)
+        with _company_lock(cdir.name):
+            manifest = self.read_manifest(empresa)
+            manifest["empresa"] = empresa
+            now = datetime.now().isoformat(timespec="seconds")
+
+            groups = {
+                (str(b), int(a), int(m)): part
+                for (b, a, m), part in new.groupby(["banco", "año", "mes"], sort=False)
+            }
+            # Particiones que ya tenían filas de estos archivos (re-subida) también se limpian
+            stale = {
+                _parse_key(name)
+                for archivo in archivos
+                for name in manifest["files"].get(archivo, {}).get("partitions", [])
+            }
+
+            touched = []
+            for key in sorted(set(groups) | stale):
+                path = self._part_path(cdir, key)
+                existing = self._read_part(path)
+                parts = []
+                if existing is not None:
+                    parts.append(existing[~existing["archivo"].astype(str).isin(archivos)])
+                if key in groups:
+                    parts.append(groups[key])
+                parts = [p for p in parts if not p.empty]
+                name = _key_name(key)
+                if not parts:
+                    self._drop_part(path)
+                    manifest["partitions"].pop(name, None)
+                else:
+                    merged = pd.concat(parts, ignore_index=True)
+                    keys = [k for k in ORDER_KEYS if k in merged.columns]
+                    merged = merged.sort_values(keys, kind="stable", na_position="last").reset_index(drop=True)
+                    self._write_part(path, merged)
+                    manifest["partitions"][name] = {"rows": len(merged), "updated": now}
+                touched.append(key)
+
+            for archivo in archivos:
+                rows = new["archivo"].astype(str) == archivo
+                manifest["files"][archivo] = {
+                    "partitions": sorted(_key_name(k) for k, p in groups.items() if (p["archivo"].astype(str) == archivo).any()),
+                    "rows": int(rows.sum()),
+                    "added": now,
+                }
+            self._write_manifest(cdir, manifest)
+
+        logger.info(f"🗄️ Store {empresa}: {len(archivos)} archivo(s), {len(touched)} partición(es) actualizadas")
+        return touched
+
+    def load(self, empresa: str) -> pd.DataFrame:
+        """Consolidado acumulado de la empresa (particiones en orden, sin re-ordenar)."""
+        cdir = self.company_dir(empresa)
+        frames = [self._read_part(self._part_path(cdir, key)) for key in self.partitions(empresa)]
+        frames = [f for f in frames if f is not None and not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
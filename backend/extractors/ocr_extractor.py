@@ -8,6 +8,8 @@ import pytesseract
 from PIL import Image, ImageOps
 from dotenv import load_dotenv
 
+from utils.metrics import observe, span
+
 # === Cargar variables de entorno ===
 # (si no existe .env, no rompe)
 load_dotenv()
@@ -110,6 +112,18 @@ class OCRExtractor:
 
     def extract_text_pages(self, pdf_path: str, dpi_quick: int = 160, dpi_full: int = 200) -> List[Tuple[int, str]]:
         """Devuelve [(page_num, texto)] SOLO de páginas relevantes."""
+        relevantes_idx = self.quick_pass(pdf_path, dpi_quick=dpi_quick)
+        if not relevantes_idx:
+            logger.warning("⚠️ Ninguna página calificada como relevante en quick pass.")
+            return []
+        return self.full_pass(pdf_path, relevantes_idx, dpi_full=dpi_full)
+
+    def quick_pass(self, pdf_path: str, dpi_quick: int = 160) -> List[int]:
+        """OCR rápido a baja resolución. Devuelve los números de página relevantes."""
+        with span("ocr_quick"):
+            return self._quick_pass(pdf_path, dpi_quick)
+
+    def _quick_pass(self, pdf_path: str, dpi_quick: int) -> List[int]:
         logger.info(f"OCR quick pass (dpi={dpi_quick}) → {pdf_path}")
 
         try:
@@ -139,10 +153,17 @@ class OCRExtractor:
             except Exception as e:
                 logger.error(f"OCR quick falló en página {i}: {e}")
 
-        if not relevantes_idx:
-            logger.warning("⚠️ Ninguna página calificada como relevante en quick pass.")
-            return []
+        observe("tga_ocr_pages", len(imgs_quick), stage="ocr_quick")
+        return relevantes_idx
+
+    def full_pass(self, pdf_path: str, relevantes_idx: List[int], dpi_full: int = 200) -> List[Tuple[int, str]]:
+        """OCR completo a resolución alta, solo sobre las páginas indicadas."""
+        with span("ocr_full"):
+            resultados = self._full_pass(pdf_path, relevantes_idx, dpi_full)
+        observe("tga_ocr_pages", len(resultados), stage="ocr_full")
+        return resultados
 
+    def _full_pass(self, pdf_path: str, relevantes_idx: List[int], dpi_full: int) -> List[Tuple[int, str]]:
         logger.info(f"OCR full pass (dpi={dpi_full}) solo en páginas {relevantes_idx}")
         resultados: List[Tuple[int, str]] = []
         BATCH_SIZE = 10
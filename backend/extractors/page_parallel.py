@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Parseo en paralelo por páginas
+------------------------------
+Para bancos cuyos movimientos nunca cruzan de página (el parser lo declara con
+PAGE_LOCAL = True) las líneas se parten en shards de páginas completas, cada
+shard se parsea en un proceso del pool y los DataFrames se cosen en orden.
+
+Protocolo de cosido:
+  - Filas de saldo inicial/final: el parser declara cómo reconocerlas y cuál
+    se queda si aparecen en varios shards (lo mismo que haría en una pasada):
+        PAGE_OPENING_ROW = ("Saldo Anterior", "first")   # arriba de todo
+        PAGE_CLOSING_ROW = ("Saldo Final", "last")       # al final
+  - Arrastre (PageCarry): última fecha y último saldo de cada shard. El primer
+    movimiento del shard siguiente tiene que encadenar con ese saldo; si no,
+    probablemente el parser no era page-local para ese extracto y se registra.
+
+    df = parse_input(parser, bank, parser_input)   # decide solo si conviene
+"""
+
+import logging
+import math
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from config import Config
+from parsers.parser_input import ParserInput
+from utils.debug_capture import dbg, debug_enabled
+from utils.metrics import inc
+from utils.worker_pool import get_pool, pool_workers
+
+logger = logging.getLogger(__name__)
+
+SHARDS_PER_WORKER = 2  # shards chicos balancean mejor páginas con más o menos movimientos
+
+
+class PageCarry(NamedTuple):
+    fecha: object = None
+    saldo: Optional[float] = None
+
+
+def shard_workers() -> int:
+    return pool_workers(Config.PAGE_SHARD_WORKERS)
+
+
+def shard_pages(page_starts: Sequence[int], total_lines: int, shards: int) -> List[Tuple[int, int]]:
+    """Rangos [inicio, fin) de líneas con páginas completas, parejos en cantidad de líneas."""
+    starts = sorted(set(s for s in page_starts if 0 <= s < total_lines))
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    target = math.ceil(total_lines / max(1, shards))
+    ranges, begin = [], 0
+    for s in starts[1:]:
+        if s - begin >= target:
+            ranges.append((begin, s))
+            begin = s
+    ranges.append((begin, total_lines))
+    return ranges
+
+
+def _parse_shard(bank: str, lines: List[str], filename: str, context) -> pd.DataFrame:
+    """Corre en el worker: parser nuevo sobre las líneas del shard."""
+    from parser_factory import get_parser
+    parser_input = ParserInput(lines, filename=filename, tables_enabled=False, context=context)
+    return get_parser(bank).parse(parser_input)
+
+
+def _balance_mask(df: pd.DataFrame, spec) -> pd.Series:
+    if not spec or "detalle" not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df["detalle"].astype(str).str.strip().eq(spec[0])
+
+
+def _pick(rows: List[pd.DataFrame], spec) -> List[pd.DataFrame]:
+    rows = [r for r in rows if not r.empty]
+    if not rows:
+        return []
+    return [rows[0].iloc[:1]] if spec[1] == "first" else [rows[-1].iloc[-1:]]
+
+
+def _carry_out(body: pd.DataFrame, carry: PageCarry) -> PageCarry:
+    if body.empty:
+        return carry
+    last = body.iloc[-1]
+    return PageCarry(last.get("fecha"), last.get("saldo"))
+
+
+def _check_carry(body: pd.DataFrame, carry: PageCarry, bank: str, shard: int) -> None:
+    """El primer movimiento del shard tiene que partir del último saldo del anterior."""
+    if body.empty or not {"debito", "credito", "saldo"} <= set(body.columns):
+        return
+    first = body.iloc[0]
+    try:
+        prev, saldo = float(carry.saldo), float(first["saldo"])
+        movimiento = float(first["credito"] or 0) - float(first["debito"] or 0)
+    except (TypeError, ValueError):
+        return
+    if not prev or not saldo or math.isnan(prev) or math.isnan(saldo + movimiento):
+        return
+    # Sin importar el signo: la clasificación débito/crédito de los parsers es heurística
+    if min(abs(prev + movimiento - saldo), abs(prev - movimiento - saldo)) > 0.01:
+        inc("tga_page_carry_mismatch_total", bank=bank)
+        logger.debug(
+            f"[{bank}] Shard {shard}: saldo {saldo:.2f} no encadena con {prev:.2f} "
+            f"(última fecha {carry.fecha}); ¿movimiento partido entre páginas?"
+        )
+
+
+def stitch_shards(frames: List[pd.DataFrame], parser) -> pd.DataFrame:
+    """Une los DataFrames de cada shard en orden, con una sola fila de saldo inicial/final."""
+    opening = getattr(parser, "PAGE_OPENING_ROW", None)
+    closing = getattr(parser, "PAGE_CLOSING_ROW", None)
+    bank = getattr(parser, "BANK_NAME", type(parser).__name__)
+
+    openings, closings, bodies = [], [], []
+    carry = PageCarry()
+    for k, df in enumerate(frames):
+        if not isinstance(df, pd.DataFrame) or df.empty:
+            continue
+        is_open, is_close = _balance_mask(df, opening), _balance_mask(df, closing)
+        openings.append(df[is_open])
+        closings.append(df[is_close])
+        body = df[~(is_open | is_close)]
+        if k and carry.saldo is not None:
+            _check_carry(body, carry, bank, k)
+        carry = _carry_out(body, carry)
+        bodies.append(body)
+
+    parts = [*(_pick(openings, opening) if opening else []), *bodies, *(_pick(closings, closing) if closing else [])]
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return next((f for f in frames if isinstance(f, pd.DataFrame)), pd.DataFrame())
+    return pd.concat(parts, ignore_index=True)
+
+
+def parse_pages(parser, bank: str, parser_input: ParserInput, workers: int) -> pd.DataFrame:
+    """Parte en shards de páginas, los parsea en el pool y cose el resultado."""
+    ranges = shard_pages(parser_input.page_starts, len(parser_input), workers * SHARDS_PER_WORKER)
+    pool = get_pool("page_shards", workers)  # compartido entre jobs
+    futures = [
+        pool.submit(_parse_shard, bank, list(parser_input[a:b]), parser_input.filename, parser_input.context)
+        for a, b in ranges
+    ]
+    frames = [f.result() for f in futures]
+    inc("tga_page_shards_total", len(ranges), bank=bank)
+    logger.info(f"🧩 {bank}: {len(parser_input.page_starts)} páginas en {len(ranges)} shards ({workers} procesos)")
+    return stitch_shards(frames, parser)
+
+
+def parse_input(parser, bank: str, parser_input: ParserInput) -> pd.DataFrame:
+    """parser.parse(), o por shards de páginas si el parser es page-local y el PDF es grande."""
+    workers = shard_workers()
+    if (
+        getattr(parser, "PAGE_LOCAL", False)
+        and len(parser_input.page_starts) >= max(2, Config.PAGE_SHARD_MIN_PAGES)
+        and workers > 1
+        and not debug_enabled()  # la captura de debug vive en este proceso
+    ):
+        try:
+            return parse_pages(parser, bank, parser_input, workers)
+        except Exception as e:
+            logger.warning(f"⚠️ Parseo por páginas falló para {bank} ({e}); reintentando en una pasada")
+            dbg("page_parallel", "Fallback secuencial para %s: %r", bank, e)
+    return parser.parse(parser_input)
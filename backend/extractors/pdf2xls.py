@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
-"""Command line helper that converts PDFs to Excel using UniversalBankExtractor."""
+"""Command line helper that converts PDFs to Excel using UniversalExtractor.
 
+    python -m extractors.pdf2xls --input archivo/ --output salida/ --jobs 4
+
+Reruns skip files already finished in the manifest (same hash); see extractors.batch.
+"""
+
+import argparse
 import logging
-import os
 import sys
 from pathlib import Path
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from .camelot_utils import extract_tables_with_camelot
-from .universal_extractor import UniversalBankExtractor
+
+from utils.worker_pool import pool_workers
+from .batch import MANIFEST_NAME, format_excel_output, run_batch  # noqa: F401  (format_excel_output re-exported)
 
 
 logging.basicConfig(
@@ -21,131 +24,43 @@ logging.basicConfig(
 logger = logging.getLogger("pdf2xls")
 
 
-def highlight_problem_rows(excel_file: str) -> None:
-    try:
-        workbook = load_workbook(excel_file)
-        sheet = workbook.active
-        headers = [cell.value for cell in sheet[1]]
-        if "observaciones" not in headers:
-            logger.warning("Column 'observaciones' not found in %s", excel_file)
-            return
-
-        column_index = headers.index("observaciones") + 1
-        yellow = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-
-        for row_idx in range(2, sheet.max_row + 1):
-            value = sheet.cell(row=row_idx, column=column_index).value
-            if value and str(value).strip():
-                for col_idx in range(1, sheet.max_column + 1):
-                    sheet.cell(row=row_idx, column=col_idx).fill = yellow
-
-        workbook.save(excel_file)
-    except Exception as exc:  # pragma: no cover - auxiliary script
-        logger.warning("Could not highlight rows in %s: %s", excel_file, exc)
-
-
-def format_excel_output(dataframe: pd.DataFrame, output_file: Path) -> None:
-    formatted = dataframe.copy()
-    
-    # 🔹 Formatear montos (debitos, creditos, saldo)
-    for column in ["debitos", "creditos", "saldo", "debito", "credito"]:
-        if column in formatted.columns:
-            formatted[column] = formatted[column].apply(
-                lambda value: (
-                    f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                    if pd.notna(value) and value != ""
-                    else "0,00"
-                )
-            )
-
-    # 🔹 CRÍTICO: Mantener fecha como STRING en formato dd/mm/yyyy
-    # NO convertir a datetime para evitar que Excel lo interprete mal
-    if "fecha" in formatted.columns:
-        # Si ya viene en formato correcto (dd/mm/yyyy), dejarlo así
-        # Si viene en otro formato, normalizarlo
-        def clean_fecha(val):
-            if pd.isna(val) or val == "":
-                return ""
-            val_str = str(val)
-            # Si ya tiene formato dd/mm/yyyy, dejarlo
-            if "/" in val_str and len(val_str) == 10:
-                return val_str
-            # Si es datetime, convertir
-            try:
-                dt = pd.to_datetime(val, errors="coerce", dayfirst=True)
-                if pd.notna(dt):
-                    return dt.strftime("%d/%m/%Y")
-            except:
-                pass
-            return val_str
-        
-        formatted["fecha"] = formatted["fecha"].apply(clean_fecha)
-
-    formatted.to_excel(output_file, index=False, sheet_name="Transactions")
-    highlight_problem_rows(str(output_file))
-
-
-def main() -> None:
+def main(argv=None) -> int:
     project_root = Path(__file__).resolve().parents[1]
-    input_dir = project_root / "input"
-    output_dir = project_root / "output"
-
-    input_dir.mkdir(exist_ok=True)
-    output_dir.mkdir(exist_ok=True)
-
-    pdf_files = sorted(input_dir.rglob("*.pdf"))
-    if not pdf_files:
-        logger.warning("No PDF files found in %s", input_dir)
+    parser = argparse.ArgumentParser(description="Convert bank statement PDFs to Excel (batch, resumable).")
+    parser.add_argument("--input", type=Path, default=project_root / "input", help="Folder with PDFs (recursive)")
+    parser.add_argument("--output", type=Path, default=project_root / "output", help="Mirrored output folder")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Parallel processes (0 = one per CPU)")
+    parser.add_argument("--manifest", type=Path, default=None,
+                        help=f"Manifest with per-file hash/status/timings (default: <output>/{MANIFEST_NAME})")
+    parser.add_argument("--force", action="store_true", help="Reprocess files already finished in the manifest")
+    args = parser.parse_args(argv)
+
+    args.input.mkdir(exist_ok=True)
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    summary = run_batch(args.input, args.output, jobs=pool_workers(args.jobs),
+                        manifest_path=args.manifest, force=args.force)
+    if not summary["total"]:
+        logger.warning("No PDF files found in %s", args.input)
         print("No PDF files found. Add them to the input folder and run again.")
-        return
-
-    extractor = UniversalBankExtractor()
-    processed = 0
-    failed = 0
-
-    for pdf_file in pdf_files:
-        relative_path = pdf_file.relative_to(input_dir)
-        logger.info("Processing %s", relative_path)
-        try:
-            # 🔹 Obtener resultado completo (dict con tables, metadata, etc.)
-            result = extractor.extract_from_pdf(str(pdf_file), filename_hint=pdf_file.name)
-            
-            # 🔹 Extraer el DataFrame de las tablas
-            tables = result.get("tables", [])
-            if not tables or not isinstance(tables[0], pd.DataFrame):
-                logger.warning("No data extracted from %s", relative_path)
-                failed += 1
-                continue
-            
-            dataframe = tables[0]
-            
-            if dataframe.empty:
-                logger.warning("No data extracted from %s", relative_path)
-                failed += 1
-                continue
-
-            destination_dir = output_dir / relative_path.parent
-            destination_dir.mkdir(parents=True, exist_ok=True)
-            output_file = destination_dir / f"{pdf_file.stem}.xlsx"
-            format_excel_output(dataframe, output_file)
-
-            observations = dataframe.get("observaciones", pd.Series(dtype=str))
-            flagged = int(observations.apply(lambda value: bool(str(value).strip())).sum())
-            logger.info("Saved %s rows (%s flagged) to %s", len(dataframe), flagged, output_file)
-            processed += 1
-        except Exception as exc:  # pragma: no cover - auxiliary script
-            logger.error("Failed to process %s: %s", relative_path, exc, exc_info=True)
-            failed += 1
+        return 0
 
-    logger.info("Processing complete: %s ok, %s failed", processed, failed)
-    print("Processing complete. Check the output directory for results.")
+    print(
+        f"Processing complete in {summary['seconds']}s: {summary['ok']} ok, {summary['empty']} empty, "
+        f"{summary['error']} failed, {summary['skipped']} skipped (already done). "
+        f"Manifest: {summary['manifest']}"
+    )
+    return 1 if summary["error"] else 0
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entry point
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
-        print("\nCancelled by user")
+        print("\nCancelled by user (finished files are kept in the manifest; rerun to resume)")
+        sys.exit(130)
     except Exception as exc:
         logger.error("Unexpected error: %s", exc, exc_info=True)
-        input("Unexpected error. Press Enter to exit...")
\ No newline at end of file
+        if sys.stdin.isatty():
+            input("Unexpected error. Press Enter to exit...")
+        sys.exit(1)
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Triage rápido de PDFs (sin parsear)
+-----------------------------------
+Antes de mandar un lote grande: qué banco es cada PDF, si es texto o
+escaneado, cuántas páginas van a OCR y cuánto va a tardar. Lee SOLO la
+página 1 (más el nombre del archivo), así miles de PDFs se clasifican en
+segundos; sirve para planificar capacidad y rechazar temprano lo que no se
+va a poder procesar.
+
+Mismas reglas que UniversalExtractor:
+  - banco: parse_filename_metadata / nombre del archivo, si no las pistas
+    del texto de la página 1 (y detect_bank de los parsers como último recurso)
+  - imagen: menos de IMAGE_PDF_MIN_CHARS caracteres (acá, en la página 1)
+  - OCR: bancos de FORCE_OCR_BANKS o PDF imagen → OCR de todas las páginas
+
+Tiempo estimado: costo fijo por archivo + segundos por página de texto y de
+OCR (DEFAULT_COSTS, o calibrados con el manifest de una corrida de pdf2xls).
+
+La página 1 se lee con pypdfium2 (viene con pdfplumber) y, si no está, con
+pdfplumber: la cantidad de caracteres puede diferir en algunos espacios, no
+lo suficiente para cambiar el texto/imagen de un extracto real.
+
+    python -m extractors.triage carpeta/ --jobs 4 --json triage.json
+    python -m extractors.triage carpeta/ --calibrate salida/manifest.jsonl
+"""
+
+import argparse
+import io
+import json
+import logging
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+import pdfplumber
+
+try:  # dependencia de pdfplumber; su extractor de texto (C) es ~50x más rápido en la página 1
+    import pypdfium2 as pdfium
+    HAS_PDFIUM = True
+except ImportError:
+    pdfium = None
+    HAS_PDFIUM = False
+
+from config import Config
+from extractors.batch import find_pdfs
+from extractors.universal_extractor import (
+    FORCE_OCR_BANKS, IMAGE_PDF_MIN_CHARS, _detect_bank_from_filename, _detect_bank_hint, parse_filename_metadata,
+)
+from parser_factory import detect_bank
+from utils.worker_pool import get_pool, pool_workers
+
+logger = logging.getLogger(__name__)
+
+Source = Union[str, bytes]  # ruta o contenido (uploads de la API)
+
+TRIAGE_CHUNK = 16  # PDFs por tarea del pool: miles de archivos chicos
+
+
+class Costs(NamedTuple):
+    """Segundos estimados de extracción."""
+    per_file: float = 0.5
+    per_text_page: float = 0.15
+    per_ocr_page: float = 2.5
+
+
+DEFAULT_COSTS = Costs()
+
+
+def _page1_text(source: Source) -> Tuple[int, str]:
+    """(cantidad de páginas, texto de la página 1)."""
+    if HAS_PDFIUM:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            if not len(pdf):
+                return 0, ""
+            page = pdf[0]
+            textpage = page.get_textpage()
+            try:
+                return len(pdf), textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as pdf:
+        return len(pdf.pages), (pdf.pages[0].extract_text() or "") if pdf.pages else ""
+
+
+def triage_pdf(source: Source, filename: str = "") -> Dict:
+    """Datos de un PDF a partir de la página 1 y el nombre (corre en el worker)."""
+    name = filename or Path(source).name
+    meta = parse_filename_metadata(name)
+    row = {
+        "file": name,
+        "empresa": meta.get("empresa", ""),
+        "periodo": meta.get("periodo", ""),
+        "pages": 0,
+        "bank": "",
+        "bank_source": "",
+        "kind": "",
+        "chars_page1": 0,
+        "ocr_pages": 0,
+        "supported": False,
+        "reason": "",
+    }
+    try:
+        row["pages"], text = _page1_text(source)
+    except Exception as e:
+        row["reason"] = f"PDF ilegible: {e}"
+        return row
+
+    row["chars_page1"] = len("\n".join(line.strip() for line in text.splitlines()).strip())
+    row["kind"] = "image" if row["chars_page1"] < IMAGE_PDF_MIN_CHARS else "text"
+
+    bank = meta.get("banco") or _detect_bank_from_filename(name)
+    if bank:
+        row["bank"], row["bank_source"] = bank, "filename"
+    else:
+        # Mismo orden que el extractor; detect_bank (parsers) solo si las pistas no alcanzan
+        detected = _detect_bank_hint(text, name) or detect_bank(text, name)
+        if detected != "GENERIC":
+            row["bank"], row["bank_source"] = detected, "text"
+
+    if row["bank"] in FORCE_OCR_BANKS or row["kind"] == "image":
+        row["ocr_pages"] = row["pages"]
+
+    if not row["pages"]:
+        row["reason"] = "PDF sin páginas"
+    elif not row["bank"]:
+        row["reason"] = "banco no reconocido (iría al parser genérico)"
+    else:
+        row["supported"] = True
+    return row
+
+
+def _triage_chunk(items: Sequence[Tuple[Source, str]]) -> List[Dict]:
+    return [triage_pdf(source, filename) for source, filename in items]
+
+
+def predict_seconds(row: Dict, costs: Costs = DEFAULT_COSTS) -> float:
+    if not row["pages"]:
+        return 0.0
+    return round(costs.per_file + row["pages"] * costs.per_text_page + row["ocr_pages"] * costs.per_ocr_page, 2)
+
+
+def calibrate(manifest_path: str) -> Costs:
+    """
+    Costos por página medidos en una corrida real (manifest.jsonl de pdf2xls):
+    mediana de segundos/página de los PDFs de texto y de los que fueron a OCR.
+    """
+    text_rates, ocr_rates = [], []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok" and record.get("pages"):
+                rate = record.get("seconds", 0) / record["pages"]
+                (ocr_rates if record.get("ocr") else text_rates).append(rate)
+
+    per_text_page = statistics.median(text_rates) if text_rates else DEFAULT_COSTS.per_text_page
+    per_ocr_page = DEFAULT_COSTS.per_ocr_page
+    if ocr_rates:
+        per_ocr_page = max(statistics.median(ocr_rates) - per_text_page, per_text_page)
+    return Costs(0.0 if text_rates else DEFAULT_COSTS.per_file, per_text_page, per_ocr_page)
+
+
+def triage_many(items: Iterable[Tuple[Source, str]], jobs: int = 1,
+                costs: Costs = DEFAULT_COSTS) -> List[Dict]:
+    """Triage de (ruta o bytes, nombre); en el pool "triage" si jobs > 1."""
+    items = list(items)
+    if jobs > 1 and len(items) > TRIAGE_CHUNK:
+        chunks = [items[i:i + TRIAGE_CHUNK] for i in range(0, len(items), TRIAGE_CHUNK)]
+        rows = [row for part in get_pool("triage", jobs).map(_triage_chunk, chunks) for row in part]
+    else:
+        rows = _triage_chunk(items)
+    for row in rows:
+        row["predicted_seconds"] = predict_seconds(row, costs)
+    return rows
+
+
+def summarize(rows: List[Dict], jobs: int = 1) -> Dict:
+    total_seconds = sum(r["predicted_seconds"] for r in rows)
+    return {
+        "files": len(rows),
+        "pages": sum(r["pages"] for r in rows),
+        "ocr_pages": sum(r["ocr_pages"] for r in rows),
+        "image_files": sum(r["kind"] == "image" for r in rows),
+        "banks": dict(Counter(r["bank"] or "?" for r in rows).most_common()),
+        "rejected": [{"file": r["file"], "reason": r["reason"]} for r in rows if not r["supported"]],
+        "predicted_seconds": round(total_seconds, 1),
+        # Reparto ideal entre procesos (pdf2xls --jobs): cota inferior del tiempo real
+        "predicted_wall_seconds": round(total_seconds / max(1, jobs), 1),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Triage rápido de PDFs: banco, texto/imagen, páginas, OCR y tiempo estimado")
+    ap.add_argument("folder", type=Path, help="Carpeta con PDFs (recursivo)")
+    ap.add_argument("--jobs", "-j", type=int, default=Config.TRIAGE_WORKERS,
+                    help="Procesos para leer las páginas 1 (TRIAGE_WORKERS; 0 = un proceso por CPU)")
+    ap.add_argument("--batch-jobs", type=int, default=None,
+                    help="Procesos con los que se correría el lote (para el tiempo estimado; default = --jobs)")
+    ap.add_argument("--calibrate", default=None, help="manifest.jsonl de una corrida de pdf2xls para medir costos")
+    ap.add_argument("--json", default=None, help="Guardar filas y resumen en este JSON")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    costs = calibrate(args.calibrate) if args.calibrate else DEFAULT_COSTS
+    jobs = pool_workers(args.jobs)
+    batch_jobs = args.batch_jobs or jobs
+
+    t0 = time.perf_counter()
+    paths = list(find_pdfs(args.folder))
+    rows = triage_many(((str(p), p.relative_to(args.folder).as_posix()) for p in paths), jobs, costs)
+    elapsed = time.perf_counter() - t0
+    summary = summarize(rows, batch_jobs)
+
+    for r in rows:
+        flag = "  " if r["supported"] else "✗ "
+        print(f"{flag}{r['file'][:60]:<60} {r['bank'] or '?':<12} {r['kind'] or '-':<5} "
+              f"{r['pages']:>4} pág {r['ocr_pages']:>4} OCR {r['predicted_seconds']:>8.1f}s  {r['reason']}")
+    print()
+    print(f"{summary['files']} PDFs triados en {elapsed:.2f}s | {summary['pages']} páginas, "
+          f"{summary['ocr_pages']} a OCR ({summary['image_files']} escaneados)")
+    print(f"Bancos: {summary['banks']}")
+    print(f"Tiempo estimado: {summary['predicted_seconds']:.0f}s de CPU, "
+          f"~{summary['predicted_wall_seconds']:.0f}s con {batch_jobs} proceso(s)"
+          f" ({'calibrado' if args.calibrate else 'costos por defecto'}: {costs._asdict()})")
+    if summary["rejected"]:
+        print(f"✗ {len(summary['rejected'])} rechazados")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"files": rows, "summary": summary, "costs": costs._asdict(),
+                       "seconds": round(elapsed, 3)}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,13 @@
 # unificador.py
 from __future__ import annotations
-from typing import List, Dict, Optional, Tuple
+from typing import IO, List, Dict, Optional, Tuple, Union
 import re
+import numpy as np
 import pandas as pd
 
+from utils.excel_utils import write_excel
+from utils.metrics import span
+
 # Nombres de meses (para parsing y/o uso general)
 MESES = [
     "enero", "febrero", "marzo", "abril", "mayo", "junio",
@@ -54,6 +58,11 @@ def infer_period(df: pd.DataFrame, raw_lines: Optional[List[str]] = None) -> Tup
             return int(first.year), int(first.month)
 
     # 2) Raw lines
+    return _period_from_lines(raw_lines)
+
+
+def _period_from_lines(raw_lines: Optional[List[str]]) -> Tuple[Optional[int], Optional[int]]:
+    """(año, mes) desde líneas crudas (OCR), p.ej. "JULIO - 2025", "Saldo al: 31/07/2025"."""
     if raw_lines:
         # A) "MES - YYYY"
         patron_mes_yyyy = re.compile(rf"\b({'|'.join(m.upper() for m in MESES)})\s*[-—]\s*(\d{{4}})\b", re.IGNORECASE)
@@ -78,152 +87,327 @@ def infer_period(df: pd.DataFrame, raw_lines: Optional[List[str]] = None) -> Tup
 
     return None, None
 
-# ------------------------------------------------------------
-# Tipificación y columnas de orden
-# ------------------------------------------------------------
-def _coerce_period_cols(df: pd.DataFrame) -> pd.DataFrame:
-    df["año"] = pd.to_numeric(df.get("año"), errors="coerce")
-    df["mes"] = pd.to_numeric(df.get("mes"), errors="coerce")
-
-    # 🔹 Si fecha viene como string dd/mm/yyyy, parsear correctamente
-    if "fecha" in df.columns and (df["año"].isna().any() or df["mes"].isna().any()):
-        f = pd.to_datetime(df["fecha"], errors="coerce", dayfirst=True, format="%d/%m/%Y")
-        df.loc[df["año"].isna() & f.notna(), "año"] = f.dt.year
-        df.loc[df["mes"].isna() & f.notna(), "mes"] = f.dt.month
-
-    df["año"] = df["año"].astype("Int64")
-    df["mes"] = df["mes"].astype("Int64")
-    return df
-
-def _build_period_and_order_date(df: pd.DataFrame) -> pd.DataFrame:
-    # periodo = primer día del mes (para ordenar por mes aún si falta 'fecha')
-    # 🔧 Rellenar NA en año/mes ANTES de convertir a Int64
-    df["año"] = pd.to_numeric(df["año"], errors="coerce").fillna(2025)
-    df["mes"] = pd.to_numeric(df["mes"], errors="coerce").fillna(1)
-    
-    df["periodo_sort"] = pd.to_datetime(
-        dict(
-            year=df["año"].astype("int"),
-            month=df["mes"].astype("int"),
-            day=1,
-        ),
-        errors="coerce",
-    )
-
-    # 🔹 fecha_orden: parsear fecha correctamente si es string
-    if "fecha" in df.columns:
-        fecha_dt = pd.to_datetime(df["fecha"], errors="coerce", dayfirst=True, format="%d/%m/%Y")
-    else:
-        fecha_dt = pd.Series(pd.NaT, index=df.index)
-
-    # fecha_orden = usa fecha si existe, sino periodo_sort
-    df["fecha_orden"] = fecha_dt.where(fecha_dt.notna(), df["periodo_sort"])
-    return df
-
 # ------------------------------------------------------------
 # CONSOLIDADO (una sola hoja)
 # ------------------------------------------------------------
-def consolidate(inputs: List[Dict], output_path: Optional[str] = None) -> pd.DataFrame:
+# Los DataFrames de entrada no se copian ni se modifican: se resuelven los
+# datos de cada extracto (banco, período, moneda) como escalares, se concatena
+# UNA vez y la normalización (fecha, montos, año/mes, orden) corre vectorizada
+# sobre el total, con un solo parseo de fecha y un solo sort estable.
+FECHA_FMT = "%d/%m/%Y"
+ORDER_KEYS = ["banco", "año", "mes", "fecha_orden"]
+DEFAULT_YEAR, DEFAULT_MONTH = 2025, 1
+
+
+def _fecha_text(s: pd.Series) -> pd.Series:
+    """fecha como string dd/mm/yyyy para Excel (NaT/nan → "")."""
+    return s.astype(str).replace({"NaT": "", "nan": ""})
+
+
+def _first_value(df: pd.DataFrame, col: str):
+    return df[col].iloc[0] if col in df.columns and len(df) else None
+
+
+def _all_missing(df: pd.DataFrame, col: str) -> bool:
+    return col not in df.columns or df[col].isna().all()
+
+
+def _item_info(df: pd.DataFrame, meta: Dict) -> Dict:
+    """Datos escalares de un extracto; el período queda en None si hay que inferirlo."""
+    # Banco (columna, meta o attrs)
+    bank = _first_value(df, "banco") or ""
+    if not bank:
+        bank = meta.get("bank") or df.attrs.get("bank") or df.attrs.get("source", "")
+
+    # Periodo (columnas o meta; si no, se infiere después sobre la fecha ya parseada)
+    year, month = _first_value(df, "año"), _first_value(df, "mes")
+    if not (year and month):
+        year, month = meta.get("year"), meta.get("month")
+
+    return {
+        "bank": normalize_bank(bank),
+        "year": year,
+        "month": month,
+        "infer": not (year and month),
+        "fill_year": _all_missing(df, "año"),
+        "fill_month": _all_missing(df, "mes"),
+        "currency": meta.get("currency", "ARS") if "moneda" not in df.columns else None,
+        "fill_currency": "moneda" not in df.columns,
+        "account": meta.get("account") or "",
+        "fill_account": _all_missing(df, "cuenta"),
+    }
+
+
+def _period_number(s: pd.Series) -> pd.Series:
+    """to_numeric de año/mes: vienen como texto repetido ("2025", "07"), se convierten los valores únicos."""
+    if s.dtype != object:
+        return pd.to_numeric(s, errors="coerce")
+    codes, uniques = pd.factorize(s)
+    values = np.append(pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce").to_numpy(float), np.nan)
+    return pd.Series(values[codes], index=s.index)
+
+
+def _output_columns(frames: List[pd.DataFrame]) -> List[str]:
+    """Orden de columnas del consolidado: el de cada extracto + las de control agregadas."""
+    cols: Dict[str, None] = {}
+    for df in frames:
+        cols.update(dict.fromkeys(df.columns))
+        cols.update(dict.fromkeys(c for c in ("banco", "año", "mes", "moneda") if c not in df.columns))
+        cols.update(dict.fromkeys(("periodo_sort", "fecha_orden")))
+    return list(cols)
+
+
+def _period_col(df_all: pd.DataFrame, col: str, values: list, overwrite: np.ndarray,
+                from_fecha: pd.Series, default: int) -> pd.Series:
+    """año/mes: valor del extracto donde la columna venía vacía, si no el de la fila, la fecha o el default."""
+    current = _period_number(df_all[col]) if col in df_all.columns else pd.Series(np.nan, index=df_all.index)
+    if overwrite.any():
+        current = current.mask(overwrite, _period_number(pd.Series(values, index=df_all.index)))
+    return current.fillna(from_fecha).fillna(default).astype("Int64")
+
+
+@span("consolidate")
+def consolidate(inputs: List[Dict], output_path: Union[str, IO[bytes], None] = None) -> pd.DataFrame:
     """
     Consolida dataframes de extractos bancarios.
     Orden final garantizado: banco → año → mes → fecha.
-    Genera UNA sola hoja "Consolidado" si se pasa output_path.
+    Genera UNA sola hoja "Consolidado" si se pasa output_path (ruta o archivo binario).
     inputs: lista de dicts con al menos {"df": DataFrame, "meta": {...opcional...}}
             meta puede contener: bank, year, month, currency
     """
-    items = []
-
+    frames, infos = [], []
     for item in inputs:
-        df = item["df"].copy()
-        meta = item.get("meta") or {}
-
-        # Banco (meta/attrs o de columnas)
-        bank = df.get("banco", pd.Series([""])).iloc[0] if "banco" in df.columns else ""
-        if not bank:
-            bank = meta.get("bank") or df.attrs.get("bank") or df.attrs.get("source", "")
-        bank = normalize_bank(bank)
-
-        # Periodo (meta o inferencia o de columnas)
-        year = df.get("año", pd.Series([None])).iloc[0] if "año" in df.columns else None
-        month = df.get("mes", pd.Series([None])).iloc[0] if "mes" in df.columns else None
-        
-        if not (year and month):
-            year = meta.get("year")
-            month = meta.get("month")
-        
-        if not (year and month):
-            raw_lines = df.attrs.get("raw_lines")
-            year, month = infer_period(df, raw_lines)
-
-        # 🔹 Tipos y columnas numéricas
-        # Si fecha viene como string dd/mm/yyyy, NO convertir a datetime para Excel
-        # Solo validar que esté en formato correcto
-        if "fecha" in df.columns:
-            # Mantener como string, solo limpiar
-            df["fecha"] = df["fecha"].astype(str).replace("NaT", "").replace("nan", "")
-
-        for col in ("debito", "credito", "saldo"):
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        # Completar columnas de control
-        df["banco"] = bank
-        if "año" not in df.columns or df["año"].isna().all():
-            df["año"] = year
-        if "mes" not in df.columns or df["mes"].isna().all():
-            df["mes"] = month
-        if "moneda" not in df.columns:
-            df["moneda"] = meta.get("currency", "ARS")
-
-        df = _coerce_period_cols(df)
-        df = _build_period_and_order_date(df)
-
-        items.append(df)
-
-    if not items:
+        df = item["df"]
+        # fecha se maneja como texto; solo se convierte si el parser la dejó tipada
+        if "fecha" in df.columns and df["fecha"].dtype != object:
+            df = df.assign(fecha=_fecha_text(df["fecha"]))
+        frames.append(df)
+        infos.append(_item_info(df, item.get("meta") or {}))
+
+    if not frames:
         # Nada que consolidar
         empty = pd.DataFrame()
         if output_path:
-            with pd.ExcelWriter(output_path, engine="openpyxl") as xw:
-                empty.to_excel(xw, index=False, sheet_name="Consolidado")
+            write_consolidado(empty, output_path)
         return empty
 
-    df_all = pd.concat(items, ignore_index=True)
-    # --- mantener orden interno del parser ---
-    if "__seq" in df_all.columns:
-        df_all = df_all.sort_values(
-            ["banco", "año", "mes", "__seq"],
-            kind="stable",
-            na_position="last",
-        )
-    elif "__order" in df_all.columns:
-        df_all = df_all.sort_values(
-            ["banco", "año", "mes", "__order"],
-            kind="stable",
-            na_position="last",
-        )
-
-
-    # 🔹 CRÍTICO: Orden estable: banco → año → mes → fecha_orden
-    # Esto garantiza que COMAFI-JUNIO vaya antes que COMAFI-JULIO
-    df_all = df_all.sort_values(
-        ["banco", "año", "mes", "fecha_orden"],
-        kind="stable",
-        na_position="last",
-    ).reset_index(drop=True)
-
-    # 🔹 Volver fecha a formato string dd/mm/yyyy para Excel
+    df_all = pd.concat(frames, ignore_index=True)
+    lengths = [len(df) for df in frames]
+
+    def spread(key: str) -> np.ndarray:
+        """Valor escalar de cada extracto repetido en sus filas."""
+        return np.repeat(np.array([info[key] for info in infos], dtype=object), lengths)
+
+    # 🔹 fecha: texto para Excel + un único parseo para año/mes y orden
     if "fecha" in df_all.columns:
-        df_all["fecha"] = df_all["fecha"].astype(str).replace("NaT", "").replace("nan", "")
+        df_all["fecha"] = _fecha_text(df_all["fecha"])
+        fecha_dt = pd.to_datetime(df_all["fecha"], errors="coerce", dayfirst=True, format=FECHA_FMT)
+    else:
+        fecha_dt = pd.Series(pd.NaT, index=df_all.index, dtype="datetime64[ns]")
+
+    # Período que no vino en columnas ni meta: fecha mínima del extracto u OCR crudo
+    pending = [k for k, info in enumerate(infos) if info["infer"]]
+    if pending:
+        item_of_row = np.repeat(np.arange(len(frames)), lengths)
+        first_dates = fecha_dt.groupby(item_of_row).min()
+        for k in pending:
+            first = first_dates.get(k, pd.NaT)
+            if pd.notna(first):
+                infos[k]["year"], infos[k]["month"] = int(first.year), int(first.month)
+            else:
+                infos[k]["year"], infos[k]["month"] = _period_from_lines(frames[k].attrs.get("raw_lines"))
+
+    for col in ("debito", "credito", "saldo"):
+        if col in df_all.columns:
+            df_all[col] = pd.to_numeric(df_all[col], errors="coerce")
+
+    # Completar columnas de control
+    df_all["banco"] = spread("bank")
+    df_all["año"] = _period_col(df_all, "año", spread("year"), spread("fill_year").astype(bool),
+                                fecha_dt.dt.year, DEFAULT_YEAR)
+    df_all["mes"] = _period_col(df_all, "mes", spread("month"), spread("fill_month").astype(bool),
+                                fecha_dt.dt.month, DEFAULT_MONTH)
+    fill_currency = spread("fill_currency").astype(bool)
+    if "moneda" not in df_all.columns:
+        df_all["moneda"] = spread("currency")
+    elif fill_currency.any():
+        df_all["moneda"] = df_all["moneda"].mask(fill_currency, pd.Series(spread("currency"), index=df_all.index))
+
+    # cuenta: solo si algún extracto la trae (meta "account", del StatementContext)
+    if any(info["account"] for info in infos):
+        accounts = pd.Series(spread("account"), index=df_all.index)
+        if "cuenta" not in df_all.columns:
+            df_all["cuenta"] = accounts
+        else:
+            df_all["cuenta"] = df_all["cuenta"].mask(spread("fill_account").astype(bool), accounts)
+
+    # periodo = primer día del mes (para ordenar por mes aún si falta 'fecha')
+    df_all["periodo_sort"] = pd.to_datetime(
+        dict(year=df_all["año"].astype("int"), month=df_all["mes"].astype("int"), day=1),
+        errors="coerce",
+    )
+    # fecha_orden = usa fecha si existe, sino periodo_sort
+    df_all["fecha_orden"] = fecha_dt.where(fecha_dt.notna(), df_all["periodo_sort"])
+
+    columns = _output_columns(frames)
+    if "cuenta" in df_all.columns and "cuenta" not in columns:
+        columns.insert(columns.index("banco") + 1, "cuenta")
+    if list(df_all.columns) != columns:
+        df_all = df_all[columns]
+
+    # 🔹 CRÍTICO: un solo sort estable banco → año → mes → fecha_orden; a igual
+    # fecha se respeta el orden interno del parser (__seq/__order) y después el
+    # de entrada. Así COMAFI-JUNIO va antes que COMAFI-JULIO.
+    keys = ORDER_KEYS + [c for c in ("__seq", "__order") if c in df_all.columns][:1]
+    df_all = df_all.sort_values(keys, kind="stable", na_position="last").reset_index(drop=True)
 
     # Exporta SOLO una hoja "Consolidado"
     if output_path:
-        out = df_all.drop(columns=["fecha_orden", "periodo_sort"], errors="ignore")
-        with pd.ExcelWriter(output_path, engine="openpyxl") as xw:
-            out.to_excel(xw, index=False, sheet_name="Consolidado")
+        with span("excel_write"):
+            write_consolidado(df_all, output_path)
 
     return df_all
 
+
+# ------------------------------------------------------------
+# Movimientos duplicados entre extractos con períodos superpuestos
+# ------------------------------------------------------------
+# ENE-JUNIO2025 + JUN+JUL2025 traen junio dos veces. Cada fila se identifica con
+# un hash de (empresa, banco, cuenta, moneda, fecha, detalle normalizado, montos,
+# saldo): una fila es candidata a duplicada si la misma clave ya apareció en OTRO
+# extracto (archivo). Dentro de un mismo extracto se cuenta la n-ésima aparición,
+# así dos comisiones idénticas del mismo día siguen siendo dos movimientos.
+#
+# Que coincida una fila no alcanza: dos cuentas sin número detectado pueden
+# cobrar la misma comisión el mismo día. Un par de extractos se superpone solo si,
+# en la ventana donde se cruzan sus fechas, coincide al menos DEDUPE_MIN_OVERLAP
+# de los movimientos del que tiene menos ahí; si no, sus filas no se tocan.
+# Todo es hash + groupby: O(n) sobre el consolidado, sin comparar filas entre sí.
+DEDUPE_KEYS = ["empresa", "banco", "cuenta", "moneda", "fecha", "detalle", "debito", "credito", "saldo"]
+DEDUPE_MIN_OVERLAP = 0.5
+DUPLICATE_OF = "duplicado_de"
+
+
+def _normalized_text(s: pd.Series) -> pd.Series:
+    """detalle comparable: minúsculas y espacios colapsados (se normalizan los valores únicos)."""
+    codes, uniques = pd.factorize(s)
+    norm = pd.Series(uniques, dtype=object).astype(str).str.casefold().str.split().str.join(" ")
+    values = np.append(norm.to_numpy(object), "")
+    return pd.Series(values[codes], index=s.index)
+
+
+def movement_hash(df: pd.DataFrame) -> pd.Series:
+    """Hash uint64 por fila de las columnas de DEDUPE_KEYS presentes."""
+    parts = {}
+    for col in DEDUPE_KEYS:
+        if col not in df.columns:
+            continue
+        if col in ("debito", "credito", "saldo"):
+            parts[col] = pd.to_numeric(df[col], errors="coerce").round(2)
+        elif col == "detalle":
+            parts[col] = _normalized_text(df[col])
+        else:
+            parts[col] = df[col].fillna("").astype(str)
+    return pd.util.hash_pandas_object(pd.DataFrame(parts, index=df.index), index=False)
+
+
+def _overlapping_pairs(dates: np.ndarray, source: np.ndarray, pairs: pd.Series,
+                       min_overlap: float = DEDUPE_MIN_OVERLAP) -> set:
+    """
+    Pares (conservado, duplicado) de extractos que de verdad se superponen.
+    `pairs` cuenta las filas coincidentes de cada par; `dates` son las fechas
+    (datetime64, NaT si no hay) y `source` el código de extracto de cada fila.
+    """
+    # Un solo sort por (extracto, fecha): cada extracto queda en un tramo contiguo (NaT al final)
+    order = np.lexsort((dates, source))
+    sorted_dates, sorted_source = dates[order], source[order]
+    bounds = np.searchsorted(sorted_source, np.arange(source.max() + 2))
+    by_source = {}
+    for code in set(pairs.index.get_level_values(0)) | set(pairs.index.get_level_values(1)):
+        d = sorted_dates[bounds[code]:bounds[code + 1]]
+        by_source[code] = (d[:len(d) - int(np.isnat(d).sum())], len(d))
+
+    def rows_in(code, lo, hi) -> int:
+        d, total = by_source[code]
+        if not len(d) or lo is None:
+            return total  # sin fechas: se compara contra el extracto entero
+        return int(np.searchsorted(d, hi, side="right") - np.searchsorted(d, lo, side="left"))
+
+    valid = set()
+    for (kept, dup), matched in pairs.items():
+        a, b = by_source[kept][0], by_source[dup][0]
+        lo = hi = None
+        if len(a) and len(b):
+            lo, hi = max(a[0], b[0]), min(a[-1], b[-1])
+        smaller = min(rows_in(kept, lo, hi), rows_in(dup, lo, hi))
+        if smaller and matched / smaller >= min_overlap:
+            valid.add((kept, dup))
+    return valid
+
+
+def _no_duplicates(df_all: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    return df_all, df_all.iloc[:0].assign(**{DUPLICATE_OF: pd.Series(dtype=object)})
+
+
+@span("dedupe")
+def dedupe_movements(df_all: pd.DataFrame, source_col: str = "archivo", drop: bool = False,
+                     min_overlap: float = DEDUPE_MIN_OVERLAP) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Detecta los movimientos repetidos entre extractos superpuestos.
+    Devuelve (consolidado, duplicados con la columna "duplicado_de" = archivo
+    cuya copia se conserva: la del extracto que aparece primero, el de período
+    anterior). Con drop=False el consolidado trae todas las filas y las repetidas
+    marcadas en "duplicado_de"; con drop=True salen del consolidado.
+    Sin `source_col` no hay con qué distinguir extractos y no se marca nada.
+    """
+    if df_all.empty or source_col not in df_all.columns:
+        return _no_duplicates(df_all)
+
+    key = movement_hash(df_all)
+    # códigos por orden de aparición: el menor es el extracto que viene antes
+    source, sources = pd.factorize(df_all[source_col].fillna("").astype(str))
+    source = pd.Series(source, index=df_all.index)
+    nth = key.groupby([key, source], sort=False).cumcount()
+    kept_source = source.groupby([key, nth], sort=False).transform("min")
+    dup = (source != kept_source).to_numpy()
+    if not dup.any():
+        return _no_duplicates(df_all)
+
+    # Solo cuentan los pares de extractos cuyos períodos se superponen de verdad
+    pair_counts = pd.Series(1, index=pd.MultiIndex.from_arrays(
+        [kept_source.to_numpy()[dup], source.to_numpy()[dup]])).groupby(level=[0, 1]).sum()
+    fechas = (pd.to_datetime(df_all["fecha"], errors="coerce", dayfirst=True, format=FECHA_FMT)
+              if "fecha" in df_all.columns else pd.Series(pd.NaT, index=df_all.index))
+    valid = _overlapping_pairs(fechas.to_numpy("datetime64[ns]"), source.to_numpy(), pair_counts, min_overlap)
+    rejected = [pair for pair in pair_counts.index if pair not in valid]
+    if rejected:
+        pair_index = pd.MultiIndex.from_arrays([kept_source.to_numpy(), source.to_numpy()])
+        dup &= ~pair_index.isin(rejected)
+        if not dup.any():
+            return _no_duplicates(df_all)
+
+    kept_of = sources.to_numpy(object)[kept_source.to_numpy()[dup]]
+    duplicates = df_all[dup].assign(**{DUPLICATE_OF: kept_of}).reset_index(drop=True)
+    if drop:
+        return df_all[~dup].reset_index(drop=True), duplicates
+    flags = np.full(len(df_all), "", dtype=object)
+    flags[dup] = kept_of
+    return df_all.assign(**{DUPLICATE_OF: flags}), duplicates
+
+
+def consolidado_columns(df_all: pd.DataFrame) -> List[str]:
+    """Columnas que van al Excel: todas menos las auxiliares de orden."""
+    return [c for c in df_all.columns if c not in ("fecha_orden", "periodo_sort")]
+
+
+def write_consolidado(df_all: pd.DataFrame, target: Union[str, IO[bytes]]) -> None:
+    """
+    Hoja "Consolidado" en una ruta o un archivo binario (p.ej. una entrada de ZIP).
+    Las filas marcadas en "duplicado_de" van resaltadas.
+    """
+    write_excel(df_all, target, sheet_name="Consolidado", columns=consolidado_columns(df_all),
+                highlight=DUPLICATE_OF)
+
 # --- Camelot tables → list[pd.DataFrame] (helper esperado por UniversalExtractor) ---
 def unify_camelot_tables(camelot_tables) -> list[pd.DataFrame]:
     """
@@ -5,10 +5,14 @@ from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 import pandas as pd
 
-from .camelot_utils import extract_tables_with_camelot
 from .ocr_extractor import ocr_extract_pages
+from .page_parallel import parse_input
 from .unificador import unify_camelot_tables
 from pdf_reader import PDFReader
+from parsers.base_parser import parse_dates
+from parsers.parser_input import ParserInput
+from parsers.statement_context import build_statement_context
+from utils.metrics import observe, span
 
 import sys
 import os
@@ -21,6 +25,7 @@ logger = logging.getLogger(__name__)
 FORCE_OCR_BANKS = {"ICBC", "COMAFI", "MERCADOPAGO", "SUPERVIELLE", "GALICIA"}
 SKIP_CAMELOT_BANKS = {"MACRO"}
 CAMELOT_MAX_PAGES = 5
+IMAGE_PDF_MIN_CHARS = 100  # menos texto que esto en las páginas muestreadas = PDF escaneado
 
 _NOISE_PATTERNS = [
     r"^\s*hoja\s*\d+(\s*/\s*\d+)?\s*$",
@@ -47,15 +52,24 @@ def _lightline(line: str) -> str:
 
 
 def _preclean_lines(lines: List[str]) -> List[str]:
+    return _preclean_pages(lines, ())[0]
+
+
+def _preclean_pages(lines: List[str], page_starts) -> Tuple[List[str], List[int]]:
+    """Como _preclean_lines, pero además reubica el inicio de cada página en las líneas limpias."""
+    starts = set(page_starts)
     out: List[str] = []
-    for ln in lines:
+    out_starts: List[int] = []
+    for i, ln in enumerate(lines):
+        if i in starts and (not out_starts or out_starts[-1] != len(out)):
+            out_starts.append(len(out))
         ln = _lightline(ln)
         if not ln:
             continue
         if _is_probably_noise(ln):
             continue
         out.append(ln)
-    return out
+    return out, out_starts
 
 
 # ---------------------------------------------------------------------
@@ -178,8 +192,7 @@ def _is_image_based_pdf(pdf_path: str, sample_pages: int = 2) -> bool:
             for i in range(pages_to_check):
                 text = pdf.pages[i].extract_text() or ""
                 total_chars += len(text.strip())
-            threshold = 100
-            is_image = total_chars < threshold
+            is_image = total_chars < IMAGE_PDF_MIN_CHARS
             logger.info(f"Detección PDF tipo: {total_chars} chars en {pages_to_check} páginas → {'IMAGEN' if is_image else 'TEXTO'}")
             return is_image
     except Exception as e:
@@ -189,9 +202,14 @@ def _is_image_based_pdf(pdf_path: str, sample_pages: int = 2) -> bool:
 
 # ---------------------------------------------------------------------
 class UniversalExtractor:
-    def __init__(self, ocr_if_image: bool = True, max_ocr_pages: int = 100):
+    def __init__(self, ocr_if_image: bool = True, max_ocr_pages: int = 100,
+                 ocr_dpi_quick: int = 160, ocr_dpi_full: int = 200,
+                 camelot_max_pages: int = CAMELOT_MAX_PAGES):
         self.ocr_if_image = ocr_if_image
         self.max_ocr_pages = max_ocr_pages
+        self.ocr_dpi_quick = ocr_dpi_quick
+        self.ocr_dpi_full = ocr_dpi_full
+        self.camelot_max_pages = camelot_max_pages
         self.reader = PDFReader()
 
     def extract_from_pdf(self, pdf_path: str, filename_hint: str = "") -> Dict[str, Any]:
@@ -202,8 +220,12 @@ class UniversalExtractor:
         else:
             text_lines_raw = [ln for ln in (text_raw or "").splitlines()]
 
-        text_lines_clean = _preclean_lines(text_lines_raw)
+        text_lines_clean, page_starts = _preclean_pages(text_lines_raw, self.reader.page_starts(pdf_path))
         pages_count = raw_data.get('pages_count', 0) if isinstance(raw_data, dict) else 0
+        if not pages_count:
+            pages_count = self.reader.page_count(pdf_path)
+        if pages_count:
+            observe("tga_pdf_pages", pages_count)
 
         # 🔹 Extraer metadata PRIMERO desde filename
         meta = parse_filename_metadata(filename_hint)
@@ -213,20 +235,12 @@ class UniversalExtractor:
         logger.info(f"🏦 Banco detectado: {bank_hint}")
 
         skip_camelot = False
-        if bank_hint in FORCE_OCR_BANKS or _is_image_based_pdf(pdf_path):
+        with span("image_check"):
+            is_image = bank_hint not in FORCE_OCR_BANKS and _is_image_based_pdf(pdf_path)
+        if bank_hint in FORCE_OCR_BANKS or is_image:
             skip_camelot = True
             logger.info(f"⭐️ Saltando Camelot (OCR o imagen-based)")
 
-        camelot_tables = []
-        if not skip_camelot:
-            try:
-                logger.info(f"📊 Ejecutando Camelot (máx {CAMELOT_MAX_PAGES} páginas)...")
-                camelot_tables = extract_tables_with_camelot(pdf_path, max_pages=CAMELOT_MAX_PAGES) or []
-            except Exception as e:
-                logger.warning(f"⚠️ Camelot falló: {e}")
-                camelot_tables = []
-        tables = unify_camelot_tables(camelot_tables) if camelot_tables else []
-
         used_ocr = False
         should_use_ocr = False
         if self.ocr_if_image and (bank_hint in FORCE_OCR_BANKS or not text_lines_clean or len(text_lines_clean) < 5):
@@ -234,18 +248,25 @@ class UniversalExtractor:
 
         if should_use_ocr:
             try:
-                ocr_pages = ocr_extract_pages(pdf_path, max_pages=self.max_ocr_pages)
+                ocr_pages = ocr_extract_pages(
+                    pdf_path,
+                    dpi_quick=self.ocr_dpi_quick,
+                    dpi_full=self.ocr_dpi_full,
+                    max_pages=self.max_ocr_pages,
+                )
                 if ocr_pages:
                     used_ocr = True
                     # 🔧 OCR devuelve [(page_num, texto), ...]
                     ocr_lines_raw = []
+                    ocr_page_starts = []
                     for page_num, page_text in ocr_pages:
                         # Agregar cada línea del texto de la página
+                        ocr_page_starts.append(len(ocr_lines_raw))
                         ocr_lines_raw.extend(page_text.splitlines())
                     
                     # Reemplazar text_lines_raw completamente con OCR
                     text_lines_raw = ocr_lines_raw
-                    text_lines_clean = _preclean_lines(text_lines_raw)
+                    text_lines_clean, page_starts = _preclean_pages(text_lines_raw, ocr_page_starts)
                     logger.info(f"✅ OCR extrajo {len(ocr_lines_raw)} líneas totales")
             except Exception as e:
                 logger.error(f"OCR falló: {e}")
@@ -256,18 +277,36 @@ class UniversalExtractor:
             import sys, os
             sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
             from parser_factory import get_parser
+        # Las tablas Camelot se extraen a demanda (una vez por flavor) y se comparten
+        # entre el parser que las declare y el fallback de "tables" del resultado.
+        # Año, período, moneda, cuenta y saldos: una sola pasada, compartida por todos los parsers
+        with span("context"):
+            context = build_statement_context(text_lines_clean, filename_hint)
+        logger.info(
+            f"🧾 Contexto: año={context.year} período={context.period_start}→{context.period_end} "
+            f"moneda={context.currency} cuenta={context.account or '-'}"
+        )
+        parser_input = ParserInput(
+            text_lines_clean, pdf_path=pdf_path, filename=filename_hint,
+            tables_enabled=not skip_camelot, context=context, page_starts=page_starts,
+        )
+        tables = []
         try:
             parser = get_parser(bank_hint)
             if parser:
+                if getattr(parser, "PARSER_INPUT", "lines") != "lines":
+                    logger.info(f"📊 {bank_hint} usa tablas Camelot ({parser.PARSER_INPUT})")
+                    parser_input.tables_for(parser)
                 logger.info(f"🔄 Ejecutando parser para {bank_hint}...")
-                df = parser.parse(text_lines_clean)
+                with span("parser", bank=bank_hint):
+                    df = parse_input(parser, bank_hint, parser_input)
                 
                 # 🔹 FORZAR columnas de metadata desde filename (NUNCA del PDF)
                 if isinstance(df, pd.DataFrame) and not df.empty:
                     # Convertir fecha a formato dd/mm/yyyy SIN hora
                     if "fecha" in df.columns:
-                        df["fecha"] = pd.to_datetime(df["fecha"], errors="coerce", dayfirst=True)
-                        df["fecha"] = df["fecha"].dt.strftime("%d/%m/%Y").fillna("")
+                        # Mismo conversor que BaseParser.finalize: cada fecha distinta se parsea una vez
+                        df["fecha"] = parse_dates(df["fecha"]).dt.strftime("%d/%m/%Y").fillna("")
                     
                     # Forzar metadata desde filename
                     df["empresa"] = meta.get("empresa", "")
@@ -293,11 +332,17 @@ class UniversalExtractor:
         except Exception as e:
             logger.error(f"Error ejecutando parser {bank_hint}: {e}", exc_info=True)
 
+        if not tables and not skip_camelot:
+            # Sin resultado del parser: tablas lattice crudas como antes
+            logger.info(f"📊 Ejecutando Camelot (máx {self.camelot_max_pages} páginas)...")
+            tables = unify_camelot_tables(parser_input.tables("lattice", max_pages=self.camelot_max_pages))
+
         result = {
             "text_lines": text_lines_clean,
             "tables": tables,
             "bank_hint": bank_hint,
             "metadata": meta,
+            "context": context,
             "method": {"ocr": used_ocr},
             "pages_count": pages_count,
         }
@@ -1,10 +1,309 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+DATE_FORMATS = ("%d/%m/%Y", "%d/%m/%y", "%Y/%m/%d", "%d-%m-%Y", "%d-%m-%y")
+# Formatos que ya vienen normalizados (fechas ISO de normalize_date o Timestamps)
+ISO_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+
+_THOUSANDS_ONLY = re.compile(r"\d{1,3}(?:\.\d{3})+")
+
+
+# ---------------------------------------------------------------------
+# Conversores por columna (cada valor distinto se convierte una sola vez)
+# ---------------------------------------------------------------------
+def _text_amount(v) -> float:
+    if isinstance(v, (int, float)):
+        return float(v)
+    if not isinstance(v, str):
+        return np.nan
+    t = v.replace(" ", "").replace("\u00a0", "").replace("$", "")
+    if not t:
+        return np.nan
+    neg = t[0] == "-" or t[-1] == "-" or (t[0] == "(" and t[-1] == ")")
+    t = t.replace("(", "").replace(")", "").replace("-", "")
+    if "," in t or _THOUSANDS_ONLY.fullmatch(t):
+        t = t.replace(".", "").replace(",", ".")
+    try:
+        x = float(t)
+    except ValueError:
+        return np.nan
+    return -x if neg else x
+
+
+def amounts_to_float(values, default=0.0) -> pd.Series:
+    """
+    Convierte una columna de importes a float.
+    - Números: se respetan tal cual.
+    - Texto AR: '1.234,56', '$ 1.234,56', '1 234,56', '1.234' (solo miles).
+    - Negativos: '-1.234,56', '1.234,56-', '(1.234,56)', '$ -1.234,56'.
+    - Texto con punto decimal ('1234.56', p. ej. str(float)) se lee como float común.
+    Lo que no se puede convertir queda en `default` (None → NaN).
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        out = s.astype(float)
+    else:
+        codes, uniq = pd.factorize(s)
+        conv = np.array([_text_amount(u) for u in uniq] + [np.nan], dtype=float)
+        out = pd.Series(conv[codes], index=s.index)  # código -1 (NaN/None) → último: NaN
+    return out if default is None else out.fillna(default)
+
+
+def _date_keys(values) -> pd.Series:
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    return s.where(s.notna(), "").astype(str).str.strip()
+
+
+def _date_memo(keys: pd.Series, inferred_year=None, formats=DATE_FORMATS, dayfirst_fallback=False) -> pd.Series:
+    """Parsea cada valor ÚNICO una sola vez: índice = texto, valor = Timestamp/NaT."""
+    uniq = pd.Index(keys.unique())
+    memo = pd.Series(pd.NaT, index=uniq, dtype="datetime64[ns]")
+    pending = uniq[uniq != ""]
+
+    for fmt in formats:
+        if not len(pending):
+            break
+        got = pd.to_datetime(pd.Series(pending, index=pending), format=fmt, errors="coerce").dropna()
+        memo[got.index] = got
+        pending = pending.difference(got.index)
+
+    # caso dd/mm → completar con año inferido o actual
+    if len(pending):
+        dm = pending[pending.str.fullmatch(r"\d{1,2}/\d{1,2}")]
+        if len(dm):
+            year = int(inferred_year or datetime.now().year)
+            got = pd.to_datetime(pd.Series(dm + f"/{year}", index=dm), format="%d/%m/%Y", errors="coerce").dropna()
+            memo[got.index] = got
+            pending = pending.difference(got.index)
+
+    if len(pending) and dayfirst_fallback:
+        got = pd.to_datetime(pd.Series(pending, index=pending), dayfirst=True, format="mixed", errors="coerce").dropna()
+        memo[got.index] = got
+
+    return memo
+
+
+def parse_dates(values, inferred_year=None) -> pd.Series:
+    """Columna de fechas en cualquiera de los formatos conocidos → datetime64 (NaT si no se reconoce)."""
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return s
+    keys = _date_keys(s)
+    memo = _date_memo(keys, inferred_year, DATE_FORMATS + ISO_FORMATS, dayfirst_fallback=True)
+    return pd.to_datetime(keys.map(memo))
+
+
+def dates_to_iso(values, inferred_year=None) -> pd.Series:
+    """Versión vectorizada de BaseParser.normalize_date: YYYY-MM-DD o el texto original si falla."""
+    keys = _date_keys(values)
+    memo = _date_memo(keys, inferred_year)
+    iso = memo.dt.strftime("%Y-%m-%d")
+    failed = iso.isna() & (iso.index != "")
+    for raw in iso.index[failed]:
+        logger.warning(f"No se pudo normalizar fecha: {raw}")
+    iso = iso.where(~failed, iso.index.to_series()).fillna("")
+    return keys.map(iso)
+
+
+@lru_cache(maxsize=8192)
+def _normalize_date_cached(date_str: str, inferred_year) -> str:
+    return dates_to_iso([date_str], inferred_year).iat[0]
+
+
+# ---------------------------------------------------------------------
+# Armado columnar de la salida de los parsers
+# ---------------------------------------------------------------------
+AMOUNT_COLUMNS = ("debito", "credito", "saldo")
+# mes/año numéricos: NaN en las filas sin fecha (saldos)
+NUMERIC_COLUMNS = AMOUNT_COLUMNS + ("mes", "año")
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAT_DAYS = np.iinfo(np.int32).min
+_NAN = float("nan")
+
+
+def _to_days(value) -> int:
+    """datetime/date/texto → días desde 1970-01-01 (_NAT_DAYS si no es fecha)."""
+    if isinstance(value, (datetime, date)):
+        return value.toordinal() - _EPOCH_ORDINAL
+    if not isinstance(value, str) or not value.strip():
+        return _NAT_DAYS
+    text = value.strip()
+    for fmt in ISO_FORMATS + DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).toordinal() - _EPOCH_ORDINAL
+        except ValueError:
+            continue
+    return _NAT_DAYS
+
+
+class TransactionBuilder:
+    """
+    Acumula movimientos columna por columna y arma el DataFrame al final.
+
+    - Importes, mes y año (`float_columns`): buffer float64.
+    - Fechas: buffer int32 de días desde 1970 → datetime64 (NaT si no se reconoce).
+    - Resto (detalle, referencia, moneda...): strings internados, cada texto
+      distinto se guarda una sola vez y cada fila lleva un código int32.
+
+    El saldo anterior va a la cabeza (set_head) y el saldo final a la cola
+    (set_tail) sin concatenar frames: la fila 0 queda reservada para la cabeza
+    y si no se usa se descarta con un slice. Las columnas numéricas se entregan
+    sin copiar los buffers.
+
+        builder = TransactionBuilder(["fecha", "detalle", "referencia", "debito", "credito", "saldo"])
+        builder.add(fecha="2025-03-02", detalle="TRF", debito=100.0, saldo=900.0)
+        builder.set_head(detalle="SALDO ANTERIOR", saldo=1000.0)
+        df = builder.build()
+    """
+
+    def __init__(self, columns, float_columns=NUMERIC_COLUMNS, date_columns=("fecha",)):
+        self.columns = list(columns)
+        self._floats = {c: array("d") for c in self.columns if c in float_columns}
+        self._dates = {c: array("i") for c in self.columns if c in date_columns}
+        self._codes = {c: array("i") for c in self.columns if c not in self._floats and c not in self._dates}
+        self._slots = [
+            (c, "f", self._floats[c]) if c in self._floats
+            else (c, "d", self._dates[c]) if c in self._dates
+            else (c, "s", self._codes[c])
+            for c in self.columns
+        ]
+        self._interned = {c: {} for c in self._codes}
+        self._strings = {c: [] for c in self._codes}
+        self._day_memo = {}
+        self._rows = 0
+        self._has_head = False
+        self._tail = None
+        self._built = False
+        self._append({})  # fila 0 reservada para set_head
+
+    def __len__(self) -> int:
+        return self._rows - 1
+
+    @property
+    def has_head(self) -> bool:
+        return self._has_head
+
+    @property
+    def has_tail(self) -> bool:
+        return self._tail is not None
+
+    def add(self, **values) -> None:
+        """Agrega un movimiento; las columnas omitidas quedan vacías (NaN / NaT / "")."""
+        self._check_open()
+        self._append(values)
+
+    def set_head(self, **values) -> None:
+        """Fila fija al principio (saldo anterior). Si se llama de nuevo, la reemplaza."""
+        self._check_open()
+        self._write(0, values)
+        self._has_head = True
+
+    def set_tail(self, **values) -> None:
+        """Fila fija al final (saldo final). Si se llama de nuevo, la reemplaza."""
+        self._check_open()
+        self._tail = values
+
+    def append_text(self, column: str, text: str, sep: str = " ") -> None:
+        """Concatena texto a la última fila agregada (detalle que sigue en otra línea)."""
+        self._check_open()
+        if not len(self):
+            raise IndexError("No hay filas a las que agregar texto")
+        codes = self._codes[column]
+        codes[-1] = self._intern(column, self._strings[column][codes[-1]] + sep + text)
+
+    def build(self, sort_by: str = None) -> pd.DataFrame:
+        """
+        Arma el DataFrame. Con `sort_by` (columna de fecha o numérica) ordena
+        solo los movimientos, de forma estable; cabeza y cola quedan fijas.
+        """
+        self._check_open()
+        if self._tail is not None:
+            self._append(self._tail)
+        self._built = True
+
+        start = 0 if self._has_head else 1
+        n = self._rows
+        order = None
+        if sort_by is not None:
+            key = self._column_array(sort_by)
+            body_end = n - 1 if self._tail is not None else n
+            body = np.arange(1, body_end)
+            body = body[np.argsort(key[1:body_end], kind="stable")]
+            order = np.concatenate([np.arange(start, 1), body, np.arange(body_end, n)])
+
+        data = {}
+        for col in self.columns:
+            values = self._column_array(col)
+            data[col] = values[order] if order is not None else values[start:]
+        return pd.DataFrame(data, columns=self.columns, copy=False)
+
+    # ---------- internos ----------
+
+    def _check_open(self) -> None:
+        if self._built:
+            raise RuntimeError("TransactionBuilder ya fue usado: crear uno nuevo por extracto")
+
+    def _append(self, values) -> None:
+        get = values.get
+        for col, kind, buf in self._slots:
+            value = get(col)
+            if kind == "f":
+                buf.append(_NAN if value is None else float(value))
+            elif kind == "d":
+                buf.append(self._days(value))
+            else:
+                buf.append(self._intern(col, "" if value is None else value))
+        self._rows += 1
+
+    def _write(self, i: int, values) -> None:
+        get = values.get
+        for col, kind, buf in self._slots:
+            value = get(col)
+            if kind == "f":
+                buf[i] = _NAN if value is None else float(value)
+            elif kind == "d":
+                buf[i] = self._days(value)
+            else:
+                buf[i] = self._intern(col, "" if value is None else value)
+
+    def _days(self, value) -> int:
+        if isinstance(value, str):
+            days = self._day_memo.get(value)
+            if days is None:
+                days = self._day_memo[value] = _to_days(value)
+            return days
+        return _to_days(value)
+
+    def _intern(self, col: str, value) -> int:
+        table = self._interned[col]
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(table)
+            self._strings[col].append(value)
+        return code
+
+    def _column_array(self, col: str) -> np.ndarray:
+        if col in self._floats:
+            return np.frombuffer(self._floats[col], dtype=np.float64)
+        if col in self._dates:
+            days = np.frombuffer(self._dates[col], dtype=np.int32)
+            valid = days != _NAT_DAYS
+            out = np.full(len(days), np.datetime64("NaT"), dtype="datetime64[ns]")
+            out[valid] = days[valid].astype("datetime64[D]")
+            return out
+        uniques = np.empty(len(self._strings[col]), dtype=object)
+        uniques[:] = self._strings[col]
+        return uniques[np.frombuffer(self._codes[col], dtype=np.int32)]
+
+
 class BaseParser:
     """
     Clase base para todos los parsers de bancos.
@@ -27,28 +326,8 @@ class BaseParser:
         if not date_str:
             return ""
 
-        date_str = str(date_str).strip()
-        formats = ["%d/%m/%Y", "%d/%m/%y", "%Y/%m/%d", "%d-%m-%Y", "%d-%m-%y"]
-
-        for fmt in formats:
-            try:
-                dt = datetime.strptime(date_str, fmt)
-                return dt.strftime("%Y-%m-%d")
-            except Exception:
-                continue
-
-        # caso dd/mm → completar con año inferido o actual
-        if "/" in date_str and len(date_str.split("/")) == 2:
-            day, month = date_str.split("/")
-            year = inferred_year or datetime.now().year
-            try:
-                dt = datetime(year=int(year), month=int(month), day=int(day))
-                return dt.strftime("%Y-%m-%d")
-            except Exception:
-                pass
-
-        logger.warning(f"No se pudo normalizar fecha: {date_str}")
-        return date_str
+        # Memo por valor: los extractos repiten las mismas fechas cientos de veces
+        return _normalize_date_cached(str(date_str).strip(), inferred_year)
 
     def finalize(self, df: pd.DataFrame) -> pd.DataFrame:
         """Normaliza salida: columnas obligatorias y tipos de datos."""
@@ -57,11 +336,11 @@ class BaseParser:
                 df[col] = ""
 
         for col in ["debito", "credito", "saldo"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+            df[col] = amounts_to_float(df[col])
 
         if "fecha" in df.columns:
             try:
-                parsed_dates = pd.to_datetime(df["fecha"], errors="coerce", dayfirst=True)
+                parsed_dates = parse_dates(df["fecha"])
                 df["año"] = parsed_dates.dt.year.fillna(df["año"])
                 df["mes"] = parsed_dates.dt.month.fillna(df["mes"])
             except Exception:
@@ -69,8 +348,11 @@ class BaseParser:
 
         return df[self.REQUIRED_COLUMNS]
 
-    def _infer_year(self, text: str = '', filename: str = '') -> int:
+    def _infer_year(self, text: str = '', filename: str = '', context=None) -> int:
         # Infers statement year using reader (if present) and textual heuristics.
+        # With a StatementContext (ParserInput.context) the document was already scanned.
+        if context is not None:
+            return context.year or datetime.now().year
         reader = getattr(self, 'reader', None)
         if reader:
             infer = getattr(reader, 'infer_year_from_text', None)
@@ -3,7 +3,8 @@ import re
 from typing import List, Dict
 import pandas as pd
 import logging
-from datetime import datetime
+from parsers.base_parser import parse_dates
+from parsers.strict_base import KeywordSet, tokenize_line
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,17 @@ class BBVAParser:
         "BBVA FRANCES",
         "BBVA ARGENTINA"
     ]
+
+    # Fin de la sección de movimientos (sobre la línea en minúsculas)
+    SECTION_END_KEYWORDS = KeywordSet(
+        'saldo al ', 'total movimientos', 'impuesto a los débitos',
+        'transferencias', 'débitos automáticos', 'recibidas',
+        'enviadas', 'otros productos', 'legales'
+    )
+    HEADER_KEYWORDS = KeywordSet(
+        'fecha', 'origen', 'concepto', 'débito', 'crédito', 'saldo',
+        'clave bancaria', 'responsable inscripto'
+    )
     
     def detect(self, text: str, filename: str = "") -> bool:
         haystack = f"{text} {filename}".upper()
@@ -41,10 +53,6 @@ class BBVAParser:
         in_movements_section = False
         saldo_anterior = None
         
-        # Patrones
-        DATE_PATTERN = re.compile(r'^(\d{2}/\d{2})\s+')
-        AMOUNT_PATTERN = re.compile(r'-?\d{1,3}(?:\.\d{3})*,\d{2}')
-        
         for line in lines:
             if not line or len(line.strip()) < 5:
                 continue
@@ -57,11 +65,7 @@ class BBVAParser:
                 continue
             
             # Detectar fin de sección de movimientos
-            if in_movements_section and any(end in lower for end in [
-                'saldo al ', 'total movimientos', 'impuesto a los débitos',
-                'transferencias', 'débitos automáticos', 'recibidas',
-                'enviadas', 'otros productos', 'legales'
-            ]):
+            if in_movements_section and self.SECTION_END_KEYWORDS.search(lower):
                 in_movements_section = False
                 continue
             
@@ -70,17 +74,14 @@ class BBVAParser:
                 continue
             
             # Saltar headers
-            if any(skip in lower for skip in [
-                'fecha', 'origen', 'concepto', 'débito', 'crédito', 'saldo',
-                'clave bancaria', 'responsable inscripto'
-            ]):
+            if self.HEADER_KEYWORDS.search(lower):
                 continue
             
             # Capturar Saldo Anterior
+            toks = tokenize_line(line)
             if 'saldo anterior' in lower:
-                amounts = AMOUNT_PATTERN.findall(line)
-                if amounts:
-                    saldo_anterior = self._parse_amount(amounts[-1])
+                if toks.amounts:
+                    saldo_anterior = toks.amounts[-1].value
                     rows.append({
                         'fecha': None,
                         'concepto': 'SALDO ANTERIOR',
@@ -91,22 +92,21 @@ class BBVAParser:
                     })
                 continue
             
-            # Detectar fecha al inicio
-            date_match = DATE_PATTERN.match(line)
-            if not date_match:
+            # Detectar fecha DD/MM al inicio
+            date_tok = toks.leading_date
+            if (not date_tok or date_tok.year or date_tok.sep != '/'
+                    or len(date_tok.day) != 2 or len(date_tok.month) != 2):
                 continue
             
-            fecha_str = date_match.group(1)
-            rest_of_line = line[date_match.end():].strip()
+            fecha_str = date_tok.text
             
             # Extraer montos
-            amounts = AMOUNT_PATTERN.findall(rest_of_line)
+            amounts = [a.value for a in toks.amounts]
             if not amounts:
                 continue
             
             # Extraer concepto (todo antes del primer monto)
-            first_amount_pos = rest_of_line.find(amounts[0])
-            concepto_raw = rest_of_line[:first_amount_pos].strip()
+            concepto_raw = line[date_tok.end:toks.first_amount_pos].strip()
             
             # Limpiar origen "D" si está al inicio
             if concepto_raw.startswith('D '):
@@ -121,23 +121,20 @@ class BBVAParser:
             saldo = None
             
             if len(amounts) == 1:
-                monto = self._parse_amount(amounts[0])
+                monto = amounts[0]
                 if monto < 0:
                     debito = abs(monto)
                 else:
                     credito = monto
             elif len(amounts) == 2:
-                monto1 = self._parse_amount(amounts[0])
-                saldo = self._parse_amount(amounts[1])
+                monto1, saldo = amounts
                 
                 if monto1 < 0:
                     debito = abs(monto1)
                 else:
                     credito = monto1
             elif len(amounts) >= 3:
-                val1 = self._parse_amount(amounts[0])
-                val2 = self._parse_amount(amounts[1])
-                saldo = self._parse_amount(amounts[2])
+                val1, val2, saldo = amounts[:3]
                 
                 if val1 < 0:
                     debito = abs(val1)
@@ -166,24 +163,6 @@ class BBVAParser:
         refs = re.findall(r'\b\d{6,10}\b', text)
         return refs[0] if refs else ''
     
-    def _parse_amount(self, amount_str: str) -> float:
-        """Convierte monto a float."""
-        try:
-            clean = amount_str.replace('.', '').replace(',', '.')
-            return float(clean)
-        except:
-            return 0.0
-    
-    def _parse_date(self, date_str: str) -> tuple:
-        """Convierte DD/MM a (fecha_completa, mes, año)."""
-        try:
-            day, month = date_str.split('/')
-            current_year = datetime.now().year
-            fecha = f"{day}/{month}/{current_year}"
-            return fecha, int(month), current_year
-        except:
-            return date_str, None, None
-    
     def _to_dataframe(self, rows: List[Dict]) -> pd.DataFrame:
         """Convierte a DataFrame."""
         if not rows:
@@ -194,10 +173,11 @@ class BBVAParser:
         
         df = pd.DataFrame(rows)
         
-        df[['fecha', 'mes', 'año']] = df.apply(
-            lambda row: self._parse_date(row['fecha']) if row['fecha'] else (None, None, None),
-            axis=1, result_type='expand'
-        )
+        # DD/MM sin año → año actual (una conversión por fecha distinta)
+        fechas = parse_dates(df['fecha'])
+        df['fecha'] = fechas.dt.strftime('%d/%m/%Y').where(fechas.notna(), None)
+        df['mes'] = fechas.dt.month
+        df['año'] = fechas.dt.year
         
         df.rename(columns={'concepto': 'detalle'}, inplace=True)
         
@@ -2,10 +2,15 @@
 import logging
 import re
 import unicodedata
-from .base_parser import BaseParser
+from .base_parser import BaseParser, dates_to_iso
+from .strict_base import KeywordSet
 
 logger = logging.getLogger(__name__)
 
+TABLE_HEADER_WORDS = KeywordSet("FECHA", "DEBITO", "CREDITO", "SALDO", "DESCRIPCION", "COMPROBANTE")
+SKIP_LINE_WORDS = KeywordSet("FECHA DESCRIPCION", "TOTAL", "SALDO ANTERIOR", "PAGINA", "FOLIO", "====")
+CREDIT_WORDS = KeywordSet("ACRED", "TRANSF", "DEPOSITO", "INGRESO")
+
 def _norm(s: str) -> str:
     if s is None:
         return ""
@@ -55,7 +60,7 @@ class BPNParser(BaseParser):
         if all(isinstance(c, int) for c in df.columns):
             first = df.iloc[0].astype(str).tolist()
             norm_first = [_norm(x) for x in first]
-            if any(x in " ".join(norm_first) for x in ["FECHA", "DEBITO", "CREDITO", "SALDO", "DESCRIPCION", "COMPROBANTE"]):
+            if TABLE_HEADER_WORDS.search(" ".join(norm_first)):
                 df = df.copy()
                 df.columns = [
                     str(c) if str(c).strip() != "" else f"COL{idx}"
@@ -95,9 +100,10 @@ class BPNParser(BaseParser):
         out = pd.DataFrame()
         out["fecha"] = df[c_fecha].astype(str) if c_fecha in df.columns else ""
         out["detalle"] = df[c_desc].astype(str) if c_desc in df.columns else ""
-        out["debito"] = df[c_debito].apply(self._to_amount) if c_debito in df.columns else 0.0
-        out["credito"] = df[c_credit].apply(self._to_amount) if c_credit in df.columns else 0.0
-        out["saldo"] = df[c_saldo].apply(self._to_amount) if c_saldo in df.columns else 0.0
+        # Importes crudos: finalize() los convierte por columna
+        out["debito"] = df[c_debito] if c_debito in df.columns else 0.0
+        out["credito"] = df[c_credit] if c_credit in df.columns else 0.0
+        out["saldo"] = df[c_saldo] if c_saldo in df.columns else 0.0
         out["referencia"] = ""
         return out
 
@@ -114,7 +120,7 @@ class BPNParser(BaseParser):
             if not s:
                 continue
             S = s.upper()
-            if any(k in S for k in ["FECHA DESCRIPCION", "TOTAL", "SALDO ANTERIOR", "PAGINA", "FOLIO", "===="]):
+            if SKIP_LINE_WORDS.search(S):
                 continue
 
             m = pat.match(s)
@@ -123,26 +129,27 @@ class BPNParser(BaseParser):
 
             g = m.groupdict()
             detalle = g["detalle"].strip()
-            val1 = self._to_amount(g["val1"])
-            val2 = self._to_amount(g["val2"])
-
-            if any(w in detalle.upper() for w in ["ACRED", "TRANSF", "DEPOSITO", "INGRESO"]):
-                debito = 0.0
-                credito = val1
+            if CREDIT_WORDS.search(detalle.upper()):
+                debito = ""
+                credito = g["val1"]
             else:
-                debito = val1
-                credito = 0.0
+                debito = g["val1"]
+                credito = ""
 
             rows.append({
-                "fecha": self.normalize_date(g["fecha"]),
+                "fecha": g["fecha"],
                 "detalle": detalle,
                 "referencia": "",
                 "debito": debito,
                 "credito": credito,
-                "saldo": val2
+                "saldo": g["val2"]
             })
 
-        return pd.DataFrame(rows)
+        if not rows:
+            return pd.DataFrame(columns=self.REQUIRED_COLUMNS)
+        df = pd.DataFrame(rows)
+        df["fecha"] = dates_to_iso(df["fecha"])
+        return self.finalize(df)
 
     def _to_amount(self, val) -> float:
         """Convierte montos tipo '4.218,60' en float 4218.60"""
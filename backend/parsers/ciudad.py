@@ -3,18 +3,30 @@ import re
 from typing import List, Dict, Optional
 import pandas as pd
 import logging
-from datetime import datetime
+from parsers.base_parser import parse_dates
+from parsers.strict_base import KeywordSet, tokenize_line
 
 logger = logging.getLogger(__name__)
 
 class CiudadParser:
     BANK_NAME = "CIUDAD"
     PREFER_TABLES = False  # Ciudad viene mejor en texto
+    # Movimientos de una sola línea: se puede parsear por páginas en paralelo
+    PAGE_LOCAL = True
+    PAGE_OPENING_ROW = ("SALDO ANTERIOR", "last")
     DETECTION_KEYWORDS = [
         "BANCO CIUDAD", 
         "BANCO CIUDAD DE BUENOS AIRES",
         "RESUMEN DE CUENTA DOCUMENTACION COMERCIAL"
     ]
+
+    # Headers y footers (sobre la línea en minúsculas)
+    SKIP_KEYWORDS = KeywordSet(
+        'fecha concepto', 'debito credito saldo',
+        'descripcion de movimiento', 'hoja nro',
+        'cuit:', 'domicilio:', 'iva responsable'
+    )
+    DEBIT_KEYWORDS = KeywordSet('comision', 'debito', 'retencion', 'impuesto', 'iva')
     
     # Meses en español
     MESES = {
@@ -22,6 +34,7 @@ class CiudadParser:
         'MAY': 5, 'JUN': 6, 'JUL': 7, 'AGO': 8,
         'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12
     }
+    MONTH_NAME_RE = re.compile(r'-([A-Z]{3})[A-Z]*-')
     
     def detect(self, text: str, filename: str = "") -> bool:
         haystack = f"{text} {filename}".upper()
@@ -48,8 +61,6 @@ class CiudadParser:
         saldo_anterior = None
         
         # Patrones
-        DATE_PATTERN = re.compile(r'\b(\d{1,2}-[A-Z]{3}-\d{4})\b', re.I)
-        AMOUNT_PATTERN = re.compile(r'\d{1,3}(?:\.\d{3})*,\d{2}')
         SALDO_ANTERIOR_PATTERN = re.compile(r'SALDO\s+ANTERIOR', re.I)
         SALDO_FINAL_PATTERN = re.compile(r'SALDO\s+AL\s+\d{1,2}', re.I)
         
@@ -57,41 +68,35 @@ class CiudadParser:
             if not line or len(line.strip()) < 5:
                 continue
             
+            toks = tokenize_line(line)
+
             # Capturar SALDO ANTERIOR
             if SALDO_ANTERIOR_PATTERN.search(line):
-                amounts = AMOUNT_PATTERN.findall(line)
-                if amounts:
-                    saldo_anterior = self._parse_amount(amounts[-1])
+                if toks.amounts:
+                    saldo_anterior = toks.amounts[-1].magnitude
                 continue
             
             # Saltar líneas de headers y footers
             lower = line.lower()
-            if any(skip in lower for skip in [
-                'fecha concepto', 'debito credito saldo', 
-                'descripcion de movimiento', 'hoja nro',
-                'cuit:', 'domicilio:', 'iva responsable'
-            ]):
+            if self.SKIP_KEYWORDS.search(lower):
                 continue
             
-            # Buscar fecha (indica transacción)
-            date_match = DATE_PATTERN.search(line)
-            if not date_match:
+            # Buscar fecha DD-MMM-YYYY (indica transacción)
+            date_tok = next((d for d in toks.dates if d.month.isalpha() and d.year and len(d.year) == 4), None)
+            if not date_tok:
                 continue
             
-            fecha_str = date_match.group(1)
-            fecha = self._normalize_date(fecha_str)
+            fecha = date_tok.text  # DD-MMM-YYYY, se normaliza por columna en _to_dataframe
             
-            # Extraer montos
-            amounts_str = AMOUNT_PATTERN.findall(line)
-            if not amounts_str:
+            # Extraer montos (sin signo)
+            if not toks.amounts:
                 continue
             
-            amounts = [self._parse_amount(a) for a in amounts_str]
+            amounts = [a.magnitude for a in toks.amounts]
             
             # Extraer detalle (entre fecha y primer monto)
-            fecha_end = line.find(fecha_str) + len(fecha_str)
-            first_amount_pos = line.find(amounts_str[0])
-            detalle = line[fecha_end:first_amount_pos].strip() if first_amount_pos > fecha_end else ""
+            first_amount_pos = toks.first_amount_pos
+            detalle = line[date_tok.end:first_amount_pos].strip() if first_amount_pos > date_tok.end else ""
             
             # Clasificar montos según estructura Ciudad
             row = self._categorize_ciudad(fecha, detalle, amounts)
@@ -136,8 +141,7 @@ class CiudadParser:
             # Determinar si es débito o crédito por contexto
             lower = detalle.lower()
             
-            debit_keywords = ['comision', 'debito', 'retencion', 'impuesto', 'iva']
-            is_debit = any(kw in lower for kw in debit_keywords)
+            is_debit = self.DEBIT_KEYWORDS.search(lower)
             
             if is_debit:
                 debito = abs(amounts[0])
@@ -161,52 +165,6 @@ class CiudadParser:
             'saldo': saldo
         }
     
-    def _normalize_date(self, date_str: str) -> str:
-        """
-        Normaliza fecha de formato DD-MMM-YYYY a DD/MM/YYYY.
-        Ejemplo: 28-FEB-2025 → 28/02/2025
-        """
-        if not date_str:
-            return ""
-        
-        try:
-            # Parsear formato DD-MMM-YYYY
-            parts = date_str.split('-')
-            if len(parts) != 3:
-                return date_str
-            
-            day = int(parts[0])
-            month_str = parts[1].upper()
-            year = int(parts[2])
-            
-            # Convertir mes
-            month = self.MESES.get(month_str[:3])
-            if not month:
-                return date_str
-            
-            # Crear fecha
-            dt = datetime(year, month, day)
-            return dt.strftime('%d/%m/%Y')
-        
-        except:
-            return date_str
-    
-    def _parse_amount(self, amount_str: str) -> float:
-        """Convierte string de monto a float."""
-        if not amount_str:
-            return 0.0
-        
-        try:
-            clean = amount_str.strip().replace('.', '').replace(',', '.')
-            
-            # Detectar negativos con sufijo (27.556,64-)
-            if clean.endswith('-'):
-                clean = '-' + clean[:-1]
-            
-            return float(clean)
-        except:
-            return 0.0
-    
     def _to_dataframe(self, rows: List[Dict]) -> pd.DataFrame:
         """Convierte a DataFrame final."""
         if not rows:
@@ -214,19 +172,15 @@ class CiudadParser:
         
         df = pd.DataFrame(rows)
         
-        # Agregar mes y año
-        def extract_date_parts(fecha_str):
-            if not fecha_str:
-                return 0, 0
-            try:
-                dt = datetime.strptime(fecha_str, '%d/%m/%Y')
-                return dt.month, dt.year
-            except:
-                return 0, 0
-        
-        df[['mes', 'año']] = df['fecha'].apply(
-            lambda x: pd.Series(extract_date_parts(x))
+        # DD-MMM-YYYY → DD/MM/YYYY (28-FEB-2025 → 28/02/2025) y mes/año;
+        # parse_dates convierte cada fecha distinta una sola vez
+        numeric = df['fecha'].str.upper().str.replace(
+            self.MONTH_NAME_RE, lambda m: f"/{self.MESES.get(m.group(1), 0):02d}/", regex=True
         )
+        fechas = parse_dates(numeric)
+        df['fecha'] = fechas.dt.strftime('%d/%m/%Y').where(fechas.notna(), df['fecha'])
+        df['mes'] = fechas.dt.month.fillna(0).astype(int)
+        df['año'] = fechas.dt.year.fillna(0).astype(int)
         
         # Orden final
         return df[['fecha', 'mes', 'año', 'detalle', 'referencia', 'debito', 'credito', 'saldo']]
\ No newline at end of file
@@ -1,6 +1,9 @@
 ﻿import re
 import pandas as pd
 from datetime import datetime
+from parsers.base_parser import TransactionBuilder
+from parsers.strict_base import KeywordSet, tokenize_line
+from utils.debug_capture import dbg, debug_enabled
 
 class ComafiParser:
     """Parser limpio para Banco Comafi - elimina información no pertinente y saldos repetidos"""
@@ -8,6 +11,38 @@ class ComafiParser:
     BANK_NAME = "COMAFI"
     DETECTION_KEYWORDS = ["COMAFI"]
 
+    # FIN del bloque válido (cambio de sección / producto)
+    BLOCK_END = KeywordSet(
+        "IMPUESTOS DEBITADOS EN EL PERIODO",
+        "IMPUESTOS DEBITADOS EN EL PERÍODO",
+        "CUENTA CORRIENTE ESPECIAL",
+        "COMAFI EMPRESAS CLASSIC CUENTA CORRIENTE ESPECIAL",
+        "CUENTA CORRIENTE ESPECIAL EN DOLARES",
+        "CUENTA CORRIENTE ESPECIAL EN DÓLARES",
+        "TRANSFERENCIAS ELECTRONICAS",
+        "TRANSFERENCIAS ELECTRÓNICAS",
+    )
+    # Basura evidente dentro del bloque
+    GARBAGE = KeywordSet(
+        "SE RUEGA FORMULAR", "LOS DEPOSITOS EN PESOS", "LOS DEPÓSITOS EN PESOS",
+        "LEY 26.361", "CIRCULAR OPASI", "BENEFICIOS FISCALES",
+        "BASE IMPONIBLE", "TOTAL AL:", "NRO.", "NÚMERO", "CBU:",
+        "SIN MOVIMIENTOS"
+    )
+    # Clasificación forzada
+    FORCE_DEBIT = KeywordSet(
+        "IMPUESTO", "IVA", "PERCEPCION", "PERCEPCIÓN", "DEBITO", "DÉBITO",
+        "SERVICIO", "TASA", "CANON", "LEASING", "MANTENIMIENTO", "COMISION",
+        "COMISIÓN", "COBRO DE CANON"
+    )
+    FORCE_CREDIT = KeywordSet(
+        "TRANSFERENCIA RECIBIDA", "SERVICIOS Y SOLUCIONES",
+        "ACREDITACION", "ACREDITACIÓN", "DEPOSITO", "DEPÓSITO",
+        "DEVOLUCION", "DEVOLUCIÓN"
+    )
+    LEASING_HINTS = KeywordSet("COBRO DE CANON", "LEASING", "CANON LEAS")
+    NO_MOVEMENT = KeywordSet("SIN MOVIMIENTOS", "CAPTADOS A TASA")
+
     def detect(self, text: str, filename: str = "") -> bool:
         return "COMAFI" in f"{text} {filename}".upper()
 
@@ -26,10 +61,8 @@ class ComafiParser:
         lines = [re.sub(r"\s{2,}", " ", l.strip()) for l in lines if l and str(l).strip()]
 
         # 🔎 DEBUG: dump de líneas crudas ya limpias
-        print("\n===== DEBUG COMAFI RAW LINES =====")
-        for i, l in enumerate(lines):
-            print(f"{i:02d}: {repr(l)}")
-        print("==================================\n")
+        if debug_enabled():
+            dbg("comafi", "RAW LINES:\n%s", self._numbered(lines))
 
         # -------------------------------------------------------
         # 1) Recorte del bloque de movimientos correcto (PESOS)
@@ -51,34 +84,23 @@ class ComafiParser:
                     continue
 
             # FIN del bloque válido (cambio de sección / producto)
-            if any(pat in up for pat in [
-                "IMPUESTOS DEBITADOS EN EL PERIODO",
-                "IMPUESTOS DEBITADOS EN EL PERÍODO",
-                "CUENTA CORRIENTE ESPECIAL",
-                "COMAFI EMPRESAS CLASSIC CUENTA CORRIENTE ESPECIAL",
-                "CUENTA CORRIENTE ESPECIAL EN DOLARES",
-                "CUENTA CORRIENTE ESPECIAL EN DÓLARES",
-                "TRANSFERENCIAS ELECTRONICAS",
-                "TRANSFERENCIAS ELECTRÓNICAS",
-            ]):
+            fin = self.BLOCK_END.find(up)
+            if fin:
+                dbg("comafi", "Fin de bloque por %r", fin)
                 en_bloque = False
                 bloque_pesos_cerrado = True
                 continue
 
             # Filtrar basura evidente dentro del bloque
-            if any(x in up for x in [
-                "SE RUEGA FORMULAR", "LOS DEPOSITOS EN PESOS", "LOS DEPÓSITOS EN PESOS",
-                "LEY 26.361", "CIRCULAR OPASI", "BENEFICIOS FISCALES",
-                "BASE IMPONIBLE", "TOTAL AL:", "NRO.", "NÚMERO", "CBU:",
-                "SIN MOVIMIENTOS"
-            ]):
+            if self.GARBAGE.search(up):
                 continue
 
             # Criterios de inclusión al bloque de movimientos
-            tiene_fecha = bool(re.search(r"\d{2}/\d{2}/\d{2,4}", line))
+            toks = tokenize_line(line)
+            tiene_fecha = any(t.sep == "/" and t.year for t in toks.dates)
             es_saldo = "SALDO" in up
-            tiene_referencia_larga = bool(re.search(r"\b\d{10,}\b", line))
-            tiene_monto = bool(re.search(r"\d{1,3}(?:\.\d{3})*,\d{2}", line))
+            tiene_referencia_larga = any(len(r.text) >= 10 for r in toks.refs)
+            tiene_monto = bool(toks.amounts)
             subdetalle_keyword = bool(re.match(r"^\s*(SERVICIOS|INTEL|SOLUCIONES|Y\s+SOLUCIONES)\b", line, re.IGNORECASE))
 
             if not (tiene_fecha or es_saldo or tiene_referencia_larga or tiene_monto or subdetalle_keyword):
@@ -87,10 +109,8 @@ class ComafiParser:
             movimientos.append(line)
 
         # 🔎 DEBUG: qué quedó como movimiento
-        print("\n===== DEBUG MOVIMIENTOS DETECTADOS =====")
-        for i, l in enumerate(movimientos):
-            print(f"{i:02d}: {repr(l)}")
-        print("========================================\n")
+        if debug_enabled():
+            dbg("comafi", "MOVIMIENTOS DETECTADOS:\n%s", self._numbered(movimientos))
 
         if not movimientos:
             # No hay nada que parsear
@@ -136,27 +156,16 @@ class ComafiParser:
         movimientos = movimientos_unidos
 
         # 🔎 DEBUG: movimientos luego de unir sublíneas
-        print("\n===== DEBUG MOVIMIENTOS UNIDOS =====")
-        for i, l in enumerate(movimientos):
-            print(f"{i:02d}: {repr(l)}")
-        print("====================================\n")
-
-        # Diccionarios de clasificación forzada
-        FORCE_DEBIT = [
-            "IMPUESTO", "IVA", "PERCEPCION", "PERCEPCIÓN", "DEBITO", "DÉBITO",
-            "SERVICIO", "TASA", "CANON", "LEASING", "MANTENIMIENTO", "COMISION", 
-            "COMISIÓN", "COBRO DE CANON"
-        ]
-        FORCE_CREDIT = [
-            "TRANSFERENCIA RECIBIDA", "SERVICIOS Y SOLUCIONES",
-            "ACREDITACION", "ACREDITACIÓN", "DEPOSITO", "DEPÓSITO", 
-            "DEVOLUCION", "DEVOLUCIÓN"
-        ]
+        if debug_enabled():
+            dbg("comafi", "MOVIMIENTOS UNIDOS:\n%s", self._numbered(movimientos))
 
         # -------------------------------------------------------
         # 3) Parseo línea a línea
         # -------------------------------------------------------
-        data = []
+        # Saldo Anterior (si existe) → movimientos por fecha → Saldo Final (si existe)
+        builder = TransactionBuilder(
+            ["fecha", "detalle", "referencia", "debito", "credito", "saldo", "mes", "año", "moneda"]
+        )
         saldo_anterior_agregado = False
         saldo_final_agregado = False
 
@@ -165,23 +174,17 @@ class ComafiParser:
             fecha = self._extract_fecha(line)
             
             # Extraer montos (ya normalizados)
-            montos_raw = re.findall(r"(\d{1,3}(?:\.\d{3})*,\d{2})", line)
-            montos = [self._to_float(m) for m in montos_raw]
-
-            # Detalle limpio (sin montos ni fecha)
-            detalle = line
-            for m in montos_raw:
-                detalle = detalle.replace(m, "")
-            detalle = re.sub(r"\d{2}/\d{2}/\d{2,4}", "", detalle)
-            detalle = re.sub(r"\s{2,}", " ", detalle).strip()
+            toks = tokenize_line(line)
+            montos = [a.magnitude for a in toks.amounts]
 
             # Referencia larga (10+ dígitos)
-            referencia = ""
-            ref_match = re.search(r"\b(\d{10,})\b", detalle)
-            if ref_match:
-                referencia = ref_match.group(1)
-                detalle = re.sub(r"\b" + re.escape(referencia) + r"\b", "", detalle).strip()
-                detalle = re.sub(r"\s{2,}", " ", detalle).strip()
+            refs_largas = [r for r in toks.refs if len(r.text) >= 10]
+            referencia = refs_largas[0].text if refs_largas else ""
+
+            # Detalle limpio (sin montos, fecha ni referencia)
+            detalle = toks.without("date", "amount")
+            if referencia:
+                detalle = " ".join(w for w in detalle.split() if w != referencia)
 
             up = detalle.upper()
 
@@ -195,8 +198,8 @@ class ComafiParser:
                 es_saldo_fin = True
 
             # Clasificación forzada (débito vs crédito)
-            es_deb = any(k in up for k in FORCE_DEBIT)
-            es_cre = any(k in up for k in FORCE_CREDIT)
+            es_deb = self.FORCE_DEBIT.search(up)
+            es_cre = self.FORCE_CREDIT.search(up)
             if es_deb and es_cre:
                 # Si dice "Transferencia recibida", priorizar crédito
                 if "TRANSFERENCIA RECIBIDA" in up:
@@ -255,7 +258,7 @@ class ComafiParser:
                         deb = imp
                     else:
                         # Heurísticas adicionales
-                        if any(x in up for x in ["COBRO DE CANON", "LEASING", "CANON LEAS"]):
+                        if self.LEASING_HINTS.search(up):
                             deb = imp
                         elif "SERVICIOS Y SOLUCIONES" in up:
                             cre = imp
@@ -270,90 +273,61 @@ class ComafiParser:
             # Validaciones finales
             if not detalle or len(detalle) < 3:
                 continue
-            if any(x in up for x in ["SIN MOVIMIENTOS", "CAPTADOS A TASA"]):
+            if self.NO_MOVEMENT.search(up):
                 continue
 
-            data.append({
-                "fecha": fecha,
-                "detalle": detalle.strip(),
-                "referencia": referencia,
-                "debito": round(deb, 2),
-                "credito": round(cre, 2),
-                "saldo": round(sal, 2),
-                "mes": fecha.month if fecha else None,
-                "año": fecha.year if fecha else None,
-                "moneda": "ARS",
-            })
-
-        df = pd.DataFrame(data)
+            row = dict(
+                fecha=fecha,
+                detalle=detalle.strip(),
+                referencia=referencia,
+                debito=round(deb, 2),
+                credito=round(cre, 2),
+                saldo=round(sal, 2),
+                mes=fecha.month if fecha else None,
+                año=fecha.year if fecha else None,
+                moneda="ARS",
+            )
+            tipo = row["detalle"].upper()
+            if tipo == "SALDO ANTERIOR":
+                if not builder.has_head:
+                    builder.set_head(**row)
+            elif tipo == "SALDO FINAL":
+                if not builder.has_tail:
+                    builder.set_tail(**row)
+            elif fecha:
+                builder.add(**row)
+
+        df = builder.build(sort_by="fecha")
         if df.empty:
             return df
 
         # Eliminar duplicados exactos (por seguridad)
         df = df.drop_duplicates(subset=["detalle", "fecha", "debito", "credito", "saldo"], keep='first')
+        df = df.reset_index(drop=True)
 
-        # Ordenar por fecha (solo las que tienen fecha)
-        df_sin_fecha = df[df['fecha'].isna()].copy()
-        df_con_fecha = df[df['fecha'].notna()].copy()
-        if not df_con_fecha.empty:
-            df_con_fecha = df_con_fecha.sort_values('fecha').reset_index(drop=True)
-
-        # Reconstruir: Saldo Anterior (si existe) + movimientos + Saldo Final (si existe)
-        frames = []
-        saldo_ant = df_sin_fecha[df_sin_fecha['detalle'].str.upper() == 'SALDO ANTERIOR']
-        saldo_fin = df_sin_fecha[df_sin_fecha['detalle'].str.upper() == 'SALDO FINAL']
-
-        if not saldo_ant.empty:
-            frames.append(saldo_ant.iloc[[0]])
-        if not df_con_fecha.empty:
-            frames.append(df_con_fecha)
-        if not saldo_fin.empty:
-            frames.append(saldo_fin.iloc[[0]])
-
-        if frames:
-            df = pd.concat(frames, ignore_index=True)
-
-        # 🔎 DEBUG: DF final
-        print("\n===== DEBUG DATAFRAME FINAL =====")
-        try:
-            print(df.to_string())
-        except Exception:
-            print(df.head())
-        print("=================================\n")
-
-        # -------------------------------------------------------
-        # Validaciones inline (casos de prueba)
-        # -------------------------------------------------------
-        print("\n===== VALIDACIONES =====")
-        
-        # 1. Verificar que no hay montos en detalle
-        for idx, row in df.iterrows():
-            if re.search(r"\d{1,3}(?:\.\d{3})*,\d{2}", str(row['detalle'])):
-                print(f"⚠️  Fila {idx}: monto en detalle: {row['detalle']}")
-        
-        # 2. Verificar saldos únicos
-        saldo_ant_count = len(df[df['detalle'].str.upper() == 'SALDO ANTERIOR'])
-        saldo_fin_count = len(df[df['detalle'].str.upper() == 'SALDO FINAL'])
-        print(f"✓ Saldo Anterior: {saldo_ant_count} (esperado: 1)")
-        print(f"✓ Saldo Final: {saldo_fin_count} (esperado: 1)")
-        
-        # 3. Verificar casos específicos
-        transferencia = df[df['detalle'].str.contains('SERVICIOS Y SOLUCIONES', case=False, na=False)]
-        if not transferencia.empty:
-            t = transferencia.iloc[0]
-            print(f"✓ Transferencia: credito={t['credito']} (esperado: 1300000.00)")
-        
-        comision = df[df['detalle'].str.contains('Comisión Mantenimiento', case=False, na=False)]
-        if not comision.empty:
-            c = comision.iloc[0]
-            print(f"✓ Comisión: debito={c['debito']} (esperado: 49082.00)")
-        
-        print("========================\n")
+        if debug_enabled():
+            self._debug_dataframe(df)
 
         return df
 
     # --------------------- Helpers ---------------------
 
+    def _numbered(self, lines) -> str:
+        return "\n".join(f"{i:02d}: {l!r}" for i, l in enumerate(lines))
+
+    def _debug_dataframe(self, df: pd.DataFrame) -> None:
+        """DF final + validaciones (solo con captura de debug activa)."""
+        dbg("comafi", "DATAFRAME FINAL:\n%s", df.to_string())
+
+        detalle = df["detalle"].astype(str)
+        con_monto = detalle[detalle.str.contains(r"\d{1,3}(?:\.\d{3})*,\d{2}", regex=True)]
+        for idx, d in con_monto.items():
+            dbg("comafi", "⚠️ Fila %s: monto en detalle: %s", idx, d)
+
+        upper = detalle.str.upper()
+        dbg("comafi", "Saldo Anterior: %d (esperado: 1) | Saldo Final: %d (esperado: 1)",
+            (upper == "SALDO ANTERIOR").sum(), (upper == "SALDO FINAL").sum())
+
     def _normalize_numbers(self, line: str) -> str:
         """
         Normaliza espacios en números para que el OCR ruidoso no afecte la extracción.
@@ -378,19 +352,12 @@ class ComafiParser:
 
     def _extract_fecha(self, line):
         """Extrae fecha en formato dd/mm/yy o dd/mm/yyyy"""
-        f = re.search(r"(\d{2}/\d{2}/\d{2,4})", line)
+        f = next((t for t in tokenize_line(line).dates if t.sep == "/" and t.year), None)
         if not f:
             return None
         for fmt in ("%d/%m/%Y", "%d/%m/%y"):
             try:
-                return datetime.strptime(f.group(1), fmt)
+                return datetime.strptime(f.text, fmt)
             except:
                 continue
         return None
-
-    def _to_float(self, t: str) -> float:
-        """Convierte string con formato argentino a float"""
-        try:
-            return float(t.replace(".", "").replace(",", "."))
-        except:
-            return 0.0
\ No newline at end of file
@@ -4,7 +4,7 @@ Galicia Parser v4
 -----------------
 - Fuerza preprocessor (aunque reciba lista OCR)
 - Segmenta sin “inventar”: fecha / detalle / debito / credito / saldo
-- Mantiene logs de conteo y deja debugs del preprocessor en /app/debug_galicia
+- Mantiene logs de conteo; los debugs del preprocessor van a la captura del job (utils.debug_capture)
 """
 
 import os
@@ -12,6 +12,7 @@ import re
 import logging
 import pandas as pd
 from typing import Union, List
+from .base_parser import amounts_to_float
 from .galicia_preprocessor import preprocess_galicia_ocr
 
 
@@ -111,4 +112,7 @@ class GaliciaParser:
         logger.info(f"[GALICIA v4] Filas totales: {len(lines)} | Segmentadas: {segmented} | Sin parsear: {failed}")
 
         df = pd.DataFrame(parsed_rows, columns=["fecha", "detalle", "debito", "credito", "saldo"])
+        # Importes a float por columna (cada texto distinto se convierte una vez); vacío → NaN
+        for col in ["debito", "credito", "saldo"]:
+            df[col] = amounts_to_float(df[col], default=None)
         return df
@@ -11,32 +11,22 @@ import re
 import logging
 import pandas as pd
 
+from parsers.base_parser import amounts_to_float, parse_dates
+
 logger = logging.getLogger(__name__)
 
 AMOUNT_RE = re.compile(r"-?\d{1,3}(?:[ .]\d{3})*,\d{2}")
 DATE_RE = re.compile(r"\b\d{2}/\d{2}/\d{2,4}\b")
 
-def _clean_amount(val: str) -> float:
-    """Convierte string tipo '1.234.567,89' o '- 3 000,00' a float (-3000.00)"""
-    if not val or not isinstance(val, str):
-        return None
-    s = val.strip().replace(" ", "").replace(".", "").replace(",", ".")
-    try:
-        return float(s)
-    except ValueError:
-        return None
-
-def _clean_date(val: str):
-    """Devuelve fecha como datetime.date (o string limpio si falla)"""
-    if not val or not isinstance(val, str):
-        return None
-    m = DATE_RE.search(val)
-    if not m:
-        return None
-    try:
-        return pd.to_datetime(m.group(), dayfirst=True, errors="coerce").date()
-    except Exception:
-        return val
+def _clean_amounts(col: pd.Series) -> pd.Series:
+    """Convierte strings tipo '1.234.567,89' o '- 3 000,00' a float (-3000.00); vacío → NaN"""
+    return amounts_to_float(col, default=None)
+
+def _clean_dates(col: pd.Series) -> pd.Series:
+    """Devuelve fechas como datetime.date (None si la celda no tiene una fecha dd/mm/aa[aa])"""
+    raw = col.astype("string").str.extract(f"({DATE_RE.pattern})", expand=False)
+    parsed = parse_dates(raw.astype(object))
+    return parsed.dt.date.astype(object).where(parsed.notna(), None)
 
 def clean_galicia_df(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -61,11 +51,11 @@ def clean_galicia_df(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     # --- Parseo de fechas ---
-    df["fecha"] = df["fecha"].apply(_clean_date)
+    df["fecha"] = _clean_dates(df["fecha"])
 
     # --- Conversión de importes ---
     for col in ["debito", "credito", "saldo"]:
-        df[col] = df[col].apply(_clean_amount)
+        df[col] = _clean_amounts(df[col])
 
     # --- Eliminación de filas vacías o ruido puro ---
     df = df[
@@ -3,7 +3,9 @@
 
 import re
 import pandas as pd
-from parsers.base_parser import BaseParser
+from parsers.base_parser import BaseParser, TransactionBuilder
+from parsers.parser_input import ParserInput
+from parsers.strict_base import KeywordSet
 import logging
 from datetime import datetime
 
@@ -21,6 +23,34 @@ class HSBCParser(BaseParser):
         'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12,
     }
 
+    # Headers y footers (cierran el detalle abierto)
+    NOISE_KEYWORDS = KeywordSet(
+        "FECHA REFERENCIA NRO",
+        "DETALLE DE OPERACIONES",
+        "HOJA",
+        "DE 18",
+        "3960568-A",
+        "ATENCION AL CLIENTE",
+        "HSBC BANK ARGENTINA",
+        "BOUCHARD 557",
+        "DETALLE DE IMPUESTOS",
+        "DETALLE DE CUOTAS",
+        "REGIMEN DE GARANTIAS",
+        "FONDOS COMUNES",
+        "DEBITOS AUTOMATICOS",
+        "LEY 2709",
+        "PRESTAMOS PRENDARIOS",
+        "CUENTAS SUELDO",
+        "REFINANCIACION",
+        "ACLARACIONES:",
+        "CFT ",
+        "TNA ",
+    )
+    # No se pegan al detalle abierto
+    FOOTER_KEYWORDS = KeywordSet("HOJA", "DETALLE DE", "PAGINA")
+    DEBIT_KEYWORDS = KeywordSet("DEBITO", "DB ", "N/D", "TRANSF. ENTRE CUENTAS")
+    CREDIT_KEYWORDS = KeywordSet("INTERBANKING", "TRANSF.CAJ.AUTOM", "TEF DATANET")
+
     def detect(self, text: str, filename: str = "") -> bool:
         haystack = f"{text} {filename}".upper()
         return any(kw in haystack for kw in self.DETECTION_KEYWORDS)
@@ -28,27 +58,18 @@ class HSBCParser(BaseParser):
     def parse(self, raw_data, filename="") -> pd.DataFrame:
         """Parser para HSBC con fechas DD-MMM"""
         
-        # Extraer líneas del diccionario
-        if isinstance(raw_data, dict):
-            lines = raw_data.get("text_lines_raw", [])
-            if not lines:
-                lines = raw_data.get("text_lines", [])
-        elif isinstance(raw_data, list):
-            lines = raw_data
-        else:
-            lines = str(raw_data).splitlines()
+        lines = ParserInput.coerce(raw_data, filename)
 
         logger.info(f"📄 Iniciando parse de {len(lines)} líneas")
 
-        # Inferir año
-        full_text = "\n".join(lines)
-        year = self._infer_year(full_text, filename)
+        # Año del pre-pass del documento
+        year = self._infer_year(filename=filename, context=lines.context)
         logger.info(f"📅 Año inferido: {year}")
 
-        rows = []
+        builder = TransactionBuilder(self.REQUIRED_COLUMNS)
         saldo_anterior = None
         saldo_final = None
-        current_detail = None
+        detalle_abierto = False
 
         # Regex para fecha: DD-MMM (con guion)
         date_pattern = re.compile(r"^(\d{2}-[A-Z]{3})\s+-\s+(.+)$", re.I)
@@ -108,46 +129,25 @@ class HSBCParser(BaseParser):
 
             # Saltar headers y footers MÁS ESTRICTO
             line_upper = line.upper()
-            if any(x in line_upper for x in [
-                "FECHA REFERENCIA NRO",
-                "DETALLE DE OPERACIONES",
-                "HOJA",
-                "DE 18",
-                "3960568-A",
-                "ATENCION AL CLIENTE",
-                "HSBC BANK ARGENTINA",
-                "BOUCHARD 557",
-                "DETALLE DE IMPUESTOS",
-                "DETALLE DE CUOTAS",
-                "REGIMEN DE GARANTIAS",
-                "FONDOS COMUNES",
-                "DEBITOS AUTOMATICOS",
-                "LEY 2709",
-                "PRESTAMOS PRENDARIOS",
-                "CUENTAS SUELDO",
-                "REFINANCIACION",
-                "ACLARACIONES:",
-                "CFT ",
-                "TNA ",
-            ]):
-                current_detail = None  # Resetear detalle al encontrar footer
+            if self.NOISE_KEYWORDS.search(line_upper):
+                detalle_abierto = False  # Resetear detalle al encontrar footer
                 continue
 
             # Buscar línea con fecha
             match = date_pattern.match(line)
             if not match:
                 # Continuación de detalle: SOLO si hay detalle abierto Y no es basura
-                if current_detail is not None:
+                if detalle_abierto:
                     # NO agregar si tiene muchos montos (es otra transacción)
                     if len(amount_pattern.findall(line)) > 0:
                         continue
                     # NO agregar si es muy larga o tiene palabras clave de footer
-                    if len(line) > 150 or any(x in line_upper for x in ["HOJA", "DETALLE DE", "PAGINA"]):
+                    if len(line) > 150 or self.FOOTER_KEYWORDS.search(line_upper):
                         continue
                     # Agregar máximo 50 caracteres extra
                     extra = line[:50].strip()
                     if len(extra) > 3:
-                        current_detail["detalle"] += " " + extra
+                        builder.append_text("detalle", extra)
                 continue
 
             fecha_str = match.group(1)
@@ -184,9 +184,9 @@ class HSBCParser(BaseParser):
             
             # Heurística mejorada
             resto_upper = resto.upper()
-            if any(kw in resto_upper for kw in ["DEBITO", "DB ", "N/D", "TRANSF. ENTRE CUENTAS"]):
+            if self.DEBIT_KEYWORDS.search(resto_upper):
                 debito = monto
-            elif any(kw in resto_upper for kw in ["INTERBANKING", "TRANSF.CAJ.AUTOM", "TEF DATANET"]):
+            elif self.CREDIT_KEYWORDS.search(resto_upper):
                 credito = monto
             else:
                 # Fallback: asumir crédito
@@ -204,46 +204,25 @@ class HSBCParser(BaseParser):
             detalle = re.sub(r"^\s*-\s*", "", detalle_temp)
             detalle = re.sub(r"\s+", " ", detalle).strip()
 
-            current_detail = {
-                "fecha": fecha,
-                "detalle": detalle,
-                "referencia": referencia,
-                "debito": debito,
-                "credito": credito,
-                "saldo": saldo,
-            }
-            
-            rows.append(current_detail)
-
-            if len(rows) % 50 == 0:
-                logger.info(f"✨ Procesadas {len(rows)} transacciones")
+            builder.add(
+                fecha=fecha,
+                detalle=detalle,
+                referencia=referencia,
+                debito=debito,
+                credito=credito,
+                saldo=saldo,
+            )
+            detalle_abierto = True
 
-        logger.info(f"✅ Total extraído: {len(rows)} transacciones")
+            if len(builder) % 50 == 0:
+                logger.info(f"✨ Procesadas {len(builder)} transacciones")
 
-        # Crear DataFrame
-        df = pd.DataFrame(rows, columns=self.REQUIRED_COLUMNS)
+        logger.info(f"✅ Total extraído: {len(builder)} transacciones")
 
-        # Agregar saldos
-        extras = []
+        # Saldos fijos al principio y al final
         if saldo_anterior is not None:
-            extras.append({
-                "fecha": "", "detalle": "SALDO ANTERIOR", "referencia": "",
-                "debito": 0.0, "credito": 0.0, "saldo": saldo_anterior
-            })
-
-        if extras:
-            df = pd.concat([
-                pd.DataFrame(extras, columns=self.REQUIRED_COLUMNS),
-                df
-            ], ignore_index=True)
-
+            builder.set_head(detalle="SALDO ANTERIOR", debito=0.0, credito=0.0, saldo=saldo_anterior)
         if saldo_final is not None:
-            df = pd.concat([
-                df,
-                pd.DataFrame([{
-                    "fecha": "", "detalle": "SALDO FINAL", "referencia": "",
-                    "debito": 0.0, "credito": 0.0, "saldo": saldo_final
-                }], columns=self.REQUIRED_COLUMNS)
-            ], ignore_index=True)
-
-        return self.finalize(df)
\ No newline at end of file
+            builder.set_tail(detalle="SALDO FINAL", debito=0.0, credito=0.0, saldo=saldo_final)
+
+        return self.finalize(builder.build())
\ No newline at end of file
@@ -1,6 +1,9 @@
 ﻿import re
 import pandas as pd
 from datetime import datetime
+from parsers.base_parser import TransactionBuilder
+from parsers.strict_base import KeywordSet, tokenize_line
+from utils.debug_capture import dbg, debug_enabled
 
 class MacroParser:
     """
@@ -14,22 +17,32 @@ class MacroParser:
     BANK_NAME = "MACRO"
     DETECTION_KEYWORDS = ["MACRO"]
 
-    CREDIT_HINTS = (
+    CREDIT_HINTS = KeywordSet(
         "N/C", "ACRED", "ACREDIT", "DEPOSITO", "DEPOSITO CANJE", "CR ",
         "PRISMA", "LIQ COMER", "TRANSFERENCIA", "TRANSF", "MACRONLINE", "MACROLINE",
         "CCERR", "VAR VARIOS"
     )
-    DEBIT_HINTS = (
+    DEBIT_HINTS = KeywordSet(
         "N/D", "DEBITO", "DB ", "DBCR", "RETENCION", "SIRCREB", "IMPUESTO",
         "COMISION", "MANTENIMIENTO", "IVA", "SELLOS", "PAGO DE CHEQUE"
     )
-    NOISE_PATTERNS = (
+    NOISE_PATTERNS = KeywordSet(
         "TOTAL COBRADO DEL IMP", "IIBB SIRCREB", "D. 409/2018", "IMPUESTO LEY",
         "S.E.U.O.", "Casa Central", "Hoja Nro", "Información de su/s Cuenta/s",
         "Desde el 01/", "______"
     )
+    SECTION_HEADERS = KeywordSet(
+        "CUENTA CORRIENTE", "CLAVE BANCARIA", "DETALLE DE MOVIMIENTO",
+        "PERIODO DEL EXTRACTO", "SALDOS CONSOLIDADOS", "TIPO CUENTA", "SUCURSAL", "MONEDA"
+    )
+    SKIP_PATTERNS = NOISE_PATTERNS + SECTION_HEADERS
     ID_CREDITO_RE = re.compile(r"\b5730\d{4,}\b")
-    AMOUNT_RE = re.compile(r"(-?\d{1,3}(?:\.\d{3})*,\d{2})")
+    COLUMNS = ["fecha", "detalle", "referencia", "debito", "credito", "saldo", "mes", "año", "moneda"]
+
+    # Movimientos de una sola línea: se puede parsear por páginas en paralelo
+    PAGE_LOCAL = True
+    PAGE_OPENING_ROW = ("Saldo Anterior", "first")
+    PAGE_CLOSING_ROW = ("Saldo Final", "last")
 
     def detect(self, text: str, filename: str = "") -> bool:
         return "MACRO" in f"{text} {filename}".upper()
@@ -46,46 +59,38 @@ class MacroParser:
             lines = []
 
         lines = [re.sub(r"\s{2,}", " ", l.strip()) for l in lines if l.strip()]
-        data, seq = [], 0
-        saldo_anterior, saldo_final = None, None
+        # Orden final: primer Saldo Anterior → movimientos → último Saldo Final
+        builder = TransactionBuilder(self.COLUMNS)
 
         for line in lines:
             upper = line.upper()
-            if any(x in upper for x in self.NOISE_PATTERNS):
-                continue
             if upper.startswith("*") or upper.startswith("- - -"):
                 continue
-            if any(x in upper for x in [
-                "CUENTA CORRIENTE", "CLAVE BANCARIA", "DETALLE DE MOVIMIENTO",
-                "PERIODO DEL EXTRACTO", "SALDOS CONSOLIDADOS", "TIPO CUENTA", "SUCURSAL", "MONEDA"
-            ]):
+            if self.SKIP_PATTERNS.search(upper):
                 continue
 
             # --- saldos ---
             if "SALDO ULTIMO EXTRACTO" in upper or "SALDO ANTERIOR" in upper:
-                saldo_anterior = self._last_amount(line)
-                data.append(self._saldo_row("Saldo Anterior", saldo_anterior, seq))
-                seq += 1
+                if not builder.has_head:
+                    builder.set_head(**self._saldo_row("Saldo Anterior", self._last_amount(line)))
                 continue
 
             if "SALDO FINAL" in upper or "SALDO AL" in upper:
-                saldo_final = self._last_amount(line)
-                data.append(self._saldo_row("Saldo Final", saldo_final, seq))
-                seq += 1
+                builder.set_tail(**self._saldo_row("Saldo Final", self._last_amount(line)))
                 continue
 
             # --- movimientos ---
-            f_match = re.search(r"(\d{2}/\d{2}/\d{2,4})", line)
-            if not f_match:
+            toks = tokenize_line(line)
+            f_tok = next((d for d in toks.dates if d.sep == "/" and d.year), None)
+            if not f_tok:
                 continue
-            fecha = self._parse_date(f_match.group(1))
+            fecha = self._parse_date(f_tok.text)
             if not fecha:
                 continue
 
-            amts_raw = self.AMOUNT_RE.findall(line)
-            if not amts_raw:
+            if not toks.amounts:
                 continue
-            amts = [self._to_float(a) for a in amts_raw]
+            amts = [a.value for a in toks.amounts]
 
             deb, cre, sal = 0.0, 0.0, 0.0
             if len(amts) >= 3:
@@ -93,8 +98,8 @@ class MacroParser:
             elif len(amts) == 2:
                 mov, sal = amts
                 up = upper
-                looks_credit = any(h in up for h in self.CREDIT_HINTS) or bool(self.ID_CREDITO_RE.search(line))
-                looks_debit = any(h in up for h in self.DEBIT_HINTS)
+                looks_credit = self.CREDIT_HINTS.search(up) or bool(self.ID_CREDITO_RE.search(line))
+                looks_debit = self.DEBIT_HINTS.search(up)
                 if "N/D DBCR" in up:
                     deb = mov
                 elif "PRISMA" in up or "LIQ COMER" in up:
@@ -111,56 +116,31 @@ class MacroParser:
             else:
                 sal = amts[0]
 
-            detalle = re.sub(r"\d{2}/\d{2}/\d{2,4}", "", line)
-            for a in amts_raw:
-                detalle = detalle.replace(a, "")
-            detalle = re.sub(r"\s{2,}", " ", detalle).strip()
+            detalle = toks.without("date", "amount")
 
             ref = ""
-            ref_match = re.search(r"\s(\d{6,})\s*$", detalle)
-            if ref_match:
-                ref = ref_match.group(1)
-                detalle = detalle[:ref_match.start()].strip()
-
-            data.append({
-                "fecha": fecha, "detalle": detalle, "referencia": ref,
-                "debito": round(deb, 2), "credito": round(cre, 2), "saldo": round(sal, 2),
-                "mes": fecha.month, "año": fecha.year, "moneda": "ARS", "__seq": seq
-            })
-            seq += 1
-
-        df = pd.DataFrame(data)
-        if df.empty:
-            print("⚠️ No se detectaron movimientos")
-            return df
-
-        # --- orden final ---
-        saldo_ant = df[df["detalle"] == "Saldo Anterior"].copy()
-        saldo_fin = df[df["detalle"] == "Saldo Final"].copy()
-        otros = df[~df["detalle"].isin(["Saldo Anterior", "Saldo Final"])].copy()
-
-        if "__seq" in df.columns:
-            saldo_ant = saldo_ant.sort_values("__seq")
-            saldo_fin = saldo_fin.sort_values("__seq")
-            otros = otros.sort_values("__seq")
-
-        frames = []
-        if not saldo_ant.empty:
-            frames.append(saldo_ant.iloc[[0]])
-        if not otros.empty:
-            frames.append(otros)
-        if not saldo_fin.empty:
-            frames.append(saldo_fin.iloc[[-1]])
-
-        df = pd.concat(frames, ignore_index=True)
-        df["__order"] = range(len(df))
-        df = df.sort_values("__order").drop(columns="__order", errors="ignore").reset_index(drop=True)
-
-        print(f"[DEBUG] Filas finales: {len(df)} | Débitos: {sum(df['debito']>0)} | Créditos: {sum(df['credito']>0)}")
+            last = detalle.rsplit(" ", 1)
+            if len(last) == 2 and last[1].isdigit() and len(last[1]) >= 6:
+                ref = last[1]
+                detalle = last[0].strip()
+
+            builder.add(
+                fecha=fecha, detalle=detalle, referencia=ref,
+                debito=round(deb, 2), credito=round(cre, 2), saldo=round(sal, 2),
+                mes=fecha.month, año=fecha.year, moneda="ARS",
+            )
+
+        if not len(builder) and not builder.has_head and not builder.has_tail:
+            dbg("macro", "No se detectaron movimientos")
+        df = builder.build()
+
+        if debug_enabled():
+            dbg("macro", "Filas finales: %d | Débitos: %d | Créditos: %d",
+                len(df), (df["debito"] > 0).sum(), (df["credito"] > 0).sum())
         return df
 
     # --- helpers ---
-    def _saldo_row(self, tipo, valor, seq):
+    def _saldo_row(self, tipo, valor):
         fake_date = None
         if tipo == "Saldo Anterior":
             fake_date = datetime(1900, 1, 1)
@@ -176,7 +156,6 @@ class MacroParser:
             "mes": None,
             "año": None,
             "moneda": "ARS",
-            "__seq": seq
         }
 
     def _parse_date(self, txt):
@@ -187,20 +166,12 @@ class MacroParser:
                 pass
         return None
 
-    def _to_float(self, txt: str) -> float:
-        try:
-            txt = txt.strip().replace("–", "-").replace("−", "-").replace("—", "-")
-            txt = re.sub(r"^[^\d-]+", "", txt)
-            return float(txt.replace(".", "").replace(",", "."))
-        except:
-            return 0.0
-
     def _last_amount(self, line: str) -> float:
-        clean = line.replace("–", "-").replace("−", "-").replace("—", "-")
-        amts = self.AMOUNT_RE.findall(clean)
-        if not amts:
+        toks = tokenize_line(line)
+        if not toks.amounts:
             return 0.0
-        val = self._to_float(amts[-1])
+        val = toks.amounts[-1].value
+        clean = toks.line
         if "SALDO" in clean.upper() and "-" in clean and val > 0:
             return -abs(val)
         return val
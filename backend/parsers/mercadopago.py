@@ -1,6 +1,13 @@
 import re
 import pandas as pd
 from datetime import datetime
+from parsers.strict_base import KeywordSet
+
+# Palabras que definen el signo del valor
+SALIDA_KEYWORDS = KeywordSet("PAGO", "COMPRA", "EXTRACCION", "ENVIADA", "ENVIA", "SALIDA")
+ENTRADA_KEYWORDS = KeywordSet(
+    "TRANSFERENCIA RECIBIDA", "ACREDITACION", "ENTRADA", "RENDIMIENTOS", "CARGA SALDO", "INGRESO"
+)
 
 
 class MercadoPagoParser:
@@ -57,9 +64,9 @@ class MercadoPagoParser:
 
             # 🔹 Determinar signo automáticamente según palabras
             txt_upper = line.upper()
-            if any(p in txt_upper for p in ["PAGO", "COMPRA", "EXTRACCION", "ENVIADA", "ENVIA", "SALIDA"]):
+            if SALIDA_KEYWORDS.search(txt_upper):
                 valor = -abs(valor)
-            elif any(p in txt_upper for p in ["TRANSFERENCIA RECIBIDA", "ACREDITACION", "ENTRADA", "RENDIMIENTOS", "CARGA SALDO", "INGRESO"]):
+            elif ENTRADA_KEYWORDS.search(txt_upper):
                 valor = abs(valor)
 
             # 🔹 Limpiar detalle
@@ -85,8 +92,8 @@ class MercadoPagoParser:
         df = pd.DataFrame(movimientos)
 
         # 🔹 Crear columnas de débito / crédito a partir del valor
-        df["debito"] = df["valor"].apply(lambda x: abs(x) if x < 0 else 0.0)
-        df["credito"] = df["valor"].apply(lambda x: x if x > 0 else 0.0)
+        df["debito"] = (-df["valor"]).clip(lower=0.0)
+        df["credito"] = df["valor"].clip(lower=0.0)
         df["mes"] = df["fecha"].dt.month
         df["año"] = df["fecha"].dt.year
 
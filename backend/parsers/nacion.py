@@ -1,11 +1,30 @@
 import re
 import pandas as pd
 from typing import List, Dict
+from parsers.base_parser import parse_dates
+from parsers.strict_base import KeywordSet, tokenize_line
 
 class NacionParser:
     BANK_NAME = "NACION"
     DETECTION_KEYWORDS = ["NACION", "BANCO DE LA NACION", "BANCO NACION"]
 
+    # Basura, encabezados y totales no deseados (sobre la línea en minúsculas)
+    SKIP_KEYWORDS = KeywordSet(
+        "fecha concepto", "resumen de cuenta", "hoja:",
+        "total imp", "total ley", "información sobre su cuenta",
+        "transporte", "saldo anterior", "saldo final",
+        "movimientos del período", "total grav", "total reg rec", "del mes de",
+    )
+    # Créditos reales
+    CREDIT_KEYWORDS = KeywordSet("S/CRED", "CREDITO", "ACRED", "TRANSF", "DEPOSITO")
+    # Débitos reales
+    DEBIT_KEYWORDS = KeywordSet(
+        "S/DEB", "DEBITO", "DEB.", "COMISION", "RETENCION",
+        "GRAVAMEN", "IMPUESTO", "IVA", "I.V.A", "VARIOS", "PAGO",
+        "GASTO", "INTERES", "INGRESOS BRUTOS", "I.V.A. BASE", "COMIS.", "COMPENSACION",
+        "COMISION"
+    )
+
     def detect(self, text: str, filename: str = "") -> bool:
         return any(k in f"{text} {filename}".upper() for k in self.DETECTION_KEYWORDS)
 
@@ -14,6 +33,10 @@ class NacionParser:
         df = pd.DataFrame(movimientos)
         if df.empty:
             raise ValueError("No se detectaron movimientos válidos en el PDF de Nación.")
+        # mes/año desde la fecha (una conversión por fecha distinta; saldos sin fecha → NaN)
+        fechas = parse_dates(df["fecha"])
+        df["mes"] = fechas.dt.month
+        df["año"] = fechas.dt.year
         return df
 
     # ---------------------------------------------------------
@@ -21,7 +44,6 @@ class NacionParser:
     def _parse_movimientos(self, lines: List[str]) -> List[Dict]:
         rows = []
         fecha_actual = None
-        DATE_PATTERN = re.compile(r"\b(\d{2})/(\d{2})/(\d{2,4})\b")
 
         for raw in lines:
             line = raw.strip()
@@ -30,18 +52,17 @@ class NacionParser:
             low = line.lower()
 
             # Filtrar basura, encabezados y totales no deseados
-            if any(x in low for x in [
-                "fecha concepto", "resumen de cuenta", "hoja:",
-                "total imp", "total ley", "información sobre su cuenta",
-                "transporte", "saldo anterior", "saldo final",
-                "movimientos del período", "total grav", "total reg rec", "del mes de",
-            ]):
+            if self.SKIP_KEYWORDS.search(low):
                 continue
 
             # Detectar fecha
-            date_match = DATE_PATTERN.search(line)
+            toks = tokenize_line(line)
+            date_match = next(
+                (t for t in toks.dates if t.sep == "/" and t.year and len(t.day) == 2 and len(t.month) == 2),
+                None,
+            )
             if date_match:
-                d, m, y = date_match.groups()
+                d, m, y = date_match.day, date_match.month, date_match.year
                 if len(y) == 2:
                     y = f"20{y}"
                 fecha_actual = f"{d}/{m}/{y}"
@@ -50,23 +71,20 @@ class NacionParser:
                 continue
 
             # Detectar montos
-            amounts_raw = re.findall(r"\d{1,3}(?:\.\d{3})*,\d{2}-?", line)
-            if not amounts_raw:
+            if not toks.amounts:
                 continue
 
-            importe_txt = amounts_raw[0]
-            saldo_txt = amounts_raw[-1]
-            importe = self._to_float(importe_txt)
-            saldo = self._to_float(saldo_txt)
+            importe_tok = toks.amounts[0]
+            importe = importe_tok.magnitude
+            saldo = toks.amounts[-1].magnitude
 
             # Detectar referencia
             ref_match = re.search(r"\b\d{3,10}\b", line)
             referencia = ref_match.group(0) if ref_match else ""
 
             # Detalle (entre fecha y primer monto)
-            start_det = date_match.end() if date_match else 0
-            end_det = line.find(importe_txt)
-            detalle = line[start_det:end_det].strip()
+            start_det = date_match.end if date_match else 0
+            detalle = line[start_det:importe_tok.start].strip()
             detalle = re.sub(r"\s+", " ", detalle)
 
             # Clasificación robusta
@@ -77,8 +95,8 @@ class NacionParser:
             elif tipo == "CREDITO":
                 credito = abs(importe)
             else:
-                debito = abs(importe) if importe_txt.endswith("-") else 0.0
-                credito = abs(importe) if not importe_txt.endswith("-") else 0.0
+                debito = abs(importe) if importe_tok.trail else 0.0
+                credito = abs(importe) if not importe_tok.trail else 0.0
 
             # Descartar filas sin texto real
             if len(detalle) < 5 or detalle == "$":
@@ -105,41 +123,28 @@ class NacionParser:
 
     # ---------------------------------------------------------
 
-    def _to_float(self, txt: str) -> float:
-        return float(txt.replace(".", "").replace(",", ".").replace("-", "")) if txt else 0.0
-
     def _extract_saldo_inicial(self, lines: List[str]) -> float:
         for l in lines[:25]:
             if "saldo" in l.lower() and "anterior" in l.lower():
-                m = re.search(r"\d{1,3}(?:\.\d{3})*,\d{2}", l)
-                if m:
-                    return self._to_float(m.group(0))
+                amounts = tokenize_line(l).amounts
+                if amounts:
+                    return amounts[0].magnitude
         return 0.0
 
     def _extract_saldo_final(self, lines: List[str]) -> float:
         for l in reversed(lines):
             if "saldo" in l.lower() and "final" in l.lower():
-                m = re.search(r"\d{1,3}(?:\.\d{3})*,\d{2}", l)
-                if m:
-                    return self._to_float(m.group(0))
+                amounts = tokenize_line(l).amounts
+                if amounts:
+                    return amounts[0].magnitude
         return 0.0
 
     def _clasificar(self, detalle: str) -> str:
         d = detalle.upper()
 
-        # Créditos reales
-        credit_kw = ["S/CRED", "CREDITO", "ACRED", "TRANSF", "DEPOSITO"]
-        # Débitos reales
-        debit_kw = [
-            "S/DEB", "DEBITO", "DEB.", "COMISION", "RETENCION",
-            "GRAVAMEN", "IMPUESTO", "IVA", "I.V.A", "VARIOS", "PAGO",
-            "GASTO", "INTERES", "INGRESOS BRUTOS", "I.V.A. BASE", "COMIS.", "COMPENSACION",
-            "COMISION"
-        ]
-
         # Excepciones: GRAVAMEN / INGRESOS BRUTOS se toman SIEMPRE como débito
-        if any(k in d for k in debit_kw):
+        if self.DEBIT_KEYWORDS.search(d):
             return "DEBITO"
-        if any(k in d for k in credit_kw) and not any(x in d for x in debit_kw):
+        if self.CREDIT_KEYWORDS.search(d):
             return "CREDITO"
         return ""
\ No newline at end of file
@@ -0,0 +1,93 @@
+# parsers/parser_input.py
+"""
+Entrada común para los parsers.
+
+ParserInput es una lista de líneas (los parsers de texto la siguen iterando
+como siempre) que además lleva la ruta del PDF y expone las tablas de Camelot
+por flavor ("lattice" / "stream"). Las tablas se extraen recién cuando alguien
+las pide y quedan cacheadas: cada PDF se lee con Camelot a lo sumo una vez por
+flavor, lo compartan el extractor y el parser.
+
+También lleva el StatementContext (año, período, moneda, cuenta y saldos),
+calculado en una sola pasada sobre las líneas la primera vez que se pide, y el
+índice de la primera línea de cada página (page_starts) cuando se conoce.
+
+Cada parser declara qué representación necesita:
+
+    PARSER_INPUT = "lines"     # default: solo líneas de texto
+    PARSER_INPUT = "stream"    # tablas Camelot modo stream
+    PARSER_INPUT = "lattice"   # tablas Camelot modo lattice
+    CAMELOT_OPTIONS = {...}    # kwargs extra para camelot.read_pdf (opcional)
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from parsers.statement_context import StatementContext, build_statement_context
+
+logger = logging.getLogger(__name__)
+
+TABLE_FLAVORS = ("lattice", "stream")
+
+
+class ParserInput(list):
+    def __init__(self, lines=(), pdf_path: Optional[str] = None, filename: str = "",
+                 tables_enabled: bool = True, context: Optional[StatementContext] = None,
+                 page_starts: Sequence[int] = ()):
+        super().__init__(lines)
+        self.pdf_path = pdf_path
+        self.filename = filename
+        # False para PDFs imagen: Camelot no encuentra nada y solo consume tiempo
+        self.tables_enabled = tables_enabled
+        self._tables: Dict[Tuple, List[pd.DataFrame]] = {}
+        self._context = context
+        self.page_starts: List[int] = list(page_starts)
+
+    @classmethod
+    def coerce(cls, raw_data, filename: str = "") -> "ParserInput":
+        """Acepta lo que reciben hoy los parsers (ParserInput, lista, dict o texto)."""
+        if isinstance(raw_data, ParserInput):
+            return raw_data
+        if isinstance(raw_data, dict):
+            lines = raw_data.get("text_lines_raw") or raw_data.get("text_lines") or []
+        elif isinstance(raw_data, str):
+            lines = raw_data.splitlines()
+        else:
+            lines = list(raw_data or [])
+        pdf_path = filename if filename and os.path.isfile(filename) else None
+        return cls(lines, pdf_path=pdf_path, filename=filename)
+
+    @property
+    def lines(self) -> List[str]:
+        return self
+
+    @property
+    def context(self) -> StatementContext:
+        if self._context is None:
+            self._context = build_statement_context(self, self.filename)
+        return self._context
+
+    def tables(self, flavor: str = "lattice", max_pages: Optional[int] = None, **camelot_options) -> List[pd.DataFrame]:
+        """Tablas Camelot del PDF para el flavor pedido (cacheadas)."""
+        if flavor not in TABLE_FLAVORS:
+            raise ValueError(f"Flavor de Camelot desconocido: {flavor}")
+        if not self.pdf_path or not self.tables_enabled:
+            return []
+
+        key = (flavor, max_pages, tuple(sorted(camelot_options.items())))
+        if key not in self._tables:
+            from extractors.camelot_utils import extract_tables_with_camelot
+            self._tables[key] = extract_tables_with_camelot(
+                self.pdf_path, max_pages=max_pages, flavor=flavor, **camelot_options
+            )
+        return self._tables[key]
+
+    def tables_for(self, parser) -> List[pd.DataFrame]:
+        """Tablas según lo que declara el parser (PARSER_INPUT / CAMELOT_OPTIONS)."""
+        flavor = getattr(parser, "PARSER_INPUT", "lines")
+        if flavor == "lines":
+            return []
+        return self.tables(flavor, **getattr(parser, "CAMELOT_OPTIONS", {}))
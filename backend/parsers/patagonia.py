@@ -3,12 +3,45 @@ import re
 from typing import List, Dict, Optional
 import pandas as pd
 import logging
+from parsers.base_parser import parse_dates
+from parsers.strict_base import KeywordSet, tokenize_line
+from utils.debug_capture import dbg
 
 logger = logging.getLogger(__name__)
 
 class PatagoniaParser:
     BANK_NAME = "PATAGONIA"
     PREFER_TABLES = False
+    # Movimientos de una sola línea (los saldos quedan en su lugar): parseo por páginas en paralelo
+    PAGE_LOCAL = True
+
+    # SOLO SALTAR headers, NO los saldos
+    SKIP_KEYWORDS = KeywordSet(
+        'debitos automaticos realizados',
+        'transferencias recibidas',
+        'transferencias enviadas',
+        'situacion impositiva',
+        'fecha concepto',
+        'estimado cliente'
+    )
+    # KEYWORDS CORREGIDAS - más específicas
+    CREDIT_KEYWORDS = KeywordSet(
+        'credito interpyme',  # Más específico
+        'transferencia entre cuentas',
+        'transferencia recib',
+        'deposito',
+        'acreditacion'
+    )
+    DEBIT_KEYWORDS = KeywordSet(
+        'debito automatico',
+        'ret.iibb',
+        'ret.',
+        'imp.',  # Impuestos SIEMPRE son débitos
+        'transf. prop',
+        'comision',
+        'pago'
+    )
+    SALDO_KEYWORDS = KeywordSet('saldo anterior', 'saldo actual', 'saldo final')
     
     def detect(self, text: str, filename: str = "") -> bool:
         haystack = f"{text} {filename}".upper()
@@ -36,14 +69,7 @@ class PatagoniaParser:
     
     def _parse_lines(self, lines: List[str]) -> List[Dict]:
         """Parsea líneas de Patagonia."""
-        DATE_PATTERN = re.compile(r'\b(\d{1,2}/\d{1,2}/\d{2,4})\b')
-        AMOUNT_PATTERN = re.compile(r'\d{1,3}(?:\.\d{3})*,\d{2}')
-
-         # DEBUG: Ver qué líneas llegan
-        print(f"Total líneas recibidas: {len(lines)}")
-        for i, line in enumerate(lines):
-            if '27/08' in line or '30/08' in line:
-                print(f"Línea {i}: {line}")
+        dbg("patagonia", "Total líneas recibidas: %d", len(lines))
 
     
         rows = []
@@ -54,57 +80,39 @@ class PatagoniaParser:
 
             lower = line.lower()
 
-        # SOLO SALTAR headers, NO los saldos
-            skip_keywords = [
-            'debitos automaticos realizados',
-            'transferencias recibidas',
-            'transferencias enviadas',
-            'situacion impositiva', 
-            'fecha concepto', 
-            'estimado cliente'
-        ]
-            if any(kw in lower for kw in skip_keywords):
+            if self.SKIP_KEYWORDS.search(lower):
                 continue
 
         # Buscar fecha O líneas de saldo
-            date_match = DATE_PATTERN.search(line)
+            toks = tokenize_line(line)
+            date_tok = next((d for d in toks.dates if d.sep == '/' and d.year), None)
         
         # Capturar SALDO ANTERIOR/ACTUAL aunque no tenga fecha
             is_saldo_line = 'saldo anterior' in lower or 'saldo actual' in lower
         
-            if not date_match and not is_saldo_line:
+            if not date_tok and not is_saldo_line:
                 continue
         
-            if date_match:
-                fecha = date_match.group(1)
+            if date_tok:
+                fecha = date_tok.text
             else:
                 fecha = ''  # Para líneas de saldo sin fecha
         
-        # Extraer montos
-            amounts_str = AMOUNT_PATTERN.findall(line)
-            if not amounts_str:
+        # Extraer montos (sin signo)
+            if not toks.amounts:
                 continue
         
-            amounts = [self._parse_amount(a) for a in amounts_str]
+            amounts = [a.magnitude for a in toks.amounts]
         
         # EXTRAER DETALLE
-            if date_match:
-                fecha_pos = line.find(fecha)
-                fecha_end = fecha_pos + len(fecha)
-                first_amount_pos = line.find(amounts_str[0])
-            
-                if first_amount_pos > fecha_end:
-                    detalle = line[fecha_end:first_amount_pos].strip()
+            if date_tok:
+                if toks.first_amount_pos > date_tok.end:
+                    detalle = line[date_tok.end:toks.first_amount_pos].strip()
                 else:
-                    detalle = line
-                    detalle = DATE_PATTERN.sub('', detalle, count=1)
-                    for amt_str in amounts_str:
-                        detalle = detalle.replace(amt_str, '', 1)
+                    detalle = toks.without('date', 'amount')
             else:
             # Línea sin fecha (saldo)
-                detalle = line
-                for amt_str in amounts_str:
-                    detalle = detalle.replace(amt_str, '', 1)
+                detalle = toks.without('amount')
         
         # Limpiar
             detalle = re.sub(r'\s+', ' ', detalle).strip()
@@ -125,30 +133,9 @@ class PatagoniaParser:
     
         lower = detalle.lower()
     
-    # KEYWORDS CORREGIDAS - más específicas
-        credit_keywords = [
-        'credito interpyme',  # Más específico
-        'transferencia entre cuentas',
-        'transferencia recib',
-        'deposito',
-        'acreditacion'
-    ]
-    
-        debit_keywords = [
-        'debito automatico',
-        'ret.iibb',
-        'ret.',
-        'imp.',  # Impuestos SIEMPRE son débitos
-        'transf. prop',
-        'comision',
-        'pago'
-    ]
-    
-        saldo_keywords = ['saldo anterior', 'saldo actual', 'saldo final']
-    
-        is_credit = any(kw in lower for kw in credit_keywords)
-        is_debit = any(kw in lower for kw in debit_keywords)
-        is_saldo = any(kw in lower for kw in saldo_keywords)
+        is_credit = self.CREDIT_KEYWORDS.search(lower)
+        is_debit = self.DEBIT_KEYWORDS.search(lower)
+        is_saldo = self.SALDO_KEYWORDS.search(lower)
     
         debito = 0.0
         credito = 0.0
@@ -199,14 +186,6 @@ class PatagoniaParser:
         'saldo': saldo
     }
     
-    def _parse_amount(self, s: str) -> float:
-        """Convierte '1.234,56' a float."""
-        try:
-            clean = s.replace('.', '').replace(',', '.')
-            return float(clean)
-        except:
-            return 0.0
-    
     def _to_dataframe(self, rows: List[Dict]) -> pd.DataFrame:
         """Convierte a DataFrame con formato final."""
         if not rows:
@@ -218,13 +197,9 @@ class PatagoniaParser:
         df['referencia'] = ''
         
         # Extraer mes/año
-        try:
-            dates = pd.to_datetime(df['fecha'], format='%d/%m/%Y', errors='coerce')
-            df['mes'] = dates.dt.month.fillna(0).astype(int)
-            df['año'] = dates.dt.year.fillna(0).astype(int)
-        except:
-            df['mes'] = 0
-            df['año'] = 0
+        dates = parse_dates(df['fecha'])
+        df['mes'] = dates.dt.month.fillna(0).astype(int)
+        df['año'] = dates.dt.year.fillna(0).astype(int)
         
         # Orden final
         return df[['fecha', 'mes', 'año', 'detalle', 'referencia', 'debito', 'credito', 'saldo']]
\ No newline at end of file
@@ -1,31 +1,29 @@
 import pandas as pd
-import camelot
 import re
-from datetime import datetime
+
+from parsers.base_parser import amounts_to_float, parse_dates
+from parsers.parser_input import ParserInput
+from utils.debug_capture import dbg
 
 
 class ProvinciaParser:
     BANK_NAME = "PROVINCIA"
+    PARSER_INPUT = "stream"
+    CAMELOT_OPTIONS = {"strip_text": "\n"}
 
     def parse(self, raw_data, filename=""):
-        print(f"[DEBUG] Iniciando parser Provincia — {filename}")
-
-        pdf_path = f"examples/{filename}" if not filename.lower().startswith("examples/") else filename
+        dbg("provincia", "Iniciando parser Provincia — %s", filename)
 
-        try:
-            tables = camelot.read_pdf(pdf_path, flavor="stream", pages="all", strip_text="\n")
-            print(f"[DEBUG] Camelot detectó {tables.n} tablas (modo stream)")
-        except Exception as e:
-            print(f"[ERROR] Camelot falló: {e}")
-            return pd.DataFrame()
+        tables = ParserInput.coerce(raw_data, filename).tables_for(self)
+        dbg("provincia", "Camelot detectó %s tablas (modo stream)", len(tables))
 
-        if not tables or tables.n == 0:
-            print("[DEBUG] No se detectaron tablas válidas")
+        if not tables:
+            dbg("provincia", "No se detectaron tablas válidas")
             return pd.DataFrame()
 
-        df = pd.concat([t.df for t in tables], ignore_index=True)
+        df = pd.concat(tables, ignore_index=True)
         df.columns = [str(c).strip().lower() for c in df.columns]
-        print(f"[DEBUG] Filas crudas totales: {len(df)}")
+        dbg("provincia", "Filas crudas totales: %s", len(df))
 
         # Unir columnas si Camelot no separó bien
         if df.shape[1] == 1:
@@ -62,44 +60,35 @@ class ProvinciaParser:
                 detalle = detalle.replace(m, "")
             detalle = detalle.strip()
 
-            debito = credito = saldo = 0.0
+            # Montos como texto: se convierten por columna en _clean_df.
+            # "movimiento" es el monto con signo de las líneas de 1-2 montos (negativo → débito).
+            movimiento = debito = credito = saldo = ""
 
             # Caso especial: si es línea de saldo
             if "SALDO" in detalle.upper():
                 if len(montos) > 0:
-                    saldo = self._to_float(montos[-1])
-                movimientos.append([fecha, detalle, 0.0, 0.0, saldo])
+                    saldo = montos[-1]
+                movimientos.append([fecha, detalle, movimiento, debito, credito, saldo])
                 continue
 
             # Clasificación por cantidad de montos
             if len(montos) == 1:
-                monto = self._to_float(montos[0])
-                if monto < 0:
-                    debito = abs(monto)
-                else:
-                    credito = monto
+                movimiento = montos[0]
             elif len(montos) == 2:
-                monto_mov = self._to_float(montos[0])
-                saldo = self._to_float(montos[1])
-                if monto_mov < 0:
-                    debito = abs(monto_mov)
-                else:
-                    credito = monto_mov
+                movimiento, saldo = montos
             elif len(montos) >= 3:
-                debito = abs(self._to_float(montos[-3]))
-                credito = self._to_float(montos[-2])
-                saldo = self._to_float(montos[-1])
+                debito, credito, saldo = montos[-3:]
 
-            movimientos.append([fecha, detalle, debito, credito, saldo])
+            movimientos.append([fecha, detalle, movimiento, debito, credito, saldo])
 
-        df_out = pd.DataFrame(movimientos, columns=["fecha", "detalle", "debito", "credito", "saldo"])
+        df_out = pd.DataFrame(movimientos, columns=["fecha", "detalle", "movimiento", "debito", "credito", "saldo"])
         df_out["moneda"] = "ARS"
         df_out = self._clean_df(df_out)
 
         # ✅ Reordenamos columnas
         df_out = df_out[["fecha", "mes", "año", "detalle", "debito", "credito", "saldo", "moneda"]]
 
-        print(f"[DEBUG] Filas finales limpias: {len(df_out)}")
+        dbg("provincia", "Filas finales limpias: %s", len(df_out))
         return df_out
 
     # =====================================================
@@ -107,32 +96,12 @@ class ProvinciaParser:
     # =====================================================
     def _clean_df(self, df):
         df = df.dropna(subset=["detalle"], how="all")
-        for col in ["debito", "credito", "saldo"]:
-            df[col] = df[col].apply(self._to_float)
-        df["fecha"] = df["fecha"].apply(self._normalize_date)
-        df["mes"] = df["fecha"].apply(lambda x: x.month if isinstance(x, datetime) else None)
-        df["año"] = df["fecha"].apply(lambda x: x.year if isinstance(x, datetime) else None)
+        # Importes AR y fechas por columna (cada valor distinto se convierte una vez)
+        movimiento = amounts_to_float(df.pop("movimiento"))
+        df["debito"] = amounts_to_float(df["debito"]).abs() + (-movimiento).clip(lower=0)
+        df["credito"] = amounts_to_float(df["credito"]) + movimiento.clip(lower=0)
+        df["saldo"] = amounts_to_float(df["saldo"])
+        df["fecha"] = parse_dates(df["fecha"])
+        df["mes"] = df["fecha"].dt.month
+        df["año"] = df["fecha"].dt.year
         return df
-
-    def _normalize_date(self, s):
-        try:
-            if not isinstance(s, str):
-                return None
-            s = s.strip().replace("-", "/")
-            if len(s.split("/")) == 2:
-                s = f"{s}/{datetime.now().year}"
-            fmt = "%d/%m/%y" if len(s.split("/")[-1]) == 2 else "%d/%m/%Y"
-            return datetime.strptime(s, fmt)
-        except:
-            return None
-
-    def _to_float(self, val):
-        try:
-            val = str(val).strip()
-            if val.count(",") == 1 and val.count(".") >= 1:
-                val = val.replace(".", "").replace(",", ".")
-            elif val.count(",") == 1 and val.count(".") == 0:
-                val = val.replace(",", ".")
-            return float(val)
-        except:
-            return 0.0
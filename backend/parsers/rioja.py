@@ -1,39 +1,30 @@
 import pandas as pd
-import camelot
 import re
-from datetime import datetime
+
+from parsers.base_parser import amounts_to_float, parse_dates
+from parsers.parser_input import ParserInput
+from utils.debug_capture import dbg
 
 
 class RiojaParser:
     BANK_NAME = "RIOJA"
+    PARSER_INPUT = "stream"
+    CAMELOT_OPTIONS = {"strip_text": "\n", "row_tol": 5, "edge_tol": 150}
 
     def parse(self, raw_data, filename=""):
-        print(f"[DEBUG] Iniciando parser Banco Rioja — {filename}")
-
-        pdf_path = f"examples/{filename}" if not filename.lower().startswith("examples/") else filename
-
-        try:
-            tables = camelot.read_pdf(
-                pdf_path,
-                flavor="stream",
-                pages="all",
-                strip_text="\n",
-                row_tol=5,
-                edge_tol=150
-            )
-            print(f"[DEBUG] Camelot detectó {tables.n} tablas (modo stream)")
-        except Exception as e:
-            print(f"[ERROR] Camelot falló: {e}")
-            return pd.DataFrame()
+        dbg("rioja", "Iniciando parser Banco Rioja — %s", filename)
+
+        tables = ParserInput.coerce(raw_data, filename).tables_for(self)
+        dbg("rioja", "Camelot detectó %s tablas (modo stream)", len(tables))
 
-        if not tables or tables.n == 0:
-            print("[DEBUG] No se detectaron tablas válidas")
+        if not tables:
+            dbg("rioja", "No se detectaron tablas válidas")
             return pd.DataFrame()
 
         # Unir todas las tablas
-        df = pd.concat([t.df for t in tables], ignore_index=True)
+        df = pd.concat(tables, ignore_index=True)
         df.columns = [str(c).strip().lower() for c in df.columns]
-        print(f"[DEBUG] Filas crudas totales: {len(df)}")
+        dbg("rioja", "Filas crudas totales: %s", len(df))
 
         # Unir columnas si Camelot no las detecta bien
         if df.shape[1] == 1:
@@ -81,44 +72,19 @@ class RiojaParser:
                 continue
 
             fecha_raw, concepto, ref, debito_raw, credito_raw, saldo_raw = match.groups()
-            fecha = self._normalize_date(fecha_raw)
-            referencia = ref.strip()
-            detalle = concepto.strip()
-
-            debito = self._to_float(debito_raw)
-            credito = self._to_float(credito_raw)
-            saldo = self._to_float(saldo_raw)
-
-            movimientos.append([fecha, detalle, referencia, debito, credito, saldo])
+            movimientos.append([fecha_raw, concepto.strip(), ref.strip(), debito_raw, credito_raw, saldo_raw])
 
         df_out = pd.DataFrame(movimientos, columns=["fecha", "detalle", "referencia", "debito", "credito", "saldo"])
+        # Fechas e importes AR por columna (cada valor distinto se convierte una vez)
+        df_out["fecha"] = parse_dates(df_out["fecha"])
+        for col in ["debito", "credito", "saldo"]:
+            df_out[col] = amounts_to_float(df_out[col])
         df_out["moneda"] = "ARS"
-        df_out["mes"] = df_out["fecha"].apply(lambda x: x.month if isinstance(x, datetime) else None)
-        df_out["año"] = df_out["fecha"].apply(lambda x: x.year if isinstance(x, datetime) else None)
+        df_out["mes"] = df_out["fecha"].dt.month
+        df_out["año"] = df_out["fecha"].dt.year
 
         # Reordenar columnas
         df_out = df_out[["fecha", "mes", "año", "detalle", "referencia", "debito", "credito", "saldo", "moneda"]]
 
-        print(f"[DEBUG] Filas finales limpias: {len(df_out)}")
+        dbg("rioja", "Filas finales limpias: %s", len(df_out))
         return df_out
-
-    # =====================================================
-    # 🔧 Utilidades
-    # =====================================================
-    def _normalize_date(self, s):
-        try:
-            s = s.strip().replace("-", "/")
-            return datetime.strptime(s, "%d/%m/%Y")
-        except:
-            return None
-
-    def _to_float(self, val):
-        try:
-            val = str(val).strip()
-            if val in ["", "nan", "None"]:
-                return 0.0
-            # eliminar puntos de miles y convertir coma decimal
-            val = val.replace(".", "").replace(",", ".")
-            return float(val)
-        except:
-            return 0.0
@@ -1,9 +1,9 @@
 # parsers/sanjuan_strict.py
 import re
 from typing import List, Dict, Any
-from parsers.strict_base import StrictBankParser, AMOUNT_ANY, DATE_PREFIX
+from parsers.strict_base import StrictBankParser, KeywordSet, AMOUNT_ANY, DATE_PREFIX
 
-SKIP_LC = (
+SKIP_LC = KeywordSet(
     "movimientos de cuenta", "banco san juan", "home banking",
     "cuenta corriente", "periodo", "hoja:", "subtotal", "transporte",
 )
@@ -78,7 +78,7 @@ class SanJuanParser(StrictBankParser):
         out: List[Dict[str, Any]] = []
         for s in lines:
             low = s.lower().strip()
-            if any(k in low for k in SKIP_LC):
+            if SKIP_LC.search(low):
                 continue
             m = DATE_PREFIX.match(s)
             if not m:
@@ -3,18 +3,30 @@ import re
 from typing import List, Dict, Optional
 import pandas as pd
 import logging
-from datetime import datetime
+from parsers.base_parser import amounts_to_float, parse_dates
+from parsers.strict_base import KeywordSet
 
 logger = logging.getLogger(__name__)
 
 class SantanderParser:
     BANK_NAME = "SANTANDER"
     PREFER_TABLES = False  # Funciona bien con texto
+    # Movimientos de una sola línea: se puede parsear por páginas en paralelo
+    PAGE_LOCAL = True
+    PAGE_OPENING_ROW = ("SALDO INICIAL", "last")
     DETECTION_KEYWORDS = [
         "SANTANDER",
         "BANCO SANTANDER",
         "RESUMEN DE CUENTA"
     ]
+
+    # Headers y footers (sobre la línea en minúsculas)
+    SKIP_KEYWORDS = KeywordSet(
+        'fecha comprobante movimiento', 'debito credito saldo',
+        'cuenta corriente nº', 'saldo total', 'periodo',
+        'detalle impositivo', 'salvo error'
+    )
+    DEBIT_KEYWORDS = KeywordSet('comision', 'iva', 'impuesto', 'percepcion', 'interes', 'sello')
     
     def detect(self, text: str, filename: str = "") -> bool:
         haystack = f"{text} {filename}".upper()
@@ -54,15 +66,11 @@ class SantanderParser:
             if 'saldo inicial' in lower:
                 amounts = AMOUNT_PATTERN.findall(line)
                 if amounts:
-                    saldo_inicial = self._parse_amount(amounts[-1])
+                    saldo_inicial = amounts[-1]
                 continue
             
             # Saltar headers y footers
-            if any(skip in lower for skip in [
-                'fecha comprobante movimiento', 'debito credito saldo',
-                'cuenta corriente nº', 'saldo total', 'periodo',
-                'detalle impositivo', 'salvo error'
-            ]):
+            if self.SKIP_KEYWORDS.search(lower):
                 continue
             
             # Buscar fecha (indica transacción)
@@ -71,15 +79,12 @@ class SantanderParser:
                 continue
             
             fecha_str = date_match.group(1)
-            fecha = self._normalize_date(fecha_str)
             
             # Extraer montos
             amounts_str = AMOUNT_PATTERN.findall(line)
             if not amounts_str:
                 continue
             
-            amounts = [self._parse_amount(a) for a in amounts_str]
-            
             # Extraer detalle (entre fecha y primer monto)
             fecha_end = line.find(fecha_str) + len(fecha_str)
             first_amount_pos = line.find(amounts_str[0])
@@ -88,8 +93,8 @@ class SantanderParser:
             # Limpiar detalle (remover info extra como "Del XX/XX/XX al XX/XX/XX")
             detalle = re.sub(r'Del\s+\d{2}/\d{2}/\d{2}\s+al\s+\d{2}/\d{2}/\d{2}', '', detalle, flags=re.I).strip()
             
-            # Clasificar montos
-            row = self._categorize_santander(fecha, detalle, amounts)
+            # Clasificar montos (texto; se convierten por columna en _to_dataframe)
+            row = self._categorize_santander(fecha_str, detalle, amounts_str)
             if row:
                 rows.append(row)
         
@@ -99,14 +104,14 @@ class SantanderParser:
                 'fecha': '',
                 'detalle': 'SALDO INICIAL',
                 'referencia': '',
-                'debito': 0.0,
-                'credito': 0.0,
+                'debito': '',
+                'credito': '',
                 'saldo': saldo_inicial
             })
         
         return rows
     
-    def _categorize_santander(self, fecha: str, detalle: str, amounts: List[float]) -> Optional[Dict]:
+    def _categorize_santander(self, fecha: str, detalle: str, amounts: List[str]) -> Optional[Dict]:
         """
         Categoriza montos según estructura Santander.
         
@@ -114,13 +119,14 @@ class SantanderParser:
         - 1 monto: solo saldo
         - 2 montos: débito/crédito + saldo
         - 3 montos: débito, crédito, saldo
+        Los montos quedan como texto ('$ 53.300,00'); débito y crédito van en valor absoluto.
         """
         if not amounts:
             return None
         
-        debito = 0.0
-        credito = 0.0
-        saldo = 0.0
+        debito = ''
+        credito = ''
+        saldo = ''
         
         if len(amounts) == 1:
             # Solo saldo
@@ -133,18 +139,16 @@ class SantanderParser:
             
             # Clasificar por contexto
             lower = detalle.lower()
-            debit_keywords = ['comision', 'iva', 'impuesto', 'percepcion', 'interes', 'sello']
-            
-            if any(kw in lower for kw in debit_keywords):
-                debito = abs(movement)
+            if self.DEBIT_KEYWORDS.search(lower):
+                debito = movement
             else:
                 # Por defecto, si no hay keywords de débito, asumir crédito
-                credito = abs(movement)
+                credito = movement
         
         elif len(amounts) >= 3:
             # Débito, crédito, saldo
-            debito = abs(amounts[0])
-            credito = abs(amounts[1])
+            debito = amounts[0]
+            credito = amounts[1]
             saldo = amounts[2]
         
         return {
@@ -156,52 +160,6 @@ class SantanderParser:
             'saldo': saldo
         }
     
-    def _normalize_date(self, date_str: str) -> str:
-        """
-        Normaliza fecha DD/MM/YY a DD/MM/YYYY.
-        """
-        if not date_str:
-            return ""
-        
-        try:
-            # Formato DD/MM/YY
-            parts = date_str.split('/')
-            if len(parts) == 3:
-                day, month, year = parts
-                year = int(year)
-                
-                # Convertir año de 2 dígitos a 4
-                if year < 100:
-                    year = 2000 + year
-                
-                dt = datetime(year, int(month), int(day))
-                return dt.strftime('%d/%m/%Y')
-            
-            return date_str
-        except:
-            return date_str
-    
-    def _parse_amount(self, amount_str: str) -> float:
-        """Convierte '$ 53.300,00' a float."""
-        if not amount_str:
-            return 0.0
-        
-        try:
-            # Remover $ y espacios
-            clean = amount_str.replace('$', '').strip()
-            
-            # Detectar negativos
-            negative = clean.startswith('-')
-            clean = clean.replace('-', '')
-            
-            # Convertir formato argentino
-            clean = clean.replace('.', '').replace(',', '.')
-            result = float(clean)
-            
-            return -result if negative else result
-        except:
-            return 0.0
-    
     def _to_dataframe(self, rows: List[Dict]) -> pd.DataFrame:
         """Convierte a DataFrame final."""
         if not rows:
@@ -209,18 +167,13 @@ class SantanderParser:
         
         df = pd.DataFrame(rows)
         
-        # Agregar mes y año
-        def extract_date_parts(fecha_str):
-            if not fecha_str:
-                return 0, 0
-            try:
-                dt = datetime.strptime(fecha_str, '%d/%m/%Y')
-                return dt.month, dt.year
-            except:
-                return 0, 0
-        
-        df[['mes', 'año']] = df['fecha'].apply(
-            lambda x: pd.Series(extract_date_parts(x))
-        )
+        # Importes AR y fechas DD/MM/YY por columna (cada valor distinto se convierte una vez)
+        df['debito'] = amounts_to_float(df['debito']).abs()
+        df['credito'] = amounts_to_float(df['credito']).abs()
+        df['saldo'] = amounts_to_float(df['saldo'])
+        fechas = parse_dates(df['fecha'])
+        df['fecha'] = fechas.dt.strftime('%d/%m/%Y').where(fechas.notna(), df['fecha'])
+        df['mes'] = fechas.dt.month.fillna(0).astype(int)
+        df['año'] = fechas.dt.year.fillna(0).astype(int)
         
         return df[['fecha', 'mes', 'año', 'detalle', 'referencia', 'debito', 'credito', 'saldo']]
\ No newline at end of file
@@ -0,0 +1,154 @@
+# parsers/statement_context.py
+"""
+Metadata del extracto calculada en una sola pasada.
+
+Año, período, moneda, número de cuenta y saldos inicial/final (el primero de
+cada uno que tenga importe, con el índice de su línea) se obtienen recorriendo
+las líneas una vez. El resultado es inmutable y viaja en ParserInput.context,
+así los parsers no vuelven a escanear el documento para buscar lo mismo.
+
+    ctx = ParserInput.coerce(raw_data, filename).context
+    year = ctx.year or datetime.now().year
+    if ctx.opening_balance is not None:
+        ...
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional
+
+from parsers.strict_base import KeywordSet, tokenize_line
+
+OPENING_KEYWORDS = KeywordSet(
+    "SALDO ULTIMO EXTRACTO", "SALDO ANTERIOR",
+    "SALDO DEL PERIODO ANTERIOR", "SALDO DEL PERÍODO ANTERIOR",
+)
+CLOSING_KEYWORDS = KeywordSet("SALDO FINAL", "SALDO PERIODO ACTUAL", "SALDO PERÍODO ACTUAL")
+USD_MARKERS = KeywordSet("U$S", "DOLARES")
+
+_DATE = r"(\d{1,2})[/-](\d{1,2})[/-](\d{4}|\d{2})"
+_PERIOD_RE = re.compile(_DATE + r"\s*(?:AL|A|HASTA|-|–)\s*" + _DATE, re.I)
+_FULL_DATE_RE = re.compile(r"\b\d{2}[/-]\d{2}[/-](\d{4})\b")
+_SHORT_DATE_RE = re.compile(r"\b\d{2}/\d{2}/(\d{2})\b")
+_YEAR_RE = re.compile(r"\b(20\d{2}|19\d{2})\b")
+_ACCOUNT_RE = re.compile(
+    r"\b(?:CUENTA|CTA)\b\.?[A-Z\s.]{0,20}?(?:N[°º]|NRO\.?|NUMERO|NÚMERO)?\s*:?\s*(\d[\d\-/]{5,}\d)", re.I
+)
+
+
+@dataclass(frozen=True)
+class StatementContext:
+    year: Optional[int] = None
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+    currency: str = "ARS"
+    account: str = ""
+    opening_balance: Optional[float] = None
+    opening_date: Optional[date] = None
+    opening_line: Optional[int] = None
+    closing_balance: Optional[float] = None
+    closing_date: Optional[date] = None
+    closing_line: Optional[int] = None
+
+    @property
+    def month(self) -> Optional[int]:
+        """Mes del período (el de inicio si el extracto abarca varios)."""
+        ref = self.period_start or self.period_end
+        return ref.month if ref else None
+
+
+def _full_year(y: str) -> int:
+    year = int(y)
+    if len(y) == 2:
+        return 2000 + year if year < 70 else 1900 + year
+    return year
+
+
+def _to_date(d: str, m: str, y: str) -> Optional[date]:
+    try:
+        return date(_full_year(y), int(m), int(d))
+    except ValueError:
+        return None
+
+
+def _balance(line: str):
+    """(saldo, fecha) de una línea de saldo: el último importe y la primera fecha con año."""
+    toks = tokenize_line(line)
+    if not toks.amounts:
+        return None, None
+    last = toks.amounts[-1]
+    negative = last.signed < 0 or toks.line[:last.start].rstrip().endswith("-")
+    when = next(
+        (_to_date(t.day, t.month, t.year) for t in toks.dates if t.year and t.month.isdigit()),
+        None,
+    )
+    return (-last.magnitude if negative else last.magnitude), when
+
+
+def build_statement_context(lines: List[str], filename: str = "") -> StatementContext:
+    """Recorre las líneas una vez y arma el StatementContext."""
+    period = None
+    full_year = year_token = short_year = None
+    usd = False
+    account = ""
+    opening = closing = None
+
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        upper = line.upper()
+
+        if opening is None and OPENING_KEYWORDS.search(upper):
+            value, when = _balance(line)
+            if value is not None:
+                opening = (value, when, i)
+        elif closing is None and CLOSING_KEYWORDS.search(upper):
+            value, when = _balance(line)
+            if value is not None:
+                closing = (value, when, i)
+
+        if not usd and USD_MARKERS.search(upper):
+            usd = True
+
+        if period is None:
+            m = _PERIOD_RE.search(line)
+            if m:
+                start, end = _to_date(*m.group(1, 2, 3)), _to_date(*m.group(4, 5, 6))
+                if start and end and start <= end:
+                    period = (start, end)
+        if full_year is None:
+            m = _FULL_DATE_RE.search(line)
+            if m:
+                full_year = int(m.group(1))
+        if year_token is None:
+            m = _YEAR_RE.search(line)
+            if m:
+                year_token = int(m.group(1))
+        if short_year is None:
+            m = _SHORT_DATE_RE.search(line)
+            if m:
+                short_year = _full_year(m.group(1))
+        if not account:
+            m = _ACCOUNT_RE.search(line)
+            if m:
+                account = m.group(1)
+
+    year = period[1].year if period else (full_year or year_token or short_year)
+    if year is None and filename:
+        m = _YEAR_RE.search(filename)
+        year = int(m.group(1)) if m else None
+
+    return StatementContext(
+        year=year,
+        period_start=period[0] if period else None,
+        period_end=period[1] if period else None,
+        currency="USD" if usd else "ARS",
+        account=account,
+        opening_balance=opening[0] if opening else None,
+        opening_date=opening[1] if opening else None,
+        opening_line=opening[2] if opening else None,
+        closing_balance=closing[0] if closing else None,
+        closing_date=closing[1] if closing else None,
+        closing_line=closing[2] if closing else None,
+    )
@@ -1,10 +1,12 @@
 # parsers/strict_base.py
 import re
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Tuple, Union
+from functools import lru_cache
+from typing import Optional, Tuple, Union
 import logging
 import pandas as pd
-from parsers.base_parser import BaseParser
+from parsers.base_parser import BaseParser, _text_amount
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +16,201 @@ AMOUNT_ANY = re.compile(
     r"\(?-?\$?\s*\d{1,3}(?:[.\s]\d{3})*,\d{2}\)?-?"
 )
 
-HEADER_TOKENS = ("fecha", "concepto", "detalle", "debito", "débito", "credito", "crédito", "saldo")
+
+# ---------------------------------------------------------------------
+# Conjuntos de palabras clave compilados
+# ---------------------------------------------------------------------
+def _trie_regex(words) -> str:
+    """
+    Alternancia con los prefijos comunes factorizados ("SALDO ANTERIOR|SALDO FINAL"
+    → "SALDO (?:ANTERIOR|FINAL)"): el motor descarta cada posición de la línea
+    mirando un carácter en vez de probar palabra por palabra. Greedy: en una
+    misma posición matchea la palabra más larga.
+    """
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:  # una palabra termina acá; las más largas son opcionales
+            body = f"(?:{body})?" if len(alts) > 1 or len(body) > 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+class KeywordSet:
+    """
+    Lista de palabras clave compilada una vez en una sola regex (un trie de
+    prefijos). Reemplaza `any(k in texto for k in [...])`: un solo escaneo de
+    la línea que además dice qué palabra apareció.
+
+        NOISE = KeywordSet("SALDO ANTERIOR", "TOTAL", "PAGINA")
+        if NOISE.search(upper): ...          # bool, igual que any(...)
+        kw = NOISE.find(upper)               # "TOTAL" / None
+
+    Las palabras se buscan tal cual (el llamador normaliza mayúsculas/minúsculas
+    como antes); con ignore_case=True la regex ignora el caso y find() devuelve
+    la palabra como fue declarada.
+    """
+
+    __slots__ = ("keywords", "_regex", "_canon")
+
+    def __init__(self, *keywords: str, ignore_case: bool = False):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(keywords))
+        pattern = _trie_regex(self.keywords) if all(self.keywords) else ""
+        self._regex = re.compile(pattern if self.keywords else r"(?!)", re.IGNORECASE if ignore_case else 0)
+        self._canon = {k.lower(): k for k in self.keywords} if ignore_case else None
+
+    def search(self, text: str) -> bool:
+        return self._regex.search(text) is not None
+
+    def find(self, text: str) -> Optional[str]:
+        """Palabra que aparece primero en el texto (None si ninguna)."""
+        m = self._regex.search(text)
+        if m is None:
+            return None
+        return self._canon.get(m.group(0).lower(), m.group(0)) if self._canon else m.group(0)
+
+    def __add__(self, other: "KeywordSet") -> "KeywordSet":
+        return KeywordSet(*self.keywords, *other.keywords, ignore_case=self._canon is not None)
+
+    def __iter__(self):
+        return iter(self.keywords)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def __repr__(self) -> str:
+        return f"KeywordSet{self.keywords!r}"
+
+
+HEADER_TOKENS = KeywordSet("fecha", "concepto", "detalle", "debito", "débito", "credito", "crédito", "saldo")
+
+
+# ---------------------------------------------------------------------
+# Tokenizador de líneas compartido
+# ---------------------------------------------------------------------
+# Una sola pasada por línea: fechas (dd/mm, dd/mm/aa[aa], dd-MMM-aaaa),
+# importes AR (1.234,56 con signo adelante/atrás o paréntesis) y números
+# largos (referencias/comprobantes). Lo que queda entre tokens son spans de texto.
+_TOKEN_RE = re.compile(r"""
+    (?P<date>(?<![\d/.,])
+        (?P<d>\d{1,2})(?P<sep>[/-])(?P<m>\d{1,2}|[A-Za-z]{3})
+        (?:(?P=sep)(?P<y>\d{4}|\d{2}))?
+        (?![\d/]|,\d))
+  | (?P<amount>(?<![\d.,])
+        (?P<paren>\()?(?P<lead>-)?(?:\$\s?)?(?P<lead2>-)?
+        (?P<num>\d+(?:\.\d{3})*,\d{2})(?!\d)
+        (?P<trail>-)?(?(paren)\)))
+  | (?P<ref>(?<![\d.,])\d{4,}(?![\d,]))
+""", re.VERBOSE)
+
+_DASHES = str.maketrans({"–": "-", "−": "-", "—": "-"})
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str          # "date" | "amount" | "ref" | "text"
+    text: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class DateToken(Token):
+    day: str
+    month: str         # "09" o "SEP" según el formato
+    year: Optional[str]
+    sep: str
+
+
+@dataclass(frozen=True)
+class AmountToken(Token):
+    magnitude: float   # valor absoluto
+    lead: bool         # "-1.234,56" / "$ -1.234,56"
+    trail: bool        # "1.234,56-"
+    paren: bool        # "(1.234,56)"
+
+    @property
+    def value(self) -> float:
+        """Con signo solo si el '-' va adelante (lo que leen los regex `-?\\d...`)."""
+        return -self.magnitude if self.lead else self.magnitude
+
+    @property
+    def signed(self) -> float:
+        """Negativo ante cualquier marca: '-' adelante/atrás o paréntesis."""
+        return -self.magnitude if (self.lead or self.trail or self.paren) else self.magnitude
+
+
+@dataclass(frozen=True)
+class LineTokens:
+    line: str
+    dates: Tuple[DateToken, ...]
+    amounts: Tuple[AmountToken, ...]
+    refs: Tuple[Token, ...]
+    texts: Tuple[Token, ...]
+
+    @property
+    def leading_date(self) -> Optional[DateToken]:
+        """Fecha al inicio de la línea (ignorando espacios), si la hay."""
+        if self.dates and not self.line[:self.dates[0].start].strip():
+            return self.dates[0]
+        return None
+
+    @property
+    def first_amount_pos(self) -> int:
+        return self.amounts[0].start if self.amounts else len(self.line)
+
+    def without(self, *kinds: str) -> str:
+        """Línea sin los tokens de los tipos indicados, con espacios colapsados."""
+        spans = sorted(
+            (t.start, t.end)
+            for kind in kinds
+            for t in getattr(self, {"date": "dates", "amount": "amounts", "ref": "refs"}[kind])
+        )
+        out, pos = [], 0
+        for start, end in spans:
+            out.append(self.line[pos:start])
+            pos = end
+        out.append(self.line[pos:])
+        return " ".join("".join(out).split())
+
+
+@lru_cache(maxsize=16384)
+def tokenize_line(line: str) -> LineTokens:
+    """
+    Escanea la línea una sola vez y devuelve sus tokens tipados (memoizado por línea).
+    Los guiones tipográficos (– − —) se normalizan a '-' sin mover offsets.
+    """
+    line = (line or "").translate(_DASHES)
+    dates, amounts, refs, texts = [], [], [], []
+    pos = 0
+    for m in _TOKEN_RE.finditer(line):
+        if line[pos:m.start()].strip():
+            texts.append(Token("text", line[pos:m.start()].strip(), pos, m.start()))
+        pos = m.end()
+        if m.group("date"):
+            dates.append(DateToken("date", m.group(0), m.start(), m.end(),
+                                   m.group("d"), m.group("m").upper(), m.group("y"), m.group("sep")))
+        elif m.group("amount"):
+            amounts.append(AmountToken(
+                "amount", m.group(0), m.start(), m.end(),
+                float(m.group("num").replace(".", "").replace(",", ".")),
+                bool(m.group("lead") or m.group("lead2")), bool(m.group("trail")), bool(m.group("paren")),
+            ))
+        else:
+            refs.append(Token("ref", m.group(0), m.start(), m.end()))
+    if line[pos:].strip():
+        texts.append(Token("text", line[pos:].strip(), pos, len(line)))
+    return LineTokens(line, tuple(dates), tuple(amounts), tuple(refs), tuple(texts))
 
 class StrictBankParser(BaseParser):
     """
@@ -46,16 +242,11 @@ class StrictBankParser(BaseParser):
         t = str(s).strip()
         if not t:
             return 0.0
-        neg = t.startswith("-") or t.endswith("-") or (t.startswith("(") and t.endswith(")"))
-        t = t.replace("(", "").replace(")", "").replace("-", "")
-        t = t.replace("$", "").replace(" ", "").replace("\u00a0", "")
-        t = t.replace(".", "").replace(",", ".")
-        try:
-            v = float(t)
-            return -v if neg else v
-        except Exception:
+        v = _text_amount(t)
+        if v != v:  # NaN
             logger.debug("No se pudo parsear monto: %r", s)
             return 0.0
+        return v
 
     def _split_year_month(self, fecha: str) -> Tuple[str, str]:
         if not fecha or len(fecha) < 8:
@@ -68,7 +259,7 @@ class StrictBankParser(BaseParser):
 
     def _looks_like_header(self, s: str) -> bool:
         low = (s or "").lower()
-        return any(k in low for k in HEADER_TOKENS)
+        return HEADER_TOKENS.search(low)
 
     def _finalize_rows(self, rows):
         df = pd.DataFrame(rows, columns=[
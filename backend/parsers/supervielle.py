@@ -3,7 +3,9 @@ import re
 from typing import List, Dict
 import pandas as pd
 import logging
-from datetime import datetime
+from parsers.base_parser import parse_dates
+from parsers.parser_input import ParserInput
+from parsers.strict_base import KeywordSet, tokenize_line
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,27 @@ class SupervielleParser:
         "SUPERVIELLE",
         "BANCO SUPERVIELLE"
     ]
+
+    # Headers y líneas informativas (sobre la línea en minúsculas)
+    SKIP_KEYWORDS = KeywordSet(
+        'detalle de movimientos', 'clave bancaria', 'responsable inscripto',
+        'cantidad total', 'importante:', 'los depósitos', 'garantía',
+        'régimen de transparencia', 'monotributistas', 'imp ley 25413',
+        'reg de recaudacion'
+    )
+    # Líneas de detalle adicional del concepto anterior (Pres:, Id:, Ref:, etc)
+    EXTRA_DETAIL_KEYWORDS = KeywordSet('Pres:', 'Id:', 'Ref:', 'Operación', 'Generada')
+    # Clasificación por concepto cuando hay un solo monto
+    DEBIT_KEYWORDS = KeywordSet(
+        'pago', 'débito', 'impuesto', 'comis', 'iva', 'percep',
+        'cargo', 'trf', 'transferencia', 'debin'
+    )
+    CREDIT_KEYWORDS = KeywordSet('crédito', 'acredit', 'depósito', 'cobr', 'ingreso')
+    # ... y cuando hay monto + saldo
+    DEBIT_WITH_SALDO_KEYWORDS = KeywordSet(
+        'pago', 'débito', 'impuesto', 'comis', 'iva', 'percep',
+        'db.aut', 'trf masiva'
+    )
     
     def detect(self, text: str, filename: str = "") -> bool:
         haystack = f"{text} {filename}".upper()
@@ -21,19 +44,10 @@ class SupervielleParser:
     
     def parse(self, raw_data, filename: str = ""):
         """Parser único para Supervielle (pesos y dólares)."""
-        if isinstance(raw_data, dict):
-            lines = raw_data.get("text_lines_raw", []) or raw_data.get("text_lines", [])
-        elif isinstance(raw_data, list):
-            lines = raw_data
-        elif isinstance(raw_data, str):
-            lines = raw_data.splitlines()
-        else:
-            lines = []
+        lines = ParserInput.coerce(raw_data, filename)
         
-        # Detectar moneda automáticamente
-        text_upper = " ".join(lines).upper()
-        is_usd = "U$S" in text_upper or "DOLARES" in text_upper
-        currency = "USD" if is_usd else "ARS"
+        # Moneda detectada en el pre-pass del documento (U$S / DOLARES)
+        currency = lines.context.currency
         
         rows = self._parse_lines(lines, currency)
         return self._to_dataframe(rows)
@@ -44,21 +58,17 @@ class SupervielleParser:
         saldo_anterior = None
         current_concepto_extra = []  # Para líneas adicionales de concepto
         
-        # Patrones
-        DATE_PATTERN = re.compile(r'^(\d{2}/\d{2}/\d{2})\s+')
-        AMOUNT_PATTERN = re.compile(r'\d{1,3}(?:\.\d{3})*,\d{2}')
-        
         for line in lines:
             if not line or len(line.strip()) < 5:
                 continue
             
             lower = line.lower()
+            toks = tokenize_line(line)
             
             # Capturar Saldo del período anterior
             if 'saldo del período anterior' in lower or 'saldo del periodo anterior' in lower:
-                amounts = AMOUNT_PATTERN.findall(line)
-                if amounts:
-                    saldo_anterior = self._parse_amount(amounts[-1])
+                if toks.amounts:
+                    saldo_anterior = toks.amounts[-1].magnitude
                     rows.append({
                         'fecha': None,
                         'concepto': 'SALDO ANTERIOR',
@@ -71,12 +81,7 @@ class SupervielleParser:
                 continue
             
             # Saltar headers y líneas informativas
-            if any(skip in lower for skip in [
-                'detalle de movimientos', 'clave bancaria', 'responsable inscripto',
-                'cantidad total', 'importante:', 'los depósitos', 'garantía',
-                'régimen de transparencia', 'monotributistas', 'imp ley 25413',
-                'reg de recaudacion'
-            ]):
+            if self.SKIP_KEYWORDS.search(lower):
                 continue
             
             # Si la línea dice "Fecha Concepto Débito Crédito Saldo", saltarla
@@ -85,9 +90,8 @@ class SupervielleParser:
             
             # Detectar SUBTOTAL
             if lower.strip().startswith('subtotal'):
-                amounts = AMOUNT_PATTERN.findall(line)
-                if amounts:
-                    saldo = self._parse_amount(amounts[-1])
+                if toks.amounts:
+                    saldo = toks.amounts[-1].magnitude
                     if '-' in line:
                         saldo = -abs(saldo)
                     rows.append({
@@ -103,9 +107,8 @@ class SupervielleParser:
             
             # Detectar SALDO PERIODO ACTUAL (final)
             if 'saldo periodo actual' in lower or 'saldo período actual' in lower:
-                amounts = AMOUNT_PATTERN.findall(line)
-                if amounts:
-                    saldo_final = self._parse_amount(amounts[-1])
+                if toks.amounts:
+                    saldo_final = toks.amounts[-1].magnitude
                     if '-' in line:
                         saldo_final = -abs(saldo_final)
                     rows.append({
@@ -119,29 +122,28 @@ class SupervielleParser:
                     })
                 continue
             
-            # Buscar fecha AL INICIO de la línea
-            date_match = DATE_PATTERN.match(line)
+            # Buscar fecha DD/MM/YY AL INICIO de la línea
+            date_tok = toks.leading_date
+            if date_tok and (date_tok.sep != '/' or not date_tok.year or len(date_tok.year) != 2
+                             or len(date_tok.day) != 2 or len(date_tok.month) != 2):
+                date_tok = None
             
             # Si no hay fecha, puede ser continuación del concepto anterior
-            if not date_match:
+            if not date_tok:
                 # Revisar si es una línea de detalle adicional (Pres:, Id:, Ref:, etc)
-                if any(x in line for x in ['Pres:', 'Id:', 'Ref:', 'Operación', 'Generada']):
+                if self.EXTRA_DETAIL_KEYWORDS.search(line):
                     current_concepto_extra.append(line.strip())
                 continue
             
-            fecha_str = date_match.group(1)
-            rest_of_line = line[date_match.end():].strip()
+            fecha_str = date_tok.text
             
-            # Extraer todos los montos de la línea
-            amounts = AMOUNT_PATTERN.findall(rest_of_line)
+            # Extraer todos los montos de la línea (sin signo)
+            amounts = [a.magnitude for a in toks.amounts]
             if not amounts:
                 continue
             
-            # Encontrar posición del primer monto
-            first_amount_pos = rest_of_line.find(amounts[0])
-            
             # Extraer concepto (todo antes del primer monto)
-            concepto = rest_of_line[:first_amount_pos].strip()
+            concepto = line[date_tok.end:toks.first_amount_pos].strip()
             
             # Agregar detalles extra si hay
             if current_concepto_extra:
@@ -154,9 +156,6 @@ class SupervielleParser:
             # Limpiar concepto
             concepto = self._clean_concepto(concepto)
             
-            # Extraer parte después de los montos para buscar saldo negativo
-            rest_after_amounts = rest_of_line[first_amount_pos:]
-            
             # Determinar débito, crédito y saldo según cantidad de montos
             debito = None
             credito = None
@@ -165,18 +164,13 @@ class SupervielleParser:
             if len(amounts) == 1:
                 # Un solo monto: puede ser débito O crédito, con saldo implícito
                 # O puede ser solo el saldo
-                monto = self._parse_amount(amounts[0])
+                monto = amounts[0]
                 
                 # Determinar si es débito o crédito por el contexto
                 concepto_lower = concepto.lower()
-                if any(word in concepto_lower for word in [
-                    'pago', 'débito', 'impuesto', 'comis', 'iva', 'percep',
-                    'cargo', 'trf', 'transferencia', 'debin'
-                ]):
+                if self.DEBIT_KEYWORDS.search(concepto_lower):
                     debito = monto
-                elif any(word in concepto_lower for word in [
-                    'crédito', 'acredit', 'depósito', 'cobr', 'ingreso'
-                ]):
+                elif self.CREDIT_KEYWORDS.search(concepto_lower):
                     credito = monto
                 else:
                     # Si no podemos determinar, dejar en saldo
@@ -184,31 +178,23 @@ class SupervielleParser:
                     
             elif len(amounts) == 2:
                 # Dos montos: monto1 (débito o crédito) + saldo
-                monto1 = self._parse_amount(amounts[0])
-                saldo = self._parse_amount(amounts[1])
+                monto1, saldo = amounts
                 
                 # Determinar si monto1 es débito o crédito
                 concepto_lower = concepto.lower()
-                if any(word in concepto_lower for word in [
-                    'pago', 'débito', 'impuesto', 'comis', 'iva', 'percep',
-                    'db.aut', 'trf masiva'
-                ]):
+                if self.DEBIT_WITH_SALDO_KEYWORDS.search(concepto_lower):
                     debito = monto1
                 else:
                     credito = monto1
                     
             elif len(amounts) >= 3:
                 # Tres montos: débito + crédito + saldo
-                debito = self._parse_amount(amounts[0])
-                credito = self._parse_amount(amounts[1])
-                saldo = self._parse_amount(amounts[2])
+                debito, credito, saldo = amounts[:3]
             
             # Verificar signo del saldo (buscar '-' después del último monto)
             if saldo is not None:
-                # Buscar el último monto en la línea
-                last_amount_match = list(re.finditer(AMOUNT_PATTERN, rest_of_line))[-1]
-                text_after_last = rest_of_line[last_amount_match.end():]
-                if '-' in text_after_last:
+                last_amount = toks.amounts[-1]
+                if last_amount.trail or '-' in line[last_amount.end:]:
                     saldo = -abs(saldo)
             
             rows.append({
@@ -237,24 +223,6 @@ class SupervielleParser:
         refs = re.findall(r'\b\d{6,10}\b', text)
         return refs[0] if refs else ''
     
-    def _parse_amount(self, amount_str: str) -> float:
-        """Convierte string de monto a float."""
-        try:
-            clean = amount_str.replace('.', '').replace(',', '.')
-            return float(clean)
-        except:
-            return 0.0
-    
-    def _parse_date(self, date_str: str) -> tuple:
-        """Convierte DD/MM/YY a (fecha_completa, mes, año)."""
-        try:
-            day, month, year = date_str.split('/')
-            full_year = f"20{year}" if int(year) <= 50 else f"19{year}"
-            fecha = f"{day}/{month}/{full_year}"
-            return fecha, int(month), int(full_year)
-        except:
-            return date_str, None, None
-    
     def _to_dataframe(self, rows: List[Dict]) -> pd.DataFrame:
         """Convierte lista de registros a DataFrame."""
         if not rows:
@@ -265,11 +233,11 @@ class SupervielleParser:
         
         df = pd.DataFrame(rows)
         
-        # Parsear fechas
-        df[['fecha', 'mes', 'año']] = df.apply(
-            lambda row: self._parse_date(row['fecha']) if row['fecha'] else (None, None, None),
-            axis=1, result_type='expand'
-        )
+        # Parsear fechas DD/MM/YY (una conversión por fecha distinta)
+        fechas = parse_dates(df['fecha'])
+        df['fecha'] = fechas.dt.strftime('%d/%m/%Y').where(fechas.notna(), None)
+        df['mes'] = fechas.dt.month
+        df['año'] = fechas.dt.year
         
         # Renombrar concepto a detalle
         df.rename(columns={'concepto': 'detalle'}, inplace=True)
@@ -10,6 +10,8 @@ import pdfplumber
 import pytesseract
 from pdf2image import convert_from_path
 
+from utils.metrics import inc, span
+
 logger = logging.getLogger(__name__)
 
 RawData = Union[List["DataFrame"], List[str]]  # pandas imported dynamically by camelot
@@ -23,6 +25,8 @@ class PDFReader:
 
     def __init__(self) -> None:
         self._cache: dict[str, Tuple[RawData, str]] = {}
+        self._page_counts: dict[str, int] = {}
+        self._page_starts: dict[str, List[int]] = {}
 
     def extract_all(self, pdf_path: str, prefer_tables: bool = False) -> Tuple[RawData, str]:
         return self._extract_pdf(pdf_path, prefer_tables=prefer_tables)
@@ -35,6 +39,22 @@ class PDFReader:
         _, text = self._extract_pdf(pdf_path, prefer_tables=prefer_tables)
         return text
 
+    def page_count(self, pdf_path: str) -> int:
+        """Page count seen by pdfplumber during extraction (0 if unknown)."""
+        return self._page_counts.get(os.path.abspath(pdf_path), 0)
+
+    def page_starts(self, pdf_path: str) -> List[int]:
+        """Index of the first text line of each page seen by pdfplumber ([] if unknown)."""
+        return self._page_starts.get(os.path.abspath(pdf_path), [])
+
+    def forget(self, pdf_path: str) -> None:
+        """Drop everything cached for `pdf_path` (long-lived readers in batch workers)."""
+        key = os.path.abspath(pdf_path)
+        for suffix in ("tables", "text"):
+            self._cache.pop(f"{key}::{suffix}", None)
+        self._page_counts.pop(key, None)
+        self._page_starts.pop(key, None)
+
     def infer_year_from_text(self, text: str, filename: Optional[str] = None) -> Optional[int]:
         """Best-effort year inference based on statement text or filename."""
         if text:
@@ -60,17 +80,20 @@ class PDFReader:
     def _extract_pdf(self, pdf_path: str, *, prefer_tables: bool = False) -> Tuple[RawData, str]:
         cache_key = f"{os.path.abspath(pdf_path)}::{'tables' if prefer_tables else 'text'}"
         if cache_key in self._cache:
+            inc("tga_pdfreader_cache_total", result="hit")
             return self._cache[cache_key]
+        inc("tga_pdfreader_cache_total", result="miss")
 
         strategies = []
         if prefer_tables:
-            strategies.extend([self._try_camelot, self._try_pdfplumber])
+            strategies.extend([("camelot", self._try_camelot), ("pdfplumber", self._try_pdfplumber)])
         else:
-            strategies.extend([self._try_pdfplumber, self._try_camelot])
-        strategies.append(self._try_ocr)
+            strategies.extend([("pdfplumber", self._try_pdfplumber), ("camelot", self._try_camelot)])
+        strategies.append(("ocr", self._try_ocr))
 
-        for strategy in strategies:
-            raw, text = strategy(pdf_path)
+        for name, strategy in strategies:
+            with span(f"pdfreader_{name}"):
+                raw, text = strategy(pdf_path)
             if raw:
                 self._cache[cache_key] = (raw, text)
                 return raw, text
@@ -92,9 +115,12 @@ class PDFReader:
 
     def _try_pdfplumber(self, pdf_path: str) -> Tuple[RawData, str]:
         lines: List[str] = []
+        starts: List[int] = []
         try:
             with pdfplumber.open(pdf_path) as pdf:
+                self._page_counts[os.path.abspath(pdf_path)] = len(pdf.pages)
                 for page in pdf.pages:
+                    starts.append(len(lines))
                     page_text = page.extract_text() or ""
                     if page_text:
                         for line in page_text.splitlines():
@@ -102,6 +128,7 @@ class PDFReader:
                             if clean:
                                 lines.append(clean)
             if lines:
+                self._page_starts[os.path.abspath(pdf_path)] = starts
                 logger.info("pdfplumber extracted text from %s lines", len(lines))
                 return lines, "\n".join(lines)
         except Exception as exc:
@@ -1,40 +1,138 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, send_file
 import uuid
 import threading
+from config import Config
 from services.consolidador_service import procesar_consolidador
+from io import BytesIO
+import logging
+
+logger = logging.getLogger(__name__)
 
 consolidador_bp = Blueprint("consolidador_bp", __name__)
 
 JOBS = {}
 
-@consolidador_bp.route("/upload", methods=["POST"])
+@consolidador_bp.route("/upload", methods=["POST", "OPTIONS"])
 def upload_consolidador():
-    files = request.files.getlist("files[]")
-    if not files:
-        return jsonify({"error": "No se enviaron archivos"}), 400
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        files = request.files.getlist("files") or request.files.getlist("files[]")
+
+        if not files:
+            logger.warning("⚠️ No se recibieron archivos en la petición")
+            return jsonify({"error": "No se enviaron archivos"}), 400
+
+        logger.info(f"📦 Consolidador - Recibidos {len(files)} archivos")
 
-    job_id = str(uuid.uuid4())
-    JOBS[job_id] = {"status": "queued", "progress": 0, "message": "Iniciando..."}
+        # Copiar archivos en memoria (el FileStorage se cierra al terminar el request)
+        files_copy = []
+        for f in files:
+            file_data = f.read()
+            files_copy.append({
+                "filename": f.filename,
+                "content": BytesIO(file_data)
+            })
+            logger.info(f"  ✓ {f.filename}")
 
-    thread = threading.Thread(target=procesar_consolidador, args=(job_id, files, JOBS))
-    thread.start()
+        job_id = str(uuid.uuid4())
+        JOBS[job_id] = {
+            "state": "PENDING",
+            "progress": 0,
+            "status": "Archivos recibidos, iniciando procesamiento..."
+        }
 
-    return jsonify({"job_id": job_id, "message": "Archivos recibidos", "files_count": len(files)}), 200
+        thread = threading.Thread(target=procesar_consolidador, args=(job_id, files_copy, JOBS))
+        thread.daemon = True
+        thread.start()
+
+        logger.info(f"🚀 Job Consolidador {job_id} iniciado")
+
+        return jsonify({
+            "job_id": job_id,
+            "message": "Archivos recibidos correctamente",
+            "files_count": len(files)
+        }), 200
+
+    except Exception as e:
+        logger.error(f"❌ Error en upload_consolidador: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Error al procesar archivos: {str(e)}"}), 500
 
 
 @consolidador_bp.route("/status/<job_id>", methods=["GET"])
 def job_status(job_id):
-    job = JOBS.get(job_id)
-    if not job:
-        return jsonify({"error": "Job no encontrado"}), 404
-    return jsonify(job)
+    try:
+        job = JOBS.get(job_id)
+        if not job:
+            return jsonify({"error": "Job no encontrado"}), 404
+
+        return jsonify({
+            "state": job.get("state", "PENDING"),
+            "progress": job.get("progress", 0),
+            "status": job.get("status", "Procesando..."),
+            "results": job.get("results")
+        }), 200
+
+    except Exception as e:
+        logger.error(f"❌ Error en job_status: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
 
 @consolidador_bp.route("/download/<job_id>", methods=["GET"])
 def download_result(job_id):
-    job = JOBS.get(job_id)
-    if not job or job.get("status") != "completed":
-        return jsonify({"error": "El procesamiento aún no ha terminado"}), 400
+    try:
+        job = JOBS.get(job_id)
+        if not job:
+            return jsonify({"error": "Job no encontrado"}), 404
+
+        if job.get("state") != "SUCCESS":
+            return jsonify({"error": "El procesamiento aún no ha terminado"}), 400
+
+        result_file = job.get("result_file")
+        if not result_file:
+            return jsonify({"error": "Archivo de resultado no disponible"}), 404
+
+        logger.info(f"📥 Descargando consolidado anual del job {job_id}")
+        return send_file(
+            result_file,
+            as_attachment=True,
+            download_name="consolidado_anual.xlsx"
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Error en download_result: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@consolidador_bp.route("/log/<job_id>", methods=["GET"])
+def download_log(job_id):
+    try:
+        job = JOBS.get(job_id)
+        if not job:
+            return jsonify({"error": "Job no encontrado"}), 404
+
+        lines = [f"Job ID: {job_id}", f"Estado: {job.get('state')}", f"Mensaje: {job.get('status')}"]
+        results = job.get("results") or {}
+        for r in results.get("results", []):
+            detail = f"{r.get('rows')} movimientos" if r["status"] == "success" else r.get("error")
+            lines.append(f"{r['name']}: {detail}")
+        for o in results.get("overlaps", []):
+            lines.append(
+                f"Mes superpuesto {o['banco']} {o['año']}/{o['mes']}: queda {o['kept']}, "
+                f"descartadas {o['rows_dropped']} filas de {', '.join(o['dropped'])}"
+            )
+        accion = "descartados" if Config.DEDUPE_DROP else "marcados (duplicado_de)"
+        for archivo, rows in (results.get("duplicates") or {}).get("files", {}).items():
+            lines.append(f"Movimientos repetidos {accion} de {archivo}: {rows}")
+        log_buffer = BytesIO(("\n".join(lines) + "\n").encode('utf-8'))
+        return send_file(
+            log_buffer,
+            as_attachment=True,
+            download_name=f"consolidador_log_{job_id}.txt",
+            mimetype='text/plain'
+        )
 
-    from flask import send_file
-    return send_file(job["result_file"], as_attachment=True)
+    except Exception as e:
+        logger.error(f"❌ Error en download_log: {str(e)}")
+        return jsonify({"error": str(e)}), 500
@@ -1,7 +1,16 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
+import hmac
 import uuid
 import threading
+from functools import partial
+from config import Config
 from services.extractos_service import procesar_extractos
+from extractors.company_store import CompanyStore, company_slug
+from extractors.unificador import write_consolidado
+from utils.debug_capture import run_with_debug
+from utils.profiling import release_slot, reserve_slot, run_profiled
+from utils.frame_export import parse_formats
+from utils.result_archive import stream_archive
 from io import BytesIO
 import logging
 
@@ -12,12 +21,24 @@ extractos_bp = Blueprint("extractos_bp", __name__)
 # Diccionario compartido de JOBS
 JOBS = {}
 
+
+def _is_admin() -> bool:
+    """True si el request trae el X-Admin-Token configurado."""
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(Config.ADMIN_TOKEN) and hmac.compare_digest(token, Config.ADMIN_TOKEN)
+
+
+def _flag(name: str) -> bool:
+    return request.form.get(name, "").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
 @extractos_bp.route("/upload", methods=["POST", "OPTIONS"])
 def upload_extractos():
     # Manejar preflight CORS
     if request.method == 'OPTIONS':
         return '', 204
-    
+
+    reserved = False
     try:
         # CRÍTICO: El frontend envía 'files', no 'files[]'
         files = request.files.getlist("files")
@@ -28,6 +49,26 @@ def upload_extractos():
 
         logger.info(f"📦 Extractos - Recibidos {len(files)} archivos: {[f.filename for f in files]}")
 
+        # Profiling opcional (solo admin)
+        profile = _flag("profile")
+        profile_memory = _flag("profile_memory")
+        if (profile or profile_memory) and not _is_admin():
+            logger.warning("⚠️ Profiling solicitado sin token de admin válido")
+            return jsonify({"error": "Profiling requiere permisos de administrador"}), 403
+
+        # Formatos extra para consumidores automáticos (el .xlsx va siempre)
+        try:
+            formats = parse_formats(request.form.get("formats", ""))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Un job perfilado a la vez (tracemalloc/cProfile son globales al proceso)
+        if profile or profile_memory:
+            reserved = reserve_slot()
+            if not reserved:
+                logger.warning("⚠️ Ya hay un job con profiling en curso")
+                return jsonify({"error": "Ya hay un job con profiling en curso, reintentar cuando termine"}), 409
+
         # Copiar archivos en memoria para evitar que se cierren
         files_copy = []
         for f in files:
@@ -43,13 +84,28 @@ def upload_extractos():
         JOBS[job_id] = {
             "state": "PENDING",
             "progress": 0,
-            "status": "Archivos recibidos, iniciando procesamiento..."
+            "status": "Archivos recibidos, iniciando procesamiento...",
+            "formats": formats,
+            "store": _flag("store") or Config.COMPANY_STORE,
         }
 
+        # Debug de parsers al log del job (opcional)
+        target = procesar_extractos
+        if _flag("debug") or Config.DEBUG_CAPTURE:
+            target = partial(run_with_debug, procesar_extractos)
+
         # Lanzar procesamiento en thread
-        thread = threading.Thread(target=procesar_extractos, args=(job_id, files_copy, JOBS))
+        if profile or profile_memory:
+            thread = threading.Thread(
+                target=run_profiled,
+                args=(target, job_id, files_copy, JOBS),
+                kwargs={"memory": profile_memory},
+            )
+        else:
+            thread = threading.Thread(target=target, args=(job_id, files_copy, JOBS))
         thread.daemon = True
         thread.start()
+        reserved = False  # desde acá lo libera run_profiled
 
         logger.info(f"🚀 Job {job_id} iniciado")
 
@@ -60,6 +116,8 @@ def upload_extractos():
         }), 200
 
     except Exception as e:
+        if reserved:
+            release_slot()
         logger.error(f"❌ Error en upload_extractos: {str(e)}", exc_info=True)
         return jsonify({"error": f"Error al procesar archivos: {str(e)}"}), 500
 
@@ -94,6 +152,16 @@ def download_result(job_id):
         if job.get("state") != "SUCCESS":
             return jsonify({"error": "El procesamiento aún no ha terminado"}), 400
 
+        entries = job.get("result_entries")
+        if entries is not None:
+            # STREAM_RESULTS: el ZIP se arma mientras se envía
+            logger.info(f"📥 Descargando resultado del job {job_id} (streaming)")
+            return Response(
+                stream_archive(entries),
+                mimetype="application/zip",
+                headers={"Content-Disposition": 'attachment; filename="extractos_resultado.zip"'},
+            )
+
         result_file = job.get("result_file")
         if not result_file:
             return jsonify({"error": "Archivo de resultado no disponible"}), 404
@@ -110,6 +178,35 @@ def download_result(job_id):
         return jsonify({"error": str(e)}), 500
 
 
+@extractos_bp.route("/store/<empresa>", methods=["GET"])
+def download_store(empresa):
+    """Consolidado acumulado de la empresa, regenerado desde el store (solo admin)."""
+    try:
+        # El nombre de la empresa se adivina: sin token, cualquiera bajaría sus movimientos
+        if not _is_admin():
+            return jsonify({"error": "Requiere permisos de administrador"}), 403
+
+        store = CompanyStore()
+        df = store.load(empresa)
+        if df.empty:
+            return jsonify({"error": "No hay movimientos acumulados para esa empresa"}), 404
+
+        buffer = BytesIO()
+        write_consolidado(df, buffer)
+        buffer.seek(0)
+        logger.info(f"📥 Descargando acumulado de {empresa} ({len(df)} filas)")
+        return send_file(
+            buffer,
+            as_attachment=True,
+            download_name=f"acumulado_{company_slug(empresa)}.xlsx",
+            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Error en download_store: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 @extractos_bp.route("/log/<job_id>", methods=["GET"])
 def download_log(job_id):
     try:
@@ -137,4 +234,30 @@ def download_log(job_id):
         
     except Exception as e:
         logger.error(f"❌ Error en download_log: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@extractos_bp.route("/profile/<job_id>", methods=["GET"])
+def download_profile(job_id):
+    try:
+        if not _is_admin():
+            return jsonify({"error": "Requiere permisos de administrador"}), 403
+
+        job = JOBS.get(job_id)
+        if not job:
+            return jsonify({"error": "Job no encontrado"}), 404
+
+        profile_file = job.get("profile_file")
+        if not profile_file:
+            return jsonify({"error": "Profiling no disponible para este job"}), 404
+
+        logger.info(f"🔬 Descargando profiling del job {job_id}")
+        return send_file(
+            profile_file,
+            as_attachment=True,
+            download_name=f"extractos_profile_{job_id}.zip"
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Error en download_profile: {str(e)}")
+        return jsonify({"error": str(e)}), 500
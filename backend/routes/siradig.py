@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
 import uuid
 import threading
 from services.siradig_service import procesar_siradig
+from utils.result_archive import stream_archive
 from io import BytesIO
 import logging
 
@@ -88,6 +89,16 @@ def download_result(job_id):
         if job.get("state") != "SUCCESS":
             return jsonify({"error": "El procesamiento aún no ha terminado"}), 400
 
+        entries = job.get("result_entries")
+        if entries is not None:
+            # STREAM_RESULTS: el ZIP se arma mientras se envía
+            logger.info(f"📥 Descargando resultado Siradig del job {job_id} (streaming)")
+            return Response(
+                stream_archive(entries),
+                mimetype="application/zip",
+                headers={"Content-Disposition": 'attachment; filename="siradig_resultado.zip"'},
+            )
+
         result_file = job.get("result_file")
         if not result_file:
             return jsonify({"error": "Archivo de resultado no disponible"}), 404
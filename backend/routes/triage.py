@@ -0,0 +1,45 @@
+from flask import Blueprint, jsonify, request
+import logging
+import time
+
+from config import Config
+from extractors.triage import summarize, triage_many
+from utils.worker_pool import pool_workers
+
+logger = logging.getLogger(__name__)
+
+triage_bp = Blueprint("triage_bp", __name__)
+
+
+@triage_bp.route("/upload", methods=["POST", "OPTIONS"])
+def upload_triage():
+    """
+    Triage sincrónico (solo página 1 de cada PDF): banco, texto/imagen, páginas,
+    páginas a OCR y tiempo estimado, sin encolar un job de extracción.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        files = request.files.getlist("files") or request.files.getlist("files[]")
+
+        if not files:
+            logger.warning("⚠️ No se recibieron archivos en la petición")
+            return jsonify({"error": "No se enviaron archivos"}), 400
+
+        t0 = time.perf_counter()
+        items = [(f.read(), f.filename) for f in files if f.filename.lower().endswith(".pdf")]
+        jobs = pool_workers(Config.TRIAGE_WORKERS)
+        rows = triage_many(items, jobs)
+        summary = summarize(rows, jobs)
+        for f in files:
+            if not f.filename.lower().endswith(".pdf"):
+                summary["rejected"].append({"file": f.filename, "reason": "no es un PDF"})
+
+        logger.info(f"🔎 Triage: {len(rows)} PDFs en {time.perf_counter() - t0:.2f}s, "
+                    f"{summary['ocr_pages']} páginas a OCR, {len(summary['rejected'])} rechazados")
+        return jsonify({"files": rows, "summary": summary}), 200
+
+    except Exception as e:
+        logger.error(f"❌ Error en upload_triage: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Error al procesar archivos: {str(e)}"}), 500
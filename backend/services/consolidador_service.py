@@ -1,32 +1,242 @@
-import time
+# -*- coding: utf-8 -*-
+"""
+Consolidador mensual/anual
+--------------------------
+Une consolidados ya generados (00_CONSOLIDADO.xlsx, .csv, .parquet) en uno solo.
+
+  - Lectura streaming: openpyxl read_only (iter_rows) para xlsx, lector
+    columnar para csv/parquet. Todas las hojas con encabezado de movimientos
+    (un consolidado grande viene partido en "Consolidado", "Consolidado (2)"...).
+  - Archivos leídos en paralelo en el pool "excel" (Config.EXCEL_WORKERS).
+  - Merge con consolidate(): mismo orden banco → año → mes → fecha.
+  - Meses superpuestos: si el mismo extracto-mes (banco/año/mes/archivo de
+    origen) viene en más de un consolidado, queda la versión del último
+    archivo subido y se informa en los resultados del job.
+"""
+
+import io
+import logging
 import os
-import zipfile
+from concurrent.futures import as_completed
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
 from config import Config
+from utils.frame_export import HAS_PYARROW
+from utils.metrics import gauge_add, span
+from utils.result_archive import excel_workers
+from utils.worker_pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+SOURCE_COL = "__src"
+MONTH_KEYS = ["banco", "año", "mes"]
+TEXT_COLS = ("mes", "año", "periodo", "detalle", "referencia", "empresa", "banco", "archivo")
+
+
+def _fecha_text(s: pd.Series) -> pd.Series:
+    """Fechas que Excel guardó como fecha (datetime) → dd/mm/yyyy, como las deja el extractor."""
+    is_date = s.map(lambda v: isinstance(v, (datetime, date)))
+    if not is_date.any():
+        return s
+    as_text = pd.to_datetime(s.where(is_date), errors="coerce").dt.strftime("%d/%m/%Y")
+    return s.where(~is_date, as_text)
+
+
+def _read_xlsx(data: bytes) -> List[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    frames = []
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                continue
+            columns = [str(c).strip().lower() if c is not None else "" for c in header]
+            if "fecha" not in columns:
+                continue  # hoja sin movimientos (resumen, notas, ...)
+            keep = [i for i, c in enumerate(columns) if c]
+            data_rows = [[row[i] if i < len(row) else None for i in keep] for row in rows if any(v is not None for v in row)]
+            frames.append(pd.DataFrame(data_rows, columns=[columns[i] for i in keep]))
+    finally:
+        wb.close()
+    return frames
+
+
+def read_table(filename: str, data: bytes) -> pd.DataFrame:
+    """Movimientos de un consolidado subido (corre en el worker del pool)."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".xlsx":
+        frames = _read_xlsx(data)
+    elif ext == ".csv":
+        frames = [pd.read_csv(io.BytesIO(data), dtype=str, encoding="utf-8-sig")]
+    elif ext == ".parquet" and HAS_PYARROW:
+        frames = [pd.read_parquet(io.BytesIO(data))]
+    elif ext == ".xls":
+        frames = [pd.read_excel(io.BytesIO(data))]  # requiere xlrd
+    else:
+        raise ValueError(f"Formato no soportado: {ext or filename}")
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if "fecha" in df.columns:
+        df["fecha"] = _fecha_text(df["fecha"])
+    for col in TEXT_COLS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def _read_all(files: List[Dict], JOBS, job_id) -> Tuple[Dict[int, pd.DataFrame], Dict[int, str]]:
+    """Lee los archivos en paralelo; devuelve {índice: DataFrame} y marca errores por archivo."""
+    frames, errores = {}, {}
+    total = len(files)
+    workers = excel_workers()
+
+    def done(i, df=None, error=None):
+        if error is not None:
+            errores[i] = error
+            logger.error(f"  ❌ {files[i]['filename']}: {error}")
+        else:
+            frames[i] = df
+            logger.info(f"  ✅ {files[i]['filename']}: {len(df)} movimientos")
+        n = len(frames) + len(errores)
+        JOBS[job_id]["status"] = f"Leyendo {n}/{total}: {files[i]['filename']}"
+        JOBS[job_id]["progress"] = 5 + int(n / total * 70)
+
+    with span("consolidador_read"):
+        if workers > 1 and total > 1:
+            pool = get_pool("excel", workers)
+            futures = {pool.submit(read_table, f["filename"], f["content"].getvalue()): i for i, f in enumerate(files)}
+            for fut in as_completed(futures):
+                try:
+                    done(futures[fut], fut.result())
+                except Exception as e:
+                    done(futures[fut], error=str(e))
+        else:
+            for i, f in enumerate(files):
+                try:
+                    done(i, read_table(f["filename"], f["content"].getvalue()))
+                except Exception as e:
+                    done(i, error=str(e))
+    return frames, errores
+
+
+def split_statements(df: pd.DataFrame, source: int, filename: str) -> List[Dict]:
+    """
+    Un consolidado trae muchos extractos; consolidate() recibe uno por input
+    (banco/período escalares), así que se separa por banco/año/mes/archivo.
+    """
+    df = df.assign(**{SOURCE_COL: source})
+    keys = [k for k in MONTH_KEYS + ["archivo"] if k in df.columns]
+    if not keys:
+        return [{"df": df, "meta": {"filename": filename}}]
+    return [
+        {"df": part, "meta": {"filename": filename}}
+        for _, part in df.groupby(keys, sort=False, dropna=False)
+    ]
+
+
+def drop_overlapping_months(df: pd.DataFrame, filenames: List[str]) -> Tuple[pd.DataFrame, List[Dict]]:
+    """
+    Un mismo extracto-mes presente en varios consolidados queda solo en el
+    último subido. Vectorizado: por grupo, fuente máxima; el resto se descarta.
+    """
+    keys = MONTH_KEYS + (["archivo"] if "archivo" in df.columns else [])
+    grouped = df.groupby(keys, sort=False, dropna=False)[SOURCE_COL]
+    latest = grouped.transform("max")
+    keep = df[SOURCE_COL] == latest
+
+    overlaps = []
+    if not keep.all():
+        dropped = df.loc[~keep, keys + [SOURCE_COL]]
+        for key, g in dropped.groupby(keys, sort=True, dropna=False):
+            key = key if isinstance(key, tuple) else (key,)
+            kept_src = int(latest[g.index[0]])
+            overlaps.append({
+                **{k: (v.item() if hasattr(v, "item") else v) for k, v in zip(keys, key)},
+                "kept": filenames[kept_src],
+                "dropped": [filenames[s] for s in sorted(g[SOURCE_COL].unique())],
+                "rows_dropped": len(g),
+            })
+    return df[keep], overlaps
+
 
 def procesar_consolidador(job_id, files, JOBS):
+    """Consolida los consolidados subidos en consolidado_anual.xlsx."""
+    gauge_add("tga_jobs_active", 1, tool="consolidador")
     try:
-        JOBS[job_id]["status"] = "processing"
-        total = len(files)
-
-        output_zip_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_consolidado.zip")
-        with zipfile.ZipFile(output_zip_path, "w") as zipf:
-            for i, file in enumerate(files, 1):
-                temp_path = os.path.join(Config.UPLOAD_FOLDER, file.filename)
-                file.save(temp_path)
-
-                # Simular procesamiento (espera breve)
-                time.sleep(2)
-                JOBS[job_id]["progress"] = int((i / total) * 100)
-                JOBS[job_id]["message"] = f"Procesando {i}/{total}: {file.filename}"
-
-                zipf.write(temp_path, arcname=file.filename)
-                os.remove(temp_path)
-
-        JOBS[job_id]["status"] = "completed"
-        JOBS[job_id]["result_file"] = output_zip_path
-        JOBS[job_id]["message"] = "Consolidación completada"
+        from extractors.unificador import consolidate, dedupe_movements, write_consolidado
+
+        logger.info(f"🚀 Iniciando Consolidador - Job {job_id} ({len(files)} archivos)")
+        os.makedirs(Config.OUTPUT_FOLDER, exist_ok=True)
+        JOBS[job_id]["state"] = "PROGRESS"
+        JOBS[job_id]["status"] = "Leyendo consolidados..."
+        JOBS[job_id]["progress"] = 5
+
+        filenames = [f["filename"] for f in files]
+        frames, errores = _read_all(files, JOBS, job_id)
+
+        JOBS[job_id]["status"] = "Consolidando..."
+        JOBS[job_id]["progress"] = 80
+        inputs = [
+            item for i in sorted(frames) if not frames[i].empty
+            for item in split_statements(frames[i], i, filenames[i])
+        ]
+        df_all = consolidate(inputs)
+        overlaps = []
+        if not df_all.empty:
+            df_all, overlaps = drop_overlapping_months(df_all, filenames)
+            df_all = df_all.drop(columns=[SOURCE_COL]).reset_index(drop=True)
+        for o in overlaps:
+            logger.info(f"  🔁 {o['banco']} {o['año']}/{o['mes']}: queda {o['kept']}, se descartan {o['rows_dropped']} filas de {o['dropped']}")
+
+        # Movimientos repetidos entre extractos distintos (ENE-JUN + JUN-JUL)
+        duplicados = {"rows": 0, "files": {}}
+        if Config.DEDUPE_MOVEMENTS and not df_all.empty:
+            df_all, df_dup = dedupe_movements(df_all, drop=Config.DEDUPE_DROP)
+            if len(df_dup):
+                duplicados["rows"] = len(df_dup)
+                duplicados["files"] = df_dup["archivo"].astype(str).value_counts().to_dict()
+                logger.info(f"  🔁 {len(df_dup)} movimientos repetidos entre extractos: {duplicados['files']}")
+
+        output_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_consolidado_anual.xlsx")
+        with span("excel_write"):
+            write_consolidado(df_all, output_path)
+
+        JOBS[job_id]["state"] = "SUCCESS"
+        JOBS[job_id]["result_file"] = output_path
         JOBS[job_id]["progress"] = 100
+        JOBS[job_id]["status"] = (
+            f"✅ Completado: {len(df_all)} movimientos de {len(frames)} archivos"
+            + (f" ({len(errores)} con errores)" if errores else "")
+        )
+        JOBS[job_id]["results"] = {
+            "total": len(files),
+            "success": len(frames),
+            "errors": len(errores),
+            "results": [
+                {"name": filenames[i], "status": "success", "rows": len(frames[i])} for i in sorted(frames)
+            ] + [
+                {"name": filenames[i], "status": "error", "error": err} for i, err in sorted(errores.items())
+            ],
+            "rows": len(df_all),
+            "overlaps": overlaps,
+            "duplicates": duplicados,
+        }
+        logger.info(f"🎉 Job Consolidador {job_id} completado: {len(df_all)} movimientos")
 
     except Exception as e:
-        JOBS[job_id]["status"] = "error"
-        JOBS[job_id]["message"] = f"Error: {str(e)}"
+        logger.error(f"❌ Error fatal Consolidador: {e}", exc_info=True)
+        JOBS[job_id]["state"] = "FAILURE"
+        JOBS[job_id]["status"] = f"❌ Error: {str(e)}"
+        JOBS[job_id]["progress"] = 0
+    finally:
+        gauge_add("tga_jobs_active", -1, tool="consolidador")
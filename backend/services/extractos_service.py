@@ -1,15 +1,54 @@
 import os
-import zipfile
 import logging
 from pathlib import Path
 import pandas as pd
 from config import Config
+import time
 import traceback
+from utils.frame_export import frame_entries
+from utils.result_archive import build_archive, excel_entry
+from utils.metrics import collect_stages, gauge_add, inc
 
 logger = logging.getLogger(__name__)
 
+
+def _store_entries(resultados, formats):
+    """Suma los extractos al store de su empresa y devuelve el acumulado regenerado de cada una."""
+    from extractors.company_store import CompanyStore, company_slug
+    from extractors.unificador import DUPLICATE_OF, consolidado_columns, dedupe_movements
+
+    store = CompanyStore()
+    por_empresa = {}
+    for resultado in resultados:
+        empresa = resultado["meta"].get("empresa")
+        if empresa:
+            por_empresa.setdefault(empresa, []).append(resultado)
+        else:
+            logger.warning(f"  ⚠️ {resultado['meta'].get('filename')}: sin empresa en el nombre, no se acumula")
+
+    for empresa, items in por_empresa.items():
+        # Un error del store (disco, tipos en parquet) no puede tirar el ZIP del job:
+        # los individuales y el consolidado ya están escritos o en el pool
+        try:
+            store.append(empresa, items)
+            df_acumulado = store.load(empresa)
+            if Config.DEDUPE_MOVEMENTS:
+                df_acumulado, df_dup = dedupe_movements(df_acumulado, drop=Config.DEDUPE_DROP)
+                if len(df_dup):
+                    logger.info(f"🔁 Acumulado {empresa}: {len(df_dup)} movimientos repetidos entre archivos")
+        except Exception as e:
+            logger.error(f"❌ No se pudo actualizar el acumulado de {empresa}: {e}", exc_info=True)
+            continue
+        logger.info(f"🗄️ Acumulado {empresa}: {len(df_acumulado)} filas")
+        name = f"00_ACUMULADO_{company_slug(empresa)}"
+        columns = consolidado_columns(df_acumulado)
+        yield excel_entry(f"{name}.xlsx", df_acumulado, "Consolidado", columns, highlight=DUPLICATE_OF)
+        yield from frame_entries(name, df_acumulado, formats, columns)
+
+
 def procesar_extractos(job_id, files, JOBS):
     """Procesa extractos bancarios usando UniversalExtractor."""
+    gauge_add("tga_jobs_active", 1, tool="extractos")
     try:
         logger.info(f"🚀 Iniciando procesamiento - Job {job_id} ({len(files)} archivos)")
 
@@ -23,7 +62,7 @@ def procesar_extractos(job_id, files, JOBS):
         # Importar extractor
         logger.info("📦 Importando UniversalExtractor...")
         from extractors.universal_extractor import UniversalExtractor
-        from extractors.unificador import consolidate
+        from extractors.unificador import DUPLICATE_OF, consolidate, consolidado_columns, dedupe_movements
         logger.info("✅ Imports completados")
 
         extractor = UniversalExtractor()
@@ -32,6 +71,7 @@ def procesar_extractos(job_id, files, JOBS):
         total = len(files)
         resultados = []
         errores = []
+        tiempos = {}  # filename → {"stages", "pages", "ocr", "seconds"}
 
         # Procesar cada archivo
         for i, file_dict in enumerate(files, 1):
@@ -53,12 +93,21 @@ def procesar_extractos(job_id, files, JOBS):
                 logger.info(f"  🔍 Llamando a extract_from_pdf()...")
                 
                 # PROCESAR CON UNIVERSAL EXTRACTOR
-                result = extractor.extract_from_pdf(temp_path, filename_hint=filename)
+                t0 = time.perf_counter()
+                with collect_stages() as file_stages:
+                    result = extractor.extract_from_pdf(temp_path, filename_hint=filename)
+                tiempos[filename] = {
+                    "seconds": round(time.perf_counter() - t0, 3),
+                    "pages": result.get("pages_count", 0),
+                    "ocr": result.get("method", {}).get("ocr", False),
+                    "stages": file_stages,
+                }
                 
                 logger.info(f"  ✅ extract_from_pdf() completado")
                 logger.info(f"  📊 Resultado keys: {list(result.keys())}")
                 
                 metadata = result.get("metadata", {})
+                context = result.get("context")
                 tables = result.get("tables", [])
                 bank_hint = result.get("bank_hint", "DESCONOCIDO")
                 
@@ -78,7 +127,12 @@ def procesar_extractos(job_id, files, JOBS):
                                     "bank": bank_hint,
                                     "filename": filename,
                                     "empresa": metadata.get("empresa", ""),
-                                    "periodo": metadata.get("periodo", "")
+                                    "periodo": metadata.get("periodo", ""),
+                                    # Del pre-pass: evita que consolidate re-infiera el período
+                                    "year": context.year if context else None,
+                                    "month": context.month if context else None,
+                                    "currency": context.currency if context else "ARS",
+                                    "account": context.account if context else "",
                                 }
                             })
                             logger.info(f"  ✅ {filename}: {len(df)} movimientos | {bank_hint}")
@@ -111,55 +165,67 @@ def procesar_extractos(job_id, files, JOBS):
         JOBS[job_id]["progress"] = 85
 
         output_zip_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_extractos.zip")
+        formats = JOBS[job_id].get("formats") or ["xlsx"]  # + csv/parquet/feather si se pidieron
+        entries = []
+        duplicados = {"rows": 0, "files": {}}
 
-        if resultados:
-            try:
-                logger.info(f"📊 Consolidando {len(resultados)} extractos...")
-                
-                # Crear ZIP
-                with zipfile.ZipFile(output_zip_path, "w") as zipf:
-                    # 1️⃣ AGREGAR EXCEL INDIVIDUALES
-                    for idx, resultado in enumerate(resultados, 1):
-                        df_individual = resultado["df"]
-                        meta = resultado["meta"]
-                        filename = meta.get("filename", f"extracto_{idx}.pdf")
-                        
-                        # Nombre del Excel individual (sin .pdf)
-                        excel_name = filename.replace(".pdf", ".xlsx").replace(".PDF", ".xlsx")
-                        
-                        # Guardar Excel individual temporalmente
-                        temp_excel = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_{excel_name}")
-                        df_individual.to_excel(temp_excel, index=False, sheet_name=meta.get("banco", "Extracto"))
-                        
-                        # Agregar al ZIP
-                        zipf.write(temp_excel, arcname=excel_name)
-                        
-                        # Limpiar temporal
-                        os.remove(temp_excel)
-                        logger.info(f"  ✅ Agregado al ZIP: {excel_name}")
-                    
-                    # 2️⃣ AGREGAR CONSOLIDADO
-                    consolidated_excel = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_consolidado.xlsx")
-                    df_consolidado = consolidate(resultados, output_path=consolidated_excel)
-                    
-                    logger.info(f"📊 DataFrame consolidado: {len(df_consolidado)} filas")
-                    
-                    # Agregar consolidado al ZIP
-                    zipf.write(consolidated_excel, arcname="00_CONSOLIDADO.xlsx")
-                    
-                    # Limpiar consolidado temporal
-                    os.remove(consolidated_excel)
-                
-                logger.info(f"✅ ZIP creado con {len(resultados)} individuales + 1 consolidado")
-                
-            except Exception as e:
-                logger.error(f"❌ Error consolidando: {e}", exc_info=True)
-                with zipfile.ZipFile(output_zip_path, "w") as zipf:
-                    pass
-        else:
-            logger.warning("⚠️ No hay resultados para consolidar")
-            with zipfile.ZipFile(output_zip_path, "w") as zipf:
-                pass
+        def result_entries():
+            """Excel individuales y después el consolidado, que se calcula mientras el pool ya renderiza los primeros."""
+            # 1️⃣ EXCEL INDIVIDUALES (cada uno directo a su entrada del ZIP)
+            for idx, resultado in enumerate(resultados, 1):
+                meta = resultado["meta"]
+                filename = meta.get("filename", f"extracto_{idx}.pdf")
+                # Nombre del Excel individual (sin .pdf)
+                excel_name = filename.replace(".pdf", ".xlsx").replace(".PDF", ".xlsx")
+                yield excel_entry(excel_name, resultado["df"], meta.get("banco", "Extracto"))
+                yield from frame_entries(os.path.splitext(excel_name)[0], resultado["df"], formats)
+
+            # 2️⃣ CONSOLIDADO
+            df_consolidado = consolidate(resultados)
+            logger.info(f"📊 DataFrame consolidado: {len(df_consolidado)} filas")
+            df_duplicados = None
+            if Config.DEDUPE_MOVEMENTS:
+                df_consolidado, df_duplicados = dedupe_movements(df_consolidado, drop=Config.DEDUPE_DROP)
+            columns = consolidado_columns(df_consolidado)
+            yield excel_entry("00_CONSOLIDADO.xlsx", df_consolidado, "Consolidado", columns, highlight=DUPLICATE_OF)
+            yield from frame_entries("00_CONSOLIDADO", df_consolidado, formats, columns)
+
+            # Movimientos repetidos entre extractos superpuestos: marcados en el consolidado
+            # (con DEDUPE_DROP, fuera de él) y además listados aparte
+            if df_duplicados is not None and len(df_duplicados):
+                duplicados["rows"] = len(df_duplicados)
+                duplicados["files"] = df_duplicados["archivo"].astype(str).value_counts().to_dict()
+                logger.info(f"🔁 {len(df_duplicados)} movimientos repetidos entre extractos: {duplicados['files']}")
+                yield excel_entry("00_DUPLICADOS.xlsx", df_duplicados, "Duplicados", consolidado_columns(df_duplicados))
+
+            # 3️⃣ ACUMULADO POR EMPRESA (solo particiones nuevas; el resto sale del store)
+            if JOBS[job_id].get("store"):
+                yield from _store_entries(resultados, formats)
+
+        with collect_stages() as job_stages:
+            if resultados:
+                try:
+                    logger.info(f"📊 Consolidando {len(resultados)} extractos...")
+                    if Config.STREAM_RESULTS:
+                        entries = list(result_entries())
+                    else:
+                        build_archive(output_zip_path, result_entries())
+                        logger.info(f"✅ ZIP creado con {len(resultados)} individuales + 1 consolidado")
+
+                except Exception as e:
+                    logger.error(f"❌ Error consolidando: {e}", exc_info=True)
+                    entries = []
+                    if not Config.STREAM_RESULTS:
+                        build_archive(output_zip_path, entries)
+            else:
+                logger.warning("⚠️ No hay resultados para consolidar")
+                if not Config.STREAM_RESULTS:
+                    build_archive(output_zip_path, entries)
+
+        if Config.STREAM_RESULTS:
+            # El ZIP se genera al descargar (/download/<job_id>), sin archivo en OUTPUT_FOLDER
+            JOBS[job_id]["result_entries"] = entries
+            output_zip_path = None
 
         # COMPLETADO
         JOBS[job_id]["state"] = "SUCCESS"
@@ -174,14 +240,20 @@ def procesar_extractos(job_id, files, JOBS):
         else:
             JOBS[job_id]["status"] = f"✅ Completado: {success_count} extractos procesados"
         
+        inc("tga_files_total", success_count, tool="extractos", result="success")
+        inc("tga_files_total", error_count, tool="extractos", result="error")
+
         JOBS[job_id]["results"] = {
             "total": total,
             "success": success_count,
             "errors": error_count,
             "results": [
-                {"name": r["meta"]["filename"], "status": "success", "banco": r["meta"]["bank"]}
+                {"name": r["meta"]["filename"], "status": "success", "banco": r["meta"]["bank"],
+                 **tiempos.get(r["meta"]["filename"], {})}
                 for r in resultados
-            ] + errores
+            ] + [{**e, **tiempos.get(e["name"], {})} for e in errores],
+            "stages": job_stages,
+            "duplicates": duplicados,
         }
 
         logger.info(f"🎉 Job {job_id} completado: {success_count} OK, {error_count} errores")
@@ -193,4 +265,6 @@ def procesar_extractos(job_id, files, JOBS):
         
         JOBS[job_id]["state"] = "FAILURE"
         JOBS[job_id]["status"] = f"❌ Error: {str(e)}"
-        JOBS[job_id]["progress"] = 0
\ No newline at end of file
+        JOBS[job_id]["progress"] = 0
+    finally:
+        gauge_add("tga_jobs_active", -1, tool="extractos")
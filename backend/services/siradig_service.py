@@ -1,14 +1,16 @@
 import os
-import zipfile
 import logging
 from pathlib import Path
 import pandas as pd
 from config import Config
+from utils.result_archive import build_archive, excel_entry
+from utils.metrics import gauge_add, span
 
 logger = logging.getLogger(__name__)
 
 def procesar_siradig(job_id, files, JOBS):
     """Procesa formularios F.572 SIRADIG."""
+    gauge_add("tga_jobs_active", 1, tool="siradig")
     try:
         logger.info(f"🚀 Iniciando SIRADIG - Job {job_id} ({len(files)} archivos)")
 
@@ -44,7 +46,8 @@ def procesar_siradig(job_id, files, JOBS):
                     f.write(content.read())
                 
                 # PROCESAR CON SIRADIG PARSER
-                df_result = procesar_pdf(temp_path)
+                with span("siradig_parser"):
+                    df_result = procesar_pdf(temp_path)
                 
                 if not df_result.empty:
                     all_dataframes.append(df_result)
@@ -67,29 +70,30 @@ def procesar_siradig(job_id, files, JOBS):
         
         output_zip_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_siradig.zip")
         
+        entries = []
         if all_dataframes:
             try:
                 # Consolidar todos los DataFrames
                 df_consolidado = pd.concat(all_dataframes, ignore_index=True)
-                
-                # Guardar Excel consolidado
-                consolidated_excel = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_siradig_consolidado.xlsx")
-                df_consolidado.to_excel(consolidated_excel, index=False, sheet_name="SIRADIG")
-                
-                # Crear ZIP
-                with zipfile.ZipFile(output_zip_path, "w") as zipf:
-                    zipf.write(consolidated_excel, arcname="siradig_consolidado.xlsx")
-                
-                os.remove(consolidated_excel)
+                entries = [excel_entry("siradig_consolidado.xlsx", df_consolidado, "SIRADIG")]
+
+                # Excel consolidado directo a su entrada del ZIP
+                if not Config.STREAM_RESULTS:
+                    build_archive(output_zip_path, entries)
                 logger.info(f"✅ Consolidado SIRADIG: {len(df_consolidado)} registros")
-                
+
             except Exception as e:
                 logger.error(f"❌ Error consolidando SIRADIG: {e}", exc_info=True)
-                with zipfile.ZipFile(output_zip_path, "w") as zipf:
-                    pass
-        else:
-            with zipfile.ZipFile(output_zip_path, "w") as zipf:
-                pass
+                entries = []
+                if not Config.STREAM_RESULTS:
+                    build_archive(output_zip_path, entries)
+        elif not Config.STREAM_RESULTS:
+            build_archive(output_zip_path, entries)
+
+        if Config.STREAM_RESULTS:
+            # El ZIP se genera al descargar (/download/<job_id>), sin archivo en OUTPUT_FOLDER
+            JOBS[job_id]["result_entries"] = entries
+            output_zip_path = None
 
         # COMPLETADO
         JOBS[job_id]["state"] = "SUCCESS"
@@ -120,4 +124,6 @@ def procesar_siradig(job_id, files, JOBS):
         logger.error(f"❌ Error fatal SIRADIG: {e}", exc_info=True)
         JOBS[job_id]["state"] = "FAILURE"
         JOBS[job_id]["status"] = f"❌ Error: {str(e)}"
-        JOBS[job_id]["progress"] = 0
\ No newline at end of file
+        JOBS[job_id]["progress"] = 0
+    finally:
+        gauge_add("tga_jobs_active", -1, tool="siradig")
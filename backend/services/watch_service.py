@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Carpeta vigilada (modo daemon)
+------------------------------
+Los clientes dejan extractos en una carpeta compartida (Config.WATCH_FOLDER);
+este proceso los levanta solo, sin que nadie los suba a mano:
+
+  - Escaneo por polling cada WATCH_INTERVAL segundos (sin dependencias de
+    notificaciones del sistema: funciona igual en carpetas de red).
+  - Debounce: un PDF se procesa recién cuando su tamaño y mtime no cambiaron
+    durante WATCH_SETTLE_SECONDS (copias a medio escribir no se tocan).
+  - Hash: el manifest de extractors.batch hace de caché de extracción. Un
+    archivo ya procesado no se re-extrae, y el mismo PDF dejado con otro
+    nombre se registra como "duplicate" sin procesarse de nuevo (también si
+    llega en el mismo escaneo que la original: espera a que ésta termine).
+  - Extracción en el pool "batch" (WATCH_WORKERS procesos), pocos archivos en
+    vuelo a la vez: la memoria no crece con la cantidad de PDFs.
+  - Salida espejo en WATCH_OUTPUT_FOLDER: un .xlsx por PDF y un
+    00_CONSOLIDADO.xlsx por carpeta, armado con el store incremental
+    (extractors.company_store): cada PDF nuevo reescribe solo sus particiones.
+    Un PDF re-copiado con cambios reemplaza sus filas; borrarlo de la carpeta
+    no lo saca del consolidado. Si el store falla, el PDF no se registra en
+    el manifest y se reintenta en el próximo escaneo.
+
+    python -m services.watch_service            # loop hasta Ctrl+C / SIGTERM
+    python -m services.watch_service --once     # un escaneo y sale
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import Config
+from extractors.batch import MANIFEST_NAME, BatchManifest, extract_pdf, find_pdfs, output_for, process_in_pool
+from extractors.company_store import CompanyStore
+from utils.worker_pool import get_pool, pool_workers
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = ".store"
+CONSOLIDADO_NAME = "00_CONSOLIDADO.xlsx"
+ROOT_KEY = "_raiz"  # carpeta raíz de WATCH_FOLDER en el store
+
+
+def folder_key(rel: Path) -> str:
+    parent = rel.parent.as_posix()
+    return ROOT_KEY if parent in ("", ".") else parent
+
+
+class FolderWatcher:
+    def __init__(self, watch_dir: str, output_dir: str, workers: int = 1,
+                 settle_seconds: float = 10.0):
+        self.watch_dir = Path(watch_dir)
+        self.output_dir = Path(output_dir)
+        self.workers = workers
+        self.settle_seconds = settle_seconds
+        self.manifest = BatchManifest(self.output_dir / MANIFEST_NAME)
+        self.manifest.compact()
+        self.store = CompanyStore(str(self.output_dir / STORE_DIR))
+        self._seen: Dict[str, Tuple[int, int, float]] = {}  # ruta → (size, mtime_ns, desde cuándo no cambia)
+
+    # ------------------------------------------------------------------
+    # Escaneo
+    # ------------------------------------------------------------------
+    def scan(self) -> List[Path]:
+        """PDFs nuevos o modificados cuya copia ya terminó (debounce)."""
+        now = time.time()
+        ready, present = [], set()
+        for pdf in find_pdfs(self.watch_dir):
+            key = pdf.relative_to(self.watch_dir).as_posix()
+            try:
+                st = pdf.stat()
+            except OSError:
+                continue  # borrado entre el listado y el stat
+            present.add(key)
+            record = self.manifest.get(key)
+            if record and record.get("size") == st.st_size and record.get("mtime_ns") == st.st_mtime_ns:
+                continue  # ya visto tal cual (los errores se reintentan si el archivo cambia)
+
+            signature = (st.st_size, st.st_mtime_ns)
+            previous = self._seen.get(key)
+            if previous is None or previous[:2] != signature:
+                self._seen[key] = (*signature, now)
+                continue
+            if now - previous[2] >= self.settle_seconds and now - st.st_mtime >= self.settle_seconds:
+                ready.append(pdf)
+
+        for key in set(self._seen) - present:
+            del self._seen[key]
+        return ready
+
+    # ------------------------------------------------------------------
+    # Procesamiento
+    # ------------------------------------------------------------------
+    def process(self, pdfs: List[Path]) -> Dict:
+        summary = {"ok": 0, "empty": 0, "error": 0, "duplicate": 0, "unchanged": 0}
+        dirty: Set[str] = set()
+        pool = get_pool("batch", self.workers) if self.workers > 1 else None
+        pending: Dict[object, Tuple[Dict, Path]] = {}
+        in_flight: Dict[str, str] = {}  # sha256 → ruta enviada al pool en este lote
+        waiting: Dict[str, List[Tuple[Dict, Path]]] = {}  # copias del mismo contenido que esperan a la original
+
+        def done(base: Dict, rel: Path, record: Dict, df=None) -> None:
+            record = {**base, **record, "finished": datetime.now().isoformat(timespec="seconds")}
+            if record["status"] != "ok":
+                record["output"] = ""
+            if df is not None and not self._store(rel, record, df, dirty):
+                # Sin registro en el manifest: el próximo escaneo lo vuelve a procesar
+                summary["error"] += 1
+                record["status"] = "error"
+            else:
+                self.manifest.append(record)
+                self._seen.pop(record["path"], None)
+                summary[record["status"]] += 1
+                icon = {"ok": "✅", "empty": "⚠️", "error": "❌", "duplicate": "🔁"}[record["status"]]
+                logger.info(f"  {icon} {record['path']}: {record['status']} ({record.get('rows', 0)} filas)")
+            if in_flight.get(record["sha256"]) == record["path"]:
+                del in_flight[record["sha256"]]
+                for copy_base, copy_rel in waiting.pop(record["sha256"], []):
+                    if record["status"] == "ok":
+                        done(copy_base, copy_rel, {"status": "duplicate", "duplicate_of": record["path"], "rows": 0})
+                    else:  # sin registro: el próximo escaneo la procesa como archivo propio
+                        logger.info(f"  ⏭️ {copy_base['path']}: la original {record['path']} no salió ok, se reintenta")
+
+        def drain(block_until: int) -> None:
+            while pending:
+                finished, _ = wait(list(pending), timeout=None if len(pending) > block_until else 0,
+                                   return_when=FIRST_COMPLETED)
+                if not finished:
+                    return
+                for fut in finished:
+                    base, rel = pending.pop(fut)
+                    try:
+                        record, df = fut.result()
+                    except Exception as e:
+                        record, df = {"status": "error", "rows": 0, "error": str(e)}, None
+                    done(base, rel, record, df)
+
+        for pdf in pdfs:
+            rel = pdf.relative_to(self.watch_dir)
+            key = rel.as_posix()
+            try:
+                sha256, st = self.manifest.digest(key, pdf)
+            except OSError:
+                continue
+            output_file = output_for(rel, self.output_dir)
+            base = {
+                "path": key, "sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                "output": output_file.relative_to(self.output_dir).as_posix(),
+            }
+
+            # Caché por contenido: mismo PDF con otro nombre, o el mismo re-copiado sin cambios
+            same = self.manifest.find_sha(sha256)
+            if same and same["path"] != key:
+                done(base, rel, {"status": "duplicate", "duplicate_of": same["path"], "rows": 0})
+                continue
+            if sha256 in in_flight:  # el mismo PDF dejado dos veces en el mismo escaneo
+                waiting.setdefault(sha256, []).append((base, rel))
+                continue
+            if self.manifest.is_done(key, sha256, self.output_dir):
+                self.manifest.append({**self.manifest.get(key), **base})  # nueva firma, mismo contenido
+                self._seen.pop(key, None)
+                summary["unchanged"] += 1
+                continue
+
+            if pool is None:
+                done(base, rel, *extract_pdf(str(pdf), str(output_file)))
+                continue
+            pending[pool.submit(process_in_pool, str(pdf), str(output_file), True)] = (base, rel)
+            in_flight[sha256] = key
+            drain(block_until=self.workers * 2 - 1)
+        drain(block_until=0)
+
+        for folder in sorted(dirty):
+            try:
+                self.write_consolidado(folder)
+            except Exception as e:  # las demás carpetas se escriben igual; el store ya tiene las filas
+                logger.error(f"❌ No se pudo escribir el consolidado de {folder}: {e}", exc_info=True)
+        return summary
+
+    def _store(self, rel: Path, record: Dict, df, dirty: Set[str]) -> bool:
+        """Guarda los movimientos del PDF en el store de su carpeta; False si falla."""
+        folder = folder_key(rel)
+        try:
+            self.store.append(folder, [{"df": df, "meta": {
+                "bank": record.get("bank"),
+                "filename": rel.name,
+                "year": record.get("year"),
+                "month": record.get("month"),
+                "currency": record.get("currency", "ARS"),
+                "account": record.get("account", ""),
+            }}])
+        except Exception as e:  # disco lleno, tipos que el formato no acepta...
+            logger.error(f"  ❌ {record['path']}: no se pudo guardar en el store ({e}), se reintenta", exc_info=True)
+            return False
+        dirty.add(folder)
+        return True
+
+    def write_consolidado(self, folder: str) -> Path:
+        """00_CONSOLIDADO.xlsx de la carpeta, desde las particiones del store."""
+        from extractors.unificador import dedupe_movements, write_consolidado
+
+        df = self.store.load(folder)
+        if Config.DEDUPE_MOVEMENTS and not df.empty:
+            df, duplicates = dedupe_movements(df, drop=Config.DEDUPE_DROP)
+            if len(duplicates):
+                logger.info(f"🔁 {folder}: {len(duplicates)} movimientos repetidos entre extractos")
+        target_dir = self.output_dir if folder == ROOT_KEY else self.output_dir / folder
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / CONSOLIDADO_NAME
+        tmp = target.with_name(target.name + ".tmp")
+        write_consolidado(df, str(tmp))
+        os.replace(tmp, target)  # quien abra la carpeta nunca ve un consolidado a medio escribir
+        logger.info(f"📊 {target.relative_to(self.output_dir)}: {len(df)} movimientos")
+        return target
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+    def run_once(self) -> Optional[Dict]:
+        ready = self.scan()
+        if not ready:
+            return None
+        logger.info(f"📥 {len(ready)} PDF(s) nuevos en {self.watch_dir}")
+        summary = self.process(ready)
+        logger.info(f"✅ Lote terminado: {summary}")
+        return summary
+
+    def run_forever(self, interval: float, stop: threading.Event) -> None:
+        logger.info(f"👀 Vigilando {self.watch_dir} → {self.output_dir} (cada {interval}s, {self.workers} proceso(s))")
+        while not stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:  # un lote con problemas no tira abajo el daemon
+                logger.error(f"❌ Error en el escaneo: {e}", exc_info=True)
+            stop.wait(interval)
+        logger.info("🛑 Watcher detenido")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Procesa los PDFs que aparecen en una carpeta vigilada")
+    ap.add_argument("--folder", default=Config.WATCH_FOLDER, help="Carpeta a vigilar (WATCH_FOLDER)")
+    ap.add_argument("--output", default=Config.WATCH_OUTPUT_FOLDER, help="Salida espejo (WATCH_OUTPUT_FOLDER)")
+    ap.add_argument("--interval", type=float, default=Config.WATCH_INTERVAL)
+    ap.add_argument("--settle", type=float, default=Config.WATCH_SETTLE_SECONDS)
+    ap.add_argument("--workers", type=int, default=Config.WATCH_WORKERS, help="0 = un proceso por CPU")
+    ap.add_argument("--once", action="store_true", help="Un solo escaneo (sin debounce entre escaneos)")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if not args.folder or not os.path.isdir(args.folder):
+        logger.error(f"❌ Carpeta a vigilar inválida: {args.folder!r} (configurar WATCH_FOLDER o --folder)")
+        return 2
+
+    watcher = FolderWatcher(args.folder, args.output, workers=pool_workers(args.workers),
+                            settle_seconds=args.settle)
+    if args.once:
+        watcher.settle_seconds = 0
+        watcher.scan()  # primera pasada: registra firmas
+        watcher.run_once()
+        return 0
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        watcher.run_forever(args.interval, stop)
+    except KeyboardInterrupt:
+        stop.set()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
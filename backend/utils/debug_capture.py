@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Captura de debug por job
+------------------------
+Reemplaza los print()/dumps a disco de los parsers. Apagada por defecto:
+dbg() solo consulta un contextvar y vuelve, sin formatear ni escribir nada.
+
+Con la captura activa (form flag `debug=1` en el upload o DEBUG_CAPTURE=1),
+los mensajes van a un ring buffer acotado en memoria y al terminar el job se
+vuelcan al log del job ({job_id}_log.txt), que se descarga por /log/<job_id>.
+
+    from utils.debug_capture import dbg, debug_enabled
+
+    dbg("comafi", "%d movimientos detectados", len(movs))   # formateo perezoso
+    if debug_enabled():                                       # dumps caros
+        dbg("comafi", "DF final:\\n%s", df.to_string())
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class DebugCapture:
+    """Ring buffer de mensajes de debug: guarda los últimos `max_records`."""
+
+    def __init__(self, max_records: int = None):
+        self.records = deque(maxlen=max_records or Config.DEBUG_CAPTURE_MAX_RECORDS)
+        self.total = 0
+        self.t0 = time.perf_counter()
+
+    def add(self, source: str, message: str, args: tuple) -> None:
+        self.records.append((time.perf_counter() - self.t0, source, message, args))
+        self.total += 1
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.records)
+
+    def render(self) -> str:
+        out = []
+        if self.dropped:
+            out.append(f"... {self.dropped} mensajes anteriores descartados (buffer de {self.records.maxlen})")
+        for elapsed, source, message, args in self.records:
+            try:
+                text = message % args if args else message
+            except Exception:
+                text = f"{message} {args!r}"
+            out.append(f"[{elapsed:8.3f}s] {source}: {text}")
+        return "\n".join(out) + "\n"
+
+
+_current: ContextVar[Optional[DebugCapture]] = ContextVar("tga_debug_capture", default=None)
+
+
+def debug_enabled() -> bool:
+    return _current.get() is not None
+
+
+def dbg(source: str, message: str, *args) -> None:
+    """Registra un mensaje si hay captura activa (si no, no hace nada)."""
+    capture = _current.get()
+    if capture is not None:
+        capture.add(source, message, args)
+
+
+@contextmanager
+def capture_debug(max_records: int = None) -> Iterator[DebugCapture]:
+    capture = DebugCapture(max_records)
+    token = _current.set(capture)
+    try:
+        yield capture
+    finally:
+        _current.reset(token)
+
+
+def _write_job_log(job_id: str, capture: DebugCapture, JOBS) -> None:
+    try:
+        os.makedirs(Config.OUTPUT_FOLDER, exist_ok=True)
+        log_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_log.txt")
+        job = JOBS.get(job_id, {})
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write(f"Job ID: {job_id}\nEstado: {job.get('state')}\nMensaje: {job.get('status')}\n\n")
+            f.write(capture.render())
+        if job_id in JOBS:
+            JOBS[job_id]["log_file"] = log_path
+        logger.info(f"🐞 Debug del job {job_id}: {capture.total} mensajes → {log_path}")
+    except Exception as e:
+        logger.error(f"❌ No se pudo guardar el debug del job {job_id}: {e}", exc_info=True)
+
+
+def run_with_debug(target: Callable, job_id: str, files, JOBS) -> None:
+    """Ejecuta target(job_id, files, JOBS) con captura activa y vuelca el buffer al log del job."""
+    with capture_debug() as capture:
+        try:
+            target(job_id, files, JOBS)
+        finally:
+            _write_job_log(job_id, capture, JOBS)
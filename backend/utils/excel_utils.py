@@ -1,12 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Escritura de Excel en streaming
+-------------------------------
+write_excel() escribe un DataFrame a .xlsx con xlsxwriter en modo
+constant_memory: las filas se vuelcan por bloques y cada fila terminada se
+baja al archivo, así la memoria no crece con la cantidad de movimientos (a
+diferencia de pd.ExcelWriter/openpyxl, que arma el libro entero en memoria).
+
+Los formatos nativos van por columna (montos "#,##0.00", enteros, fechas
+datetime "dd/mm/yyyy"); las columnas de texto (incluida `fecha` dd/mm/yyyy de
+los parsers) se escriben tal cual. Si hay más filas que las que admite una
+hoja, siguen en "Hoja (2)", "Hoja (3)", ...
+
+`highlight` marca filas enteras con formato condicional (fila amarilla si esa
+columna no está vacía): Excel lo resuelve al abrir, sin recargar el libro ni
+pintar celda por celda.
+
+    from utils.excel_utils import write_excel
+
+    write_excel(df, "salida.xlsx", sheet_name="Consolidado")
+    write_excel(df, buffer, sheet_name="SIRADIG", columns=["cuit", "monto"])
+    write_excel(df, "extracto.xlsx", sheet_name="Transactions", highlight="observaciones")
+"""
+
+import re
+from typing import IO, Dict, List, Optional, Sequence, Union
+
 import pandas as pd
-import io
-from openpyxl import load_workbook
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+EXCEL_MAX_ROWS = 1_048_576
+WRITE_CHUNK_ROWS = 50_000
+
+AMOUNT_FORMAT = "#,##0.00"
+INT_FORMAT = "0"
+DATE_FORMAT = "dd/mm/yyyy"
+HIGHLIGHT_COLOR = "#FFFF00"
+
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def sheet_title(name, default: str = "Datos") -> str:
+    """Nombre de hoja válido para Excel (sin []:*?/\\ y hasta 31 caracteres)."""
+    title = _INVALID_SHEET_CHARS.sub(" ", str(name or "")).strip()[:31]
+    return title or default
+
+
+def column_formats(df: pd.DataFrame, positions: Sequence[int]) -> List[Optional[str]]:
+    """num_format nativo de cada columna (por posición) según su dtype (None = texto/general)."""
+    formats = []
+    for j in positions:
+        dtype = df.dtypes.iloc[j]
+        if pd.api.types.is_bool_dtype(dtype):
+            formats.append(None)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            formats.append(DATE_FORMAT)
+        elif pd.api.types.is_integer_dtype(dtype):
+            formats.append(INT_FORMAT)
+        elif pd.api.types.is_float_dtype(dtype):
+            formats.append(AMOUNT_FORMAT)
+        else:
+            formats.append(None)
+    return formats
+
+
+def _cell_values(s: pd.Series) -> list:
+    """Valores de la columna como objetos Python, con NaN/NaT/NA → None (celda vacía)."""
+    if pd.api.types.is_datetime64_any_dtype(s.dtype) and getattr(s.dt, "tz", None) is not None:
+        s = s.dt.tz_localize(None)
+    values = s.astype(object)
+    return values.where(s.notna(), None).tolist()
+
+
+def write_excel(
+    df: pd.DataFrame,
+    target: Union[str, IO[bytes]],
+    sheet_name: str = "Datos",
+    columns: Optional[Sequence] = None,
+    chunk_rows: int = WRITE_CHUNK_ROWS,
+    highlight: Optional[str] = None,
+) -> None:
+    """
+    Escribe `df` (o solo `columns`) en `target` (ruta o archivo binario) con
+    memoria acotada: nunca materializa más de `chunk_rows` filas a la vez.
+    Con `highlight` (una de `columns`) las filas con esa celda no vacía van resaltadas.
+    """
+    columns = list(df.columns if columns is None else columns)
+    if highlight is not None and highlight not in columns:
+        highlight = None
+    positions = [df.columns.get_loc(c) for c in columns]
+    title = sheet_title(sheet_name)
+    per_sheet = EXCEL_MAX_ROWS - 1  # la primera fila es el encabezado
+
+    wb = xlsxwriter.Workbook(target, {
+        "constant_memory": True,
+        "nan_inf_to_errors": True,
+        "remove_timezone": True,
+    })
+    try:
+        header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        cache: Dict[str, object] = {}
+        col_fmts = []
+        for f in column_formats(df, positions):
+            if f and f not in cache:
+                cache[f] = wb.add_format({"num_format": f})
+            col_fmts.append(cache.get(f))
+        flagged_fmt = wb.add_format({"bg_color": HIGHLIGHT_COLOR}) if highlight is not None else None
+
+        def finish_sheet(ws, last_row: int) -> None:
+            if flagged_fmt is None or last_row < 1:
+                return
+            col = xl_col_to_name(columns.index(highlight))
+            ws.conditional_format(1, 0, last_row, len(columns) - 1, {
+                "type": "formula",
+                "criteria": f'=LEN(TRIM(${col}2))>0',
+                "format": flagged_fmt,
+            })
+
+        def new_sheet(number: int):
+            ws = wb.add_worksheet(title if number == 1 else sheet_title(f"{title[:25]} ({number})"))
+            for j, fmt in enumerate(col_fmts):
+                if fmt is not None:
+                    ws.set_column(j, j, None, fmt)
+            ws.write_row(0, 0, [str(c) for c in columns], header_fmt)
+            return ws
+
+        sheet_no = 1
+        ws = new_sheet(sheet_no)
+        row = 1
+        total = len(df)
+        for start in range(0, total, max(1, chunk_rows)):
+            block = df.iloc[start:start + chunk_rows, positions]
+            cells = [_cell_values(block.iloc[:, j]) for j in range(len(positions))]
+            for values in zip(*cells):
+                if row > per_sheet:
+                    finish_sheet(ws, row - 1)
+                    sheet_no += 1
+                    ws = new_sheet(sheet_no)
+                    row = 1
+                ws.write_row(row, 0, values)
+                row += 1
+            del block, cells
+        finish_sheet(ws, row - 1)
+    finally:
+        wb.close()
+
 
 def exportar_excel(df: pd.DataFrame, nombre_archivo: str, sheet_name="Datos"):
-    """Exporta DataFrame a un Excel en memoria."""
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-    buffer.seek(0)
-    with open(nombre_archivo, "wb") as f:
-        f.write(buffer.read())
+    """Exporta DataFrame a un Excel (streaming, memoria acotada)."""
+    write_excel(df, nombre_archivo, sheet_name=sheet_name)
+
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Formatos columnares de resultado (CSV / Parquet / Feather)
+----------------------------------------------------------
+Para consumidores automáticos (conciliaciones) que hoy releen el .xlsx con
+pandas: las mismas tablas del ZIP, con tipos explícitos, en formatos que se
+leen sin parsear Excel. El .xlsx sigue yendo siempre para los usuarios.
+
+Tipos (MOVEMENT_DTYPES): montos float64, año/mes Int64, texto como "string"
+(fecha queda dd/mm/yyyy, igual que en el Excel). Parquet y Feather necesitan
+pyarrow; si no está instalado esos formatos no se ofrecen.
+
+    formats = parse_formats(request.form.get("formats", ""))   # ["xlsx", "parquet"]
+    entries += frame_entries("00_CONSOLIDADO", df, formats)
+"""
+
+import io
+from typing import IO, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+
+from utils.result_archive import Entry
+
+try:
+    import pyarrow  # noqa: F401  (motor de to_parquet / to_feather)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+FORMATS = ("xlsx", "csv", "parquet", "feather")
+COLUMNAR_FORMATS = ("csv", "parquet", "feather")
+
+MOVEMENT_DTYPES = {
+    "fecha": "string",
+    "mes": "Int64",
+    "año": "Int64",
+    "detalle": "string",
+    "referencia": "string",
+    "debito": "float64",
+    "credito": "float64",
+    "saldo": "float64",
+    "banco": "string",
+    "moneda": "string",
+}
+
+
+def available_formats() -> List[str]:
+    return [f for f in FORMATS if HAS_PYARROW or f not in ("parquet", "feather")]
+
+
+def parse_formats(raw: Optional[str]) -> List[str]:
+    """
+    "parquet,csv" → ["xlsx", "csv", "parquet"] (xlsx siempre, orden de FORMATS).
+    ValueError si se pide un formato desconocido o sin su dependencia.
+    """
+    requested = {f.strip().lower() for f in (raw or "").replace(";", ",").split(",") if f.strip()}
+    unknown = requested - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Formato no soportado: {', '.join(sorted(unknown))} (válidos: {', '.join(FORMATS)})")
+    missing = requested - set(available_formats())
+    if missing:
+        raise ValueError(f"Formato no disponible en este servidor (falta pyarrow): {', '.join(sorted(missing))}")
+    requested.add("xlsx")
+    return [f for f in FORMATS if f in requested]
+
+
+def typed_frame(df: pd.DataFrame, columns: Optional[Sequence] = None) -> pd.DataFrame:
+    """Copia con tipos explícitos: MOVEMENT_DTYPES y el resto de las columnas de texto como "string"."""
+    out = df[list(columns)] if columns is not None else df
+    converted = {}
+    for col in out.columns:
+        s = out[col]
+        dtype = MOVEMENT_DTYPES.get(col)
+        if dtype in ("Int64", "float64"):
+            converted[col] = pd.to_numeric(s, errors="coerce").astype(dtype)
+        elif dtype == "string" or s.dtype == object:
+            converted[col] = s.astype("string")
+        else:
+            converted[col] = s
+    return pd.DataFrame(converted).reset_index(drop=True)
+
+
+class FramePart(NamedTuple):
+    """Writer de una entrada CSV/Parquet/Feather; picklable como ExcelPart."""
+    df: pd.DataFrame
+    fmt: str
+    columns: Optional[Sequence] = None
+
+    def __call__(self, fh: IO[bytes]) -> None:
+        fh.write(self.render())
+
+    def render(self) -> bytes:
+        df = typed_frame(self.df, self.columns)
+        buffer = io.BytesIO()
+        if self.fmt == "csv":
+            df.to_csv(buffer, index=False, encoding="utf-8")
+        elif self.fmt == "parquet":
+            df.to_parquet(buffer, index=False)
+        elif self.fmt == "feather":
+            df.to_feather(buffer)
+        else:
+            raise ValueError(f"Formato no soportado: {self.fmt}")
+        return buffer.getvalue()
+
+
+def frame_entries(basename: str, df: pd.DataFrame, formats: Sequence[str],
+                  columns: Optional[Sequence] = None) -> List[Entry]:
+    """Entradas `basename.csv` / `.parquet` / `.feather` de los formatos columnares pedidos."""
+    return [
+        (f"{basename}.{fmt}", FramePart(df, fmt, list(columns) if columns is not None else None))
+        for fmt in formats if fmt in COLUMNAR_FORMATS
+    ]
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas livianas del pipeline
+------------------------------
+- span(nombre): context manager que mide una etapa (PDFReader, OCR, Camelot,
+  parser, consolidate, Excel). Alimenta el histograma global de latencias y,
+  si hay un colector activo, los tiempos del archivo en curso.
+- collect_stages(): abre un colector por archivo/job (contextvar, así cada
+  thread de job tiene el suyo sin pasarlo por parámetro).
+- inc / observe / gauge_add: contadores, histogramas y gauges sueltos.
+- render_prometheus(): exporta todo en formato texto de Prometheus (/api/metrics).
+
+Sin dependencias externas: el registro es un dict protegido por un lock.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+# Buckets por defecto (segundos) y para conteos de páginas
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+PAGES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_HELP = {
+    "tga_stage_seconds": "Duración de cada etapa del pipeline",
+    "tga_ocr_pages": "Páginas procesadas por OCR por pasada",
+    "tga_pdf_pages": "Páginas por PDF procesado",
+    "tga_pdfreader_cache_total": "Consultas al cache de PDFReader",
+    "tga_files_total": "Archivos procesados por resultado",
+    "tga_jobs_active": "Jobs en cola o en proceso",
+    "tga_page_shards_total": "Shards de páginas parseados en paralelo",
+    "tga_page_carry_mismatch_total": "Saldos que no encadenan entre shards de páginas",
+}
+
+_BUCKETS = {
+    "tga_ocr_pages": PAGES_BUCKETS,
+    "tga_pdf_pages": PAGES_BUCKETS,
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+_gauges: Dict[str, Dict[LabelKey, float]] = {}
+_histograms: Dict[str, Dict[LabelKey, list]] = {}  # [bucket_counts..., sum, count]
+
+_current_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("tga_current_stages", default=None)
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# ---------------------------------------------------------------------
+# API de registro
+# ---------------------------------------------------------------------
+def inc(name: str, value: float = 1, **labels) -> None:
+    with _lock:
+        series = _counters.setdefault(name, {})
+        k = _key(labels)
+        series[k] = series.get(k, 0) + value
+
+
+def gauge_add(name: str, value: float, **labels) -> None:
+    with _lock:
+        series = _gauges.setdefault(name, {})
+        k = _key(labels)
+        series[k] = series.get(k, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    buckets = _BUCKETS.get(name, SECONDS_BUCKETS)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        data = series.setdefault(_key(labels), [0] * len(buckets) + [0.0, 0])
+        for i, upper in enumerate(buckets):
+            if value <= upper:
+                data[i] += 1
+        data[-2] += value
+        data[-1] += 1
+
+
+# ---------------------------------------------------------------------
+# Spans y colector por archivo
+# ---------------------------------------------------------------------
+@contextmanager
+def span(stage: str, **labels) -> Iterator[None]:
+    """Mide una etapa. Se registra aunque la etapa termine con excepción."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - t0, **labels)
+
+
+def record_stage(stage: str, elapsed: float, **labels) -> None:
+    """Registra una etapa ya medida (p.ej. en un worker del pool, donde span no llega)."""
+    observe("tga_stage_seconds", elapsed, stage=stage, **labels)
+    stages = _current_stages.get()
+    if stages is not None:
+        stages[stage] = round(stages.get(stage, 0.0) + elapsed, 4)
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, float]]:
+    """Colector de tiempos por etapa: {etapa: segundos} (acumula si se repite)."""
+    stages: Dict[str, float] = {}
+    token = _current_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _current_stages.reset(token)
+
+
+# ---------------------------------------------------------------------
+# Exportación Prometheus
+# ---------------------------------------------------------------------
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus() -> str:
+    out = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            out.append(f"# HELP {name} {_HELP.get(name, name)}")
+            out.append(f"# TYPE {name} counter")
+            for key, value in sorted(series.items()):
+                out.append(f"{name}{_fmt_labels(key)} {_fmt_value(value)}")
+
+        for name, series in sorted(_gauges.items()):
+            out.append(f"# HELP {name} {_HELP.get(name, name)}")
+            out.append(f"# TYPE {name} gauge")
+            for key, value in sorted(series.items()):
+                out.append(f"{name}{_fmt_labels(key)} {_fmt_value(value)}")
+
+        for name, series in sorted(_histograms.items()):
+            buckets = _BUCKETS.get(name, SECONDS_BUCKETS)
+            out.append(f"# HELP {name} {_HELP.get(name, name)}")
+            out.append(f"# TYPE {name} histogram")
+            for key, data in sorted(series.items()):
+                for upper, count in zip(buckets, data):
+                    out.append(f"{name}_bucket{_fmt_labels(key, (('le', _fmt_value(upper)),))} {count}")
+                out.append(f"{name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {data[-1]}")
+                out.append(f"{name}_sum{_fmt_labels(key)} {round(data[-2], 6)}")
+                out.append(f"{name}_count{_fmt_labels(key)} {data[-1]}")
+    return "\n".join(out) + "\n"
+
+
+def reset() -> None:
+    """Vacía el registro (útil en benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Profiling a demanda por job
+---------------------------
+Corre la función de procesamiento de un job bajo cProfile y, opcionalmente,
+toma snapshots periódicos de tracemalloc. Los artefactos quedan en
+OUTPUT_FOLDER junto al ZIP de resultado ({job_id}_profile.zip):
+
+  - profile.pstats       → abrir con `python -m pstats` o snakeviz
+  - profile.txt          → top de funciones por tiempo acumulado y propio
+  - memory.txt           → (opcional) top de asignaciones por snapshot
+
+Un solo job perfilado a la vez (reserve_slot): tracemalloc.start/stop son
+globales al proceso y, desde Python 3.12, cProfile no admite dos perfiladores
+activos. Los jobs sin profiling siguen en paralelo, así que el reporte de
+memoria puede incluir asignaciones de ellos.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import zipfile
+from typing import Callable, List, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 60
+TOP_ALLOCATIONS = 25
+MEMORY_SAMPLE_SECONDS = 5.0
+
+_slot = threading.Lock()
+
+
+def reserve_slot() -> bool:
+    """Reserva el lugar del job perfilado; False si ya hay uno corriendo."""
+    return _slot.acquire(blocking=False)
+
+
+def release_slot() -> None:
+    if _slot.locked():
+        _slot.release()
+
+
+def _pstats_report(profiler: cProfile.Profile) -> str:
+    buf = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buf).strip_dirs()
+    buf.write("=== Ordenado por tiempo acumulado ===\n")
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    buf.write("\n=== Ordenado por tiempo propio ===\n")
+    stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+    return buf.getvalue()
+
+
+def _memory_report(samples: List[Tuple[float, tracemalloc.Snapshot]]) -> str:
+    out = []
+    first = samples[0][1] if samples else None
+    for elapsed, snap in samples:
+        current = sum(s.size for s in snap.statistics("filename"))
+        out.append(f"=== t={elapsed:.1f}s | asignado={current / 1024 / 1024:.1f} MB ===")
+        for stat in snap.statistics("lineno")[:TOP_ALLOCATIONS]:
+            out.append(str(stat))
+        out.append("")
+    if first is not None and len(samples) > 1:
+        out.append("=== Crecimiento primer → último snapshot ===")
+        for stat in samples[-1][1].compare_to(first, "lineno")[:TOP_ALLOCATIONS]:
+            out.append(str(stat))
+    return "\n".join(out) + "\n"
+
+
+def run_profiled(target: Callable, job_id: str, files, JOBS, memory: bool = False,
+                 sample_seconds: float = MEMORY_SAMPLE_SECONDS) -> None:
+    """
+    Ejecuta target(job_id, files, JOBS) bajo cProfile (y tracemalloc si memory=True).
+    Deja la ruta del ZIP de artefactos en JOBS[job_id]["profile_file"].
+    El llamador reservó el lugar con reserve_slot(); se libera al terminar.
+    """
+    try:
+        _run_profiled(target, job_id, files, JOBS, memory, sample_seconds)
+    finally:
+        release_slot()
+
+
+def _run_profiled(target: Callable, job_id: str, files, JOBS, memory: bool,
+                  sample_seconds: float) -> None:
+    samples: List[Tuple[float, tracemalloc.Snapshot]] = []
+    stop = threading.Event()
+    t0 = time.perf_counter()
+    sampler = None
+
+    if memory:
+        tracemalloc.start(10)
+
+        def _sample():
+            while not stop.wait(sample_seconds):
+                samples.append((time.perf_counter() - t0, tracemalloc.take_snapshot()))
+
+        sampler = threading.Thread(target=_sample, daemon=True)
+        sampler.start()
+
+    profiler = cProfile.Profile()
+    logger.info(f"🔬 Profiling activado para job {job_id} (memoria={'sí' if memory else 'no'})")
+    try:
+        profiler.runcall(target, job_id, files, JOBS)
+    finally:
+        if memory:
+            stop.set()
+            sampler.join(timeout=sample_seconds)
+            samples.append((time.perf_counter() - t0, tracemalloc.take_snapshot()))
+            tracemalloc.stop()
+        _write_artifacts(job_id, profiler, samples if memory else None, JOBS)
+
+
+def _write_artifacts(job_id: str, profiler: cProfile.Profile, samples, JOBS) -> None:
+    try:
+        os.makedirs(Config.OUTPUT_FOLDER, exist_ok=True)
+        profile_zip = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_profile.zip")
+        pstats_path = os.path.join(Config.OUTPUT_FOLDER, f"{job_id}_profile.pstats")
+        profiler.dump_stats(pstats_path)
+
+        with zipfile.ZipFile(profile_zip, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
+            zipf.write(pstats_path, arcname="profile.pstats")
+            zipf.writestr("profile.txt", _pstats_report(profiler))
+            if samples is not None:
+                zipf.writestr("memory.txt", _memory_report(samples))
+        os.remove(pstats_path)
+
+        if job_id in JOBS:
+            JOBS[job_id]["profile_file"] = profile_zip
+        logger.info(f"🔬 Artefactos de profiling guardados en {profile_zip}")
+    except Exception as e:
+        logger.error(f"❌ No se pudieron guardar artefactos de profiling: {e}", exc_info=True)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+ZIP de resultados sin archivos intermedios
+------------------------------------------
+Cada workbook se escribe directo en su entrada del ZIP (ZipFile.open(..., "w")),
+sin pasar por un .xlsx temporal en OUTPUT_FOLDER que después se copia y se borra.
+
+Una entrada es (nombre, writer): writer recibe el archivo de la entrada y
+escribe su contenido. El mismo listado sirve para:
+
+  - build_archive(path, entries): el ZIP en disco (un solo pasaje de bytes)
+  - stream_archive(entries): el ZIP generado al vuelo como respuesta HTTP; la
+    memoria queda acotada al workbook más grande, no al ZIP entero
+
+Con varios workers (Config.EXCEL_WORKERS) las entradas que saben renderizarse
+a bytes (render(): excel_entry, frame_export.frame_entries) se generan en el
+pool de procesos "excel" y el ZIP va escribiendo cada una a medida que termina (el orden de las entradas es el de terminación). `entries`
+puede ser un generador: lo que se entregue después (p.ej. el consolidado) se
+calcula mientras el pool ya está renderizando los anteriores.
+
+    entries = [excel_entry("extracto.xlsx", df, "Extracto")]
+    build_archive(output_zip_path, entries)
+    return Response(stream_archive(entries), mimetype="application/zip")
+"""
+
+import io
+import logging
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import IO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from config import Config
+from utils.excel_utils import write_excel
+from utils.metrics import record_stage, span
+from utils.worker_pool import get_pool, pool_workers
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, Callable[[IO[bytes]], None]]
+
+
+class ExcelPart(NamedTuple):
+    """Writer de una entrada .xlsx; picklable para renderizarse en otro proceso."""
+    df: pd.DataFrame
+    sheet_name: str = "Datos"
+    columns: Optional[Sequence] = None
+    highlight: Optional[str] = None
+
+    def __call__(self, fh: IO[bytes]) -> None:
+        with span("excel_write"):
+            write_excel(self.df, fh, sheet_name=self.sheet_name, columns=self.columns, highlight=self.highlight)
+
+    def render(self) -> bytes:
+        buffer = io.BytesIO()
+        write_excel(self.df, buffer, sheet_name=self.sheet_name, columns=self.columns, highlight=self.highlight)
+        return buffer.getvalue()
+
+
+def _render_part(part) -> Tuple[bytes, float]:
+    """
+    Corre en el worker del pool "excel" (ExcelPart, FramePart: cualquier writer con render()).
+    Devuelve también los segundos de render: los span del worker no llegan al proceso del job.
+    """
+    t0 = time.perf_counter()
+    data = part.render()
+    return data, time.perf_counter() - t0
+
+
+def excel_entry(arcname: str, df: pd.DataFrame, sheet_name: str = "Datos",
+                columns: Optional[Sequence] = None, highlight: Optional[str] = None) -> Entry:
+    """Entrada que escribe `df` como .xlsx (writer streaming de excel_utils)."""
+    return arcname, ExcelPart(df, sheet_name, list(columns) if columns is not None else None, highlight)
+
+
+def excel_workers() -> int:
+    return pool_workers(Config.EXCEL_WORKERS)
+
+
+def _write_sequential(zipf: zipfile.ZipFile, entries: Iterable[Entry]) -> Iterator[str]:
+    for arcname, writer in entries:
+        with zipf.open(arcname, "w") as fh:
+            writer(fh)
+        yield arcname
+
+
+def _write_parallel(zipf: zipfile.ZipFile, entries: Iterable[Entry], workers: int) -> Iterator[str]:
+    pool = get_pool("excel", workers)
+    pending: Dict[object, Tuple[str, object]] = {}
+
+    def store(fut) -> str:
+        arcname, part = pending.pop(fut)
+        try:
+            data, elapsed = fut.result()
+        except Exception as e:
+            # Worker caído o error al serializar: se renderiza acá mismo
+            logger.warning(f"⚠️ Render en paralelo de {arcname} falló ({e}); se genera en el proceso del job")
+            data, elapsed = _render_part(part)
+        if isinstance(part, ExcelPart):
+            record_stage("excel_write", elapsed)  # lo que mide ExcelPart.__call__ en el camino secuencial
+        zipf.writestr(arcname, data)
+        return arcname
+
+    for arcname, writer in entries:
+        if callable(getattr(writer, "render", None)):
+            pending[pool.submit(_render_part, writer)] = (arcname, writer)
+        else:
+            with zipf.open(arcname, "w") as fh:
+                writer(fh)
+            yield arcname
+        # Lo que ya terminó se escribe sin esperar al resto de las entradas
+        for fut in [f for f in pending if f.done()]:
+            yield store(fut)
+
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for fut in done:
+            yield store(fut)
+
+
+def write_entries(zipf: zipfile.ZipFile, entries: Iterable[Entry], workers: Optional[int] = None) -> Iterator[str]:
+    """Escribe cada entrada en el ZIP abierto; va devolviendo los nombres terminados."""
+    workers = excel_workers() if workers is None else workers
+    if isinstance(entries, (list, tuple)) and len(entries) < 2:
+        workers = 1  # una sola entrada: el pool solo agregaría la serialización
+    if workers > 1:
+        return _write_parallel(zipf, entries, workers)
+    return _write_sequential(zipf, entries)
+
+
+def build_archive(path: str, entries: Iterable[Entry], workers: Optional[int] = None) -> List[str]:
+    """Arma el ZIP en `path` escribiendo cada workbook directo en su entrada."""
+    done = []
+    with zipfile.ZipFile(path, "w") as zipf:
+        for arcname in write_entries(zipf, entries, workers):
+            done.append(arcname)
+            logger.info(f"  ✅ Agregado al ZIP: {arcname}")
+    return done
+
+
+class _ChunkSink:
+    """Destino del ZipFile en modo streaming: acumula bytes hasta que se drenan."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self.chunks = self.chunks, []
+        yield from chunks
+
+
+def stream_archive(entries: Iterable[Entry], workers: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Genera el ZIP por partes para una respuesta HTTP: después de cada entrada
+    se entregan sus bytes (ZipFile sobre un destino no seekable usa data
+    descriptors, así que no hace falta volver atrás a corregir encabezados).
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as zipf:
+        for _ in write_entries(zipf, entries, workers):
+            yield from sink.drain()
+    yield from sink.drain()  # directorio central
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Pools de procesos compartidos
+-----------------------------
+Un ProcessPoolExecutor por uso ("page_shards", "excel"), creado la primera vez
+y reutilizado entre jobs: los workers ya tienen pandas/parsers importados.
+Contexto spawn porque los jobs corren en threads de Flask (fork con threads
+vivos puede dejar locks tomados en el hijo).
+
+    pool = get_pool("excel", pool_workers(Config.EXCEL_WORKERS))
+    fut = pool.submit(render, part)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple
+
+_pools: Dict[str, Tuple[ProcessPoolExecutor, int]] = {}
+_lock = threading.Lock()
+
+
+def pool_workers(configured: int) -> int:
+    """Cantidad de procesos: la configurada, o os.cpu_count() si es 0."""
+    return configured or os.cpu_count() or 1
+
+
+def get_pool(name: str, workers: int) -> ProcessPoolExecutor:
+    """
+    Pool `name` con `workers` procesos. Se recrea si cambió la cantidad o si quedó
+    roto (BrokenProcessPool: un worker murió y el executor rechaza todo lo nuevo).
+    """
+    with _lock:
+        pool, size = _pools.get(name, (None, 0))
+        if pool is None or size != workers or getattr(pool, "_broken", False):
+            if pool is not None:
+                pool.shutdown(wait=False)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[name] = (pool, workers)
+        return pool
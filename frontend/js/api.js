@@ -13,7 +13,8 @@ const ENDPOINTS = {
         upload: `${API_BASE_URL}/extractos/upload`,
         status: (jobId) => `${API_BASE_URL}/extractos/status/${jobId}`,
         download: (jobId) => `${API_BASE_URL}/extractos/download/${jobId}`,
-        downloadLog: (jobId) => `${API_BASE_URL}/extractos/log/${jobId}`
+        downloadLog: (jobId) => `${API_BASE_URL}/extractos/log/${jobId}`,
+        downloadProfile: (jobId) => `${API_BASE_URL}/extractos/profile/${jobId}`
     },
     siradig: {
         upload: `${API_BASE_URL}/siradig/upload`,